@@ -1,6 +1,7 @@
 from fastapi import Request, HTTPException
 from app.domain.use_cases.chat_use_case import ChatUseCase
 from app.domain.use_cases.ingest_use_case import IngestUseCase
+from app.domain.services.ingest_queue import IngestJobQueue
 
 def get_vector_store(request: Request):
     return request.app.state.vector_store
@@ -23,3 +24,14 @@ def get_ingest_use_case(request: Request) -> IngestUseCase:
     if not hasattr(request.app.state, 'ingest_use_case'):
         raise HTTPException(status_code=503, detail="Ingest Use Case not initialized")
     return request.app.state.ingest_use_case
+
+async def get_ingest_queue(request: Request) -> IngestJobQueue:
+    """
+    Returns the ingestion job queue, starting one on first use if the lifespan did not.
+    """
+    queue = getattr(request.app.state, 'ingest_queue', None)
+    if queue is None:
+        queue = IngestJobQueue(get_ingest_use_case(request), sio=getattr(request.app.state, 'sio', None))
+        queue.start()
+        request.app.state.ingest_queue = queue
+    return queue
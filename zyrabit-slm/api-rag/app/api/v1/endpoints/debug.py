@@ -0,0 +1,65 @@
+import hmac
+import asyncio
+import logging
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.infrastructure.shared import config
+from app.infrastructure.shared.profiler import SamplingProfiler, dump_tasks
+
+logger = logging.getLogger("zyrabit.api")
+router = APIRouter()
+
+# One profile at a time: concurrent samplers would skew each other
+_profile_lock = asyncio.Lock()
+
+
+def require_admin(authorization: Optional[str] = Header(None)) -> None:
+    """Bearer DEBUG_ADMIN_TOKEN; the endpoints do not exist while the token is unset."""
+    expected = config.DEBUG_ADMIN_TOKEN
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    # Bytes: compare_digest rejects non-ASCII str (headers are decoded as latin-1)
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token.")
+
+
+@router.get("/debug/profile", dependencies=[Depends(require_admin)])
+async def profile(
+    seconds: float = Query(30, gt=0),
+    format: str = Query("speedscope", pattern="^(speedscope|collapsed)$"),
+    interval_ms: float = Query(10, ge=1, le=1000),
+    include_idle: bool = False,
+):
+    """
+    Samples every thread (event loop included) for `seconds` and returns a
+    speedscope JSON document or collapsed stacks for flamegraph tools.
+    """
+    if seconds > config.DEBUG_PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be <= {config.DEBUG_PROFILE_MAX_SECONDS}.")
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running.")
+
+    async with _profile_lock:
+        logger.info(f"🔬 Profiling all threads for {seconds}s (interval {interval_ms}ms)")
+        profiler = SamplingProfiler(interval=interval_ms / 1000, include_idle=include_idle)
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            await asyncio.to_thread(profiler.stop)
+
+    headers = {"X-Profile-Samples": str(profiler.ticks)}
+    if format == "collapsed":
+        headers["Content-Disposition"] = 'attachment; filename="zyrabit-profile.folded"'
+        return PlainTextResponse(profiler.collapsed(), headers=headers)
+    headers["Content-Disposition"] = 'attachment; filename="zyrabit-profile.speedscope.json"'
+    return JSONResponse(profiler.speedscope(), headers=headers)
+
+
+@router.get("/debug/tasks", dependencies=[Depends(require_admin)])
+async def tasks():
+    """Asyncio task dump: what every coroutine is currently awaiting."""
+    snapshot = dump_tasks()
+    return {"count": len(snapshot), "tasks": snapshot}
@@ -1,14 +1,25 @@
 # pyrefly: ignore [missing-import]
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, BackgroundTasks, Request
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request
+from pydantic import BaseModel
 import os
+import asyncio
+import hashlib
 import logging
-from app.infrastructure.shared.config import DOCS_DIR
-from app.api.v1.dependencies import get_ingest_use_case
-from app.domain.use_cases.ingest_use_case import IngestUseCase
+import tempfile
+from app.infrastructure.shared.config import DOCS_DIR, UPLOAD_CHUNK_BYTES
+from app.infrastructure.shared.validators.ingestion_validator import MAX_FILE_SIZE_BYTES
+from app.infrastructure.shared import tracing
+from app.infrastructure.shared.state_tracker import SovereignStateManager
+from app.api.v1.dependencies import get_ingest_queue, get_ingest_use_case
+from app.domain.services.ingest_queue import IngestJobQueue, public_job
+from app.domain.services.bulk_ingest import BulkIngest
+from app.domain.services.chunk_dedup import dedup_report
 
 logger = logging.getLogger("uvicorn.error")
 router = APIRouter()
 
+UPLOAD_TMP_PREFIX = ".upload-"
+
 @router.get("/documents")
 async def list_documents():
     """Lists all files in the document source directory."""
@@ -17,6 +28,8 @@ async def list_documents():
     
     files = []
     for f in os.listdir(DOCS_DIR):
+        if f.startswith(UPLOAD_TMP_PREFIX):
+            continue # upload still streaming
         if os.path.isfile(os.path.join(DOCS_DIR, f)):
             stats = os.stat(os.path.join(DOCS_DIR, f))
             files.append({
@@ -25,56 +38,121 @@ async def list_documents():
             })
     return {"documents": files}
 
-async def background_ingestion_task(file_path: str, filename: str, ingest_use_case: IngestUseCase, sio):
+@router.get("/documents/dedup")
+async def get_dedup_report():
+    """Chunks stored as references to a duplicate instead of embedded, and the embedding time/storage saved."""
+    return await asyncio.to_thread(dedup_report)
+
+def _write_chunk(out, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    out.write(chunk)
+
+async def stream_upload(file: UploadFile, dest_dir: str, max_bytes: int = MAX_FILE_SIZE_BYTES, chunk_size: int = UPLOAD_CHUNK_BYTES):
     """
-    Ingests the file and notifies the user via Socket.io upon completion.
+    Streams an upload into a temp file in `dest_dir` (same filesystem, so it can be renamed atomically),
+    hashing as it goes. Returns (temp_path, sha256, size); over `max_bytes` the temp file is removed and 413 raised.
     """
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=dest_dir, prefix=UPLOAD_TMP_PREFIX)
     try:
-        logger.info(f"🧬 Processing background ingestion for: {filename}")
-        await ingest_use_case.execute(file_path)
-        
-        # Proactive Notification from Zyra
-        if sio:
-            await sio.emit("chat_response", {
-                "response": f"¡Listo! He procesado el documento '{filename}' y ya está disponible en mi Vault. ¿Qué te gustaría que analicemos de él?",
-                "metadata": {
-                    "decision": "ingest-proactive",
-                    "latency_ms": 0,
-                    "sources": [filename],
-                    "rag_hits": 1
-                }
-            })
-            logger.info(f"📢 Proactive notification sent for {filename}")
-    except Exception as e:
-        logger.error(f"❌ Background ingestion failed for {filename}: {e}")
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(chunk_size):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"File too large. Limit is {max_bytes // (1024 * 1024)}MB.")
+                await asyncio.to_thread(_write_chunk, out, digest, chunk)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest(), size
 
 @router.post("/ingest")
 async def ingest_document(
-    request: Request,
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    ingest_use_case: IngestUseCase = Depends(get_ingest_use_case)
+    ingest_queue: IngestJobQueue = Depends(get_ingest_queue)
 ):
     """
-    Uploads and schedules ingestion in the background.
+    Uploads and queues ingestion. Progress: GET /v1/ingest/{job_id} or the `ingest_progress` Socket.io event.
     """
+    filename = os.path.basename(file.filename or "")
+    if not filename or filename.startswith(UPLOAD_TMP_PREFIX):
+        raise HTTPException(status_code=400, detail="Invalid filename.")
     os.makedirs(DOCS_DIR, exist_ok=True)
-    file_path = os.path.join(DOCS_DIR, file.filename)
+    file_path = os.path.join(DOCS_DIR, filename)
     
     try:
-        # 1. Save file locally
-        with open(file_path, "wb") as f:
-            f.write(await file.read())
-        
-        # 2. Schedule background processing with proactive notification
-        sio = getattr(request.app.state, 'sio', None)
-        background_tasks.add_task(background_ingestion_task, file_path, file.filename, ingest_use_case, sio)
+        with tracing.span("documents.ingest", filename=filename):
+            # 1. Stream to disk (bounded memory, size limit enforced mid-stream), then publish atomically
+            tmp_path, file_hash, size = await stream_upload(file, DOCS_DIR, max_bytes=MAX_FILE_SIZE_BYTES)
+            os.replace(tmp_path, file_path)
+            tracing.set_attributes(size_bytes=size)
+
+            # 2. Persist the job; the queue workers pick it up (and notify proactively when done)
+            job = await ingest_queue.submit(file_path, filename, file_hash=file_hash)
         
         return {
             "status": "accepted", 
-            "message": f"File {file.filename} uploaded and scheduled for ingestion.",
-            "filename": file.filename
+            "message": f"File {filename} uploaded and scheduled for ingestion.",
+            "filename": filename,
+            "job_id": job["job_id"],
+            "state": job["state"]
         }
+    except HTTPException as e:
+        logger.warning(f"Rejected upload {filename}: {e.detail}")
+        raise
     except Exception as e:
-        logger.error(f"Failed to initiate ingestion for {file.filename}: {e}")
+        logger.error(f"Failed to initiate ingestion for {filename}: {e}")
         raise HTTPException(status_code=500, detail="Internal server error.")
+
+@router.get("/ingest/{job_id}")
+async def get_ingest_job(job_id: str):
+    """Status of an ingestion job: queued, extracting, embedding, done or failed."""
+    job = SovereignStateManager.get_ingest_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Ingestion job not found.")
+    return public_job(job)
+
+class BatchIngestRequest(BaseModel):
+    directory: str = ""  # relative to DOCS_DIR
+    domain: str = "general"
+
+@router.post("/ingest/batch")
+async def ingest_directory(body: BatchIngestRequest, request: Request):
+    """
+    Ingests a directory inside DOCS_DIR in the background, checkpointing every batch.
+    Posting the same directory again resumes its unfinished run. Progress: GET /v1/ingest/batch/{run_id}.
+    """
+    root = os.path.realpath(DOCS_DIR)
+    directory = os.path.join(DOCS_DIR, body.directory) if body.directory else DOCS_DIR
+    target = os.path.realpath(directory)
+    if target != root and not target.startswith(root + os.sep):
+        raise HTTPException(status_code=400, detail="Directory must be inside the documents directory.")
+    if not os.path.isdir(target):
+        raise HTTPException(status_code=404, detail="Directory not found.")
+
+    runs = getattr(request.app.state, "bulk_ingests", None)
+    if runs is None:
+        runs = request.app.state.bulk_ingests = {}
+    runner = BulkIngest(get_ingest_use_case(request))
+    run = await runner.open(directory, body.domain)
+    active = runs.get(run["run_id"])
+    if active and not active.task.done():
+        raise HTTPException(status_code=409, detail=f"Run {run['run_id']} is already in progress.")
+
+    runner.task = asyncio.create_task(runner.run(directory, body.domain), name=f"zyrabit-bulk-ingest-{run['run_id']}")
+    runs[run["run_id"]] = runner
+    logger.info(f"Bulk ingest {run['run_id']} started for {directory}")
+    return {"status": "accepted", "run_id": run["run_id"], "resumed": run["files_total"] > 0}
+
+@router.get("/ingest/batch/{run_id}")
+async def get_ingest_run(run_id: str, request: Request):
+    """Progress of a bulk ingest run: files and chunks done, chunks/sec and ETA while it runs."""
+    runner = getattr(request.app.state, "bulk_ingests", {}).get(run_id)
+    if runner and not runner.task.done():
+        return runner.progress
+    # Finished, interrupted, or started by another process (scripts/ingest.py): checkpointed state
+    run = SovereignStateManager.get_ingest_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Ingest run not found.")
+    return {**runner.progress, **run} if runner else run
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Request, Header
 from typing import Optional
 from app.api.v1.dependencies import get_chat_use_case
 from app.domain.use_cases.chat_use_case import ChatUseCase
+from app.domain.services.gatekeeper import Gatekeeper
 from app.infrastructure.integrations.n8n_adapter import N8nAdapter, N8nIntegrationPolicy
 
 router = APIRouter()
@@ -57,3 +58,54 @@ async def handle_n8n_webhook(
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+MAX_ANONYMIZE_BATCH = 10000
+
+
+@router.post("/integrations/n8n/anonymize")
+async def handle_n8n_anonymize(
+    request: Request,
+    authorization: Optional[str] = Header(None),
+    x_zyrabit_signature: Optional[str] = Header(None),
+    n8n_adapter: N8nAdapter = Depends(get_n8n_adapter)
+):
+    """
+    Bulk PII masking for n8n workflows: {"texts": [...]} -> one result per record.
+    """
+    try:
+        raw_body = await request.body()
+        if n8n_adapter is None:
+            # Masking only: no chat automation is executed on this route.
+            policy = N8nIntegrationPolicy.from_env()
+            n8n_adapter = N8nAdapter(policy=policy, execute_automation=lambda text: "")
+
+        n8n_adapter.authorize_request(
+            authorization_header=authorization or "",
+            signature_header=x_zyrabit_signature or "",
+            raw_body=raw_body
+        )
+
+        payload = await request.json()
+        texts = payload.get("texts")
+        if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+            raise ValueError("Payload must include a 'texts' list of strings.")
+        if len(texts) > MAX_ANONYMIZE_BATCH:
+            raise ValueError(f"Batch too large ({len(texts)} records). Limit is {MAX_ANONYMIZE_BATCH}.")
+
+        masked = Gatekeeper.mask_pii_many(texts)
+        return {
+            "status": "processed",
+            "provider": "n8n",
+            "count": len(masked),
+            "results": [
+                {"sanitized_text": sanitized, "token_map": token_map}
+                for sanitized, token_map in masked
+            ]
+        }
+    except PermissionError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,7 +1,10 @@
 from .pii_pipeline import (
     anonymize_text,
+    anonymize_many,
     sanitize_pii,
     deanonymize_text,
+    stream_deanonymize,
+    StreamingDeanonymizer,
     build_default_pipeline,
     build_security_pipeline, # Alias compatible
     PipelineContext,
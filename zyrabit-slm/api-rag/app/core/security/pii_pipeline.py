@@ -1,10 +1,17 @@
 import re
 import logging
-from typing import Dict, List, Tuple, Optional, Any, Protocol
+from bisect import bisect_right
+from typing import Dict, List, Tuple, Optional, Any, Protocol, Iterable, Iterator
 from dataclasses import dataclass, field
 
 logger = logging.getLogger("zyrabit.security")
 
+# Joins batch records for single-pass scanning; no default detector can match across it.
+RECORD_SEPARATOR = "\x1e"
+
+_EMPTY_COUNTS = {"email": 0, "card": 0, "phone": 0, "amount": 0, "ssn": 0, "name": 0}
+_PREFIXES = {"name": "USER_NAME", "email": "USER_EMAIL"}
+
 @dataclass
 class EntitySpan:
     start: int
@@ -108,29 +115,72 @@ class PiiEngine:
         return entities
 
     def anonymize(self, text: str) -> AnonymizationResult:
-        all_entities = self.detect_all(text)
-        deduped = dedupe_entities(all_entities)
-        
-        token_map = {}
-        detected_counts = {"email": 0, "card": 0, "phone": 0, "amount": 0, "ssn": 0, "name": 0}
-        sanitized = text
-        
-        for e in sorted(deduped, key=lambda x: x.start, reverse=True):
-            label_upper = e.label.upper()
-            prefix = "USER_NAME" if e.label == "name" else ("USER_EMAIL" if e.label == "email" else label_upper)
-            
-            count = sum(1 for k in token_map if prefix in k) + 1
-            placeholder = f"<{prefix}_{count}>"
-            
-            token_map[placeholder] = e.value
-            detected_counts[e.label] = detected_counts.get(e.label, 0) + 1
-            sanitized = sanitized[:e.start] + placeholder + sanitized[e.end:]
-            
-        return AnonymizationResult(
-            sanitized_text=sanitized, 
-            token_map=token_map,
-            detected_entities=detected_counts
-        )
+        return _render(text, dedupe_entities(self.detect_all(text)))
+
+    def anonymize_many(self, texts: List[str], join_records: bool = True) -> List[AnonymizationResult]:
+        """
+        Batch variant of anonymize() for bulk workloads (n8n, Telegram broadcasts).
+        With join_records, all records are scanned in a single regex pass over a
+        sentinel-joined buffer and the spans are routed back to their record.
+        """
+        if not texts:
+            return []
+        if not join_records or any(RECORD_SEPARATOR in t for t in texts):
+            return [self.anonymize(t) for t in texts]
+
+        starts = []
+        cursor = 0
+        for t in texts:
+            starts.append(cursor)
+            cursor += len(t) + len(RECORD_SEPARATOR)
+
+        buckets: List[List[EntitySpan]] = [[] for _ in texts]
+        for e in dedupe_entities(self.detect_all(RECORD_SEPARATOR.join(texts))):
+            idx = bisect_right(starts, e.start) - 1
+            base = starts[idx]
+            if e.end > base + len(texts[idx]):
+                # A custom detector matched across the sentinel: scan records one by one.
+                return [self.anonymize(t) for t in texts]
+            e.start -= base
+            e.end -= base
+            buckets[idx].append(e)
+
+        return [_render(t, spans) for t, spans in zip(texts, buckets)]
+
+def _render(text: str, entities: List[EntitySpan]) -> AnonymizationResult:
+    """
+    Builds the sanitized text in one forward pass over sorted, non-overlapping spans.
+    Placeholders are numbered from the end of the text (the last <CARD> is <CARD_1>).
+    """
+    detected_counts = _EMPTY_COUNTS.copy()
+    if not entities:
+        return AnonymizationResult(sanitized_text=text, token_map={}, detected_entities=detected_counts)
+
+    prefixes = [_PREFIXES.get(e.label) or e.label.upper() for e in entities]
+    remaining: Dict[str, int] = {}
+    for prefix in prefixes:
+        remaining[prefix] = remaining.get(prefix, 0) + 1
+
+    parts = []
+    placeholders = []
+    last = 0
+    for e, prefix in zip(entities, prefixes):
+        placeholder = f"<{prefix}_{remaining[prefix]}>"
+        remaining[prefix] -= 1
+        parts.append(text[last:e.start])
+        parts.append(placeholder)
+        placeholders.append(placeholder)
+        last = e.end
+        detected_counts[e.label] = detected_counts.get(e.label, 0) + 1
+    parts.append(text[last:])
+
+    # Keep the legacy insertion order (last occurrence first).
+    token_map = {placeholders[i]: entities[i].value for i in range(len(entities) - 1, -1, -1)}
+    return AnonymizationResult(
+        sanitized_text="".join(parts),
+        token_map=token_map,
+        detected_entities=detected_counts
+    )
 
 # --- Singleton Engine ---
 
@@ -146,6 +196,9 @@ _DEFAULT_ENGINE = PiiEngine([
 def anonymize_text(text: str) -> AnonymizationResult:
     return _DEFAULT_ENGINE.anonymize(text)
 
+def anonymize_many(texts: List[str], join_records: bool = True) -> List[AnonymizationResult]:
+    return _DEFAULT_ENGINE.anonymize_many(texts, join_records=join_records)
+
 def sanitize_pii(text: str) -> Tuple[str, bool]:
     """Legacy contract: returns (text, was_redacted_bool)"""
     res = anonymize_text(text)
@@ -157,6 +210,63 @@ def deanonymize_text(text: str, token_map: Dict[str, str]) -> str:
         restored = restored.replace(token, value)
     return restored
 
+class StreamingDeanonymizer:
+    """
+    Incremental deanonymize_text() for token streams.
+    Only a trailing fragment that could still become a <LABEL_N> placeholder is
+    held back; everything else is emitted as soon as it is unambiguous.
+    """
+    def __init__(self, token_map: Dict[str, str]):
+        self.token_map = token_map
+        self._prefixes = {token[:i] for token in token_map for i in range(1, len(token))}
+        self._pending = ""
+
+    def feed(self, delta: str) -> str:
+        if not self.token_map:
+            return delta
+        text = self._pending + delta
+        self._pending = ""
+        out = []
+        i = 0
+        while True:
+            j = text.find("<", i)
+            if j == -1:
+                out.append(text[i:])
+                break
+            out.append(text[i:j])
+            k = text.find(">", j + 1)
+            if k == -1:
+                tail = text[j:]
+                if tail in self._prefixes:
+                    self._pending = tail
+                    break
+                out.append("<")
+                i = j + 1
+                continue
+            token = text[j:k + 1]
+            if token in self.token_map:
+                out.append(self.token_map[token])
+                i = k + 1
+            else:
+                out.append("<")
+                i = j + 1
+        return "".join(out)
+
+    def flush(self) -> str:
+        """Emits whatever is still buffered once the stream ends."""
+        tail, self._pending = self._pending, ""
+        return tail
+
+def stream_deanonymize(chunks: Iterable[str], token_map: Dict[str, str]) -> Iterator[str]:
+    deanonymizer = StreamingDeanonymizer(token_map)
+    for chunk in chunks:
+        restored = deanonymizer.feed(chunk)
+        if restored:
+            yield restored
+    tail = deanonymizer.flush()
+    if tail:
+        yield tail
+
 class ShardAnonymizationInterceptor:
     def __init__(self, shard_size: int = 1000, overlap: int = 100):
         self.shard_size = shard_size
@@ -173,6 +283,9 @@ class ShardAnonymizationInterceptor:
     def process_response(self, text: str, context: PipelineContext) -> str:
         return deanonymize_text(text, context.token_map)
 
+    def process_response_stream(self, chunks: Iterable[str], context: PipelineContext) -> Iterator[str]:
+        return stream_deanonymize(chunks, context.token_map)
+
 def build_default_pipeline(*args, **kwargs):
     shard_size = kwargs.get("shard_size", 1000)
     overlap = kwargs.get("overlap", 100)
@@ -0,0 +1,164 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Callable, Dict, Iterator, Optional
+from app.infrastructure.shared.config import BULK_INGEST_BATCH_CHUNKS, BULK_INGEST_CONCURRENCY
+from app.infrastructure.shared.state_tracker import SovereignStateManager
+from app.infrastructure.shared import tracing
+
+logger = logging.getLogger("zyrabit.api")
+
+INGESTIBLE_EXTENSIONS = (".md", ".pdf")
+
+
+def discover(directory: str) -> Iterator[str]:
+    """Markdown/PDF files under `directory` in a stable order, skipping hidden paths and upload temp files."""
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for name in sorted(filenames):
+            if not name.startswith(".") and name.lower().endswith(INGESTIBLE_EXTENSIONS):
+                yield os.path.join(dirpath, name)
+
+
+class BulkIngest:
+    """
+    Ingests a whole directory through IngestUseCase with checkpoints in SQLite.
+
+    Files are listed once into ingest_run_files; `concurrency` workers extract and
+    chunk them (one document in memory per worker) and a single writer embeds about
+    `batch_chunks` chunks per vector store call, then checkpoints those files. Running
+    it again on the same directory resumes the unfinished run from its pending files.
+    Chunk ids are content hashes, so a file re-processed after a crash is not duplicated.
+    """
+
+    def __init__(
+        self,
+        ingest_use_case,
+        concurrency: int = BULK_INGEST_CONCURRENCY,
+        batch_chunks: int = BULK_INGEST_BATCH_CHUNKS,
+        on_progress: Optional[Callable[[Dict], None]] = None,
+    ):
+        self.ingest_use_case = ingest_use_case
+        self.concurrency = max(1, concurrency)
+        self.batch_chunks = max(1, batch_chunks)
+        self.on_progress = on_progress
+        self.run_id: Optional[str] = None
+        self.progress: Dict = {}
+        self.task: Optional[asyncio.Task] = None
+
+    async def open(self, directory: str, domain: str = "general") -> Dict:
+        """Resumes the unfinished run for this directory or starts a new one (before any file is read)."""
+        run = await asyncio.to_thread(SovereignStateManager.open_ingest_run, os.path.abspath(directory), domain)
+        self.run_id = run["run_id"]
+        self.progress = {**run, "seconds": 0.0, "chunks_per_sec": 0.0, "eta_seconds": None}
+        return run
+
+    async def run(self, directory: str, domain: str = "general") -> Dict:
+        """Ingests every pending file; returns the final progress (see _report)."""
+        run = await self.open(directory, domain) if self.run_id is None else self.progress
+        run_id = run["run_id"]
+        files = await asyncio.to_thread(lambda: list(discover(directory)))
+        total = await asyncio.to_thread(SovereignStateManager.add_ingest_run_files, run_id, files)
+        pending = await asyncio.to_thread(SovereignStateManager.pending_ingest_run_files, run_id)
+        run = await asyncio.to_thread(SovereignStateManager.get_ingest_run, run_id)
+        logger.info(f"📚 Bulk ingest {run_id}: {len(pending)}/{total} files pending in {directory}")
+
+        started = time.perf_counter()
+        session = {"files": 0, "chunks": 0}
+        self._report(run, started, session)
+        paths: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        ready: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        async def feed():
+            for path in pending:
+                await paths.put(path)
+            for _ in range(self.concurrency):
+                await paths.put(None)
+
+        async def prepare():
+            while (path := await paths.get()) is not None:
+                try:
+                    prepared = await self.ingest_use_case.prepare(path, domain=domain)
+                except Exception as e:
+                    prepared = {"status": "error", "message": str(e)}
+                await ready.put((path, prepared))
+            await ready.put(None)
+
+        async def checkpoint(batch, outcomes):
+            nonlocal run
+            if batch:
+                await self.ingest_use_case.store_batch(batch, max_chunks_per_call=self.batch_chunks)
+                outcomes += [(doc.file_path, "done", doc.chunk_count) for doc in batch]
+            run = await asyncio.to_thread(SovereignStateManager.checkpoint_ingest_run, run_id, outcomes)
+            session["files"] += len(outcomes)
+            session["chunks"] += sum(chunks for _, _, chunks in outcomes)
+            self._report(run, started, session)
+
+        async def write():
+            batch, outcomes, chunks, running = [], [], 0, self.concurrency
+            while running:
+                item = await ready.get()
+                if item is None:
+                    running -= 1
+                    continue
+                path, prepared = item
+                if isinstance(prepared, dict):
+                    state = "skipped" if prepared.get("status") == "skipped" else "failed"
+                    if state == "failed":
+                        logger.error(f"❌ Bulk ingest skipped {os.path.basename(path)}: {prepared.get('message')}")
+                    outcomes.append((path, state, 0))
+                else:
+                    batch.append(prepared)
+                    # A streamed file is embedded batch by batch as it is read: checkpoint it right away
+                    chunks += len(prepared.chunks) if prepared.parts is None else self.batch_chunks
+                if chunks >= self.batch_chunks or len(outcomes) >= self.batch_chunks:
+                    await checkpoint(batch, outcomes)
+                    batch, outcomes, chunks = [], [], 0
+            if batch or outcomes:
+                await checkpoint(batch, outcomes)
+
+        with tracing.span("ingest.bulk", run_id=run_id, files=len(pending), concurrency=self.concurrency):
+            tasks = [asyncio.create_task(feed()), asyncio.create_task(write())]
+            tasks += [asyncio.create_task(prepare()) for _ in range(self.concurrency)]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.to_thread(SovereignStateManager.finish_ingest_run, run_id, "interrupted")
+                logger.warning(f"⚠️ Bulk ingest {run_id} interrupted; run it again to resume")
+                raise
+            run = await asyncio.to_thread(SovereignStateManager.finish_ingest_run, run_id, "done")
+            tracing.set_attributes(chunks=session["chunks"], errors=run["errors"])
+
+        self._report(run, started, session)
+        logger.info(
+            f"✅ Bulk ingest {run_id}: {run['files_done']}/{run['files_total']} files, "
+            f"{session['chunks']} chunks in {self.progress['seconds']}s ({self.progress['chunks_per_sec']} chunks/s)"
+        )
+        return self.progress
+
+    def _report(self, run: Dict, started: float, session: Dict) -> None:
+        """Live stats: throughput of this session and an ETA from its per-file rate."""
+        elapsed = time.perf_counter() - started
+        remaining = run["files_total"] - run["files_done"]
+        eta = elapsed / session["files"] * remaining if session["files"] else None
+        self.progress = {
+            **run,
+            "seconds": round(elapsed, 3),
+            "chunks_per_sec": round(session["chunks"] / elapsed, 1) if elapsed else 0.0,
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+        }
+        if self.on_progress:
+            self.on_progress(self.progress)
+
+
+def bulk_progress_line(progress: Dict) -> str:
+    """One-line status for terminals: files, chunks, throughput and ETA."""
+    eta = progress.get("eta_seconds")
+    eta_text = "--" if eta is None else f"{int(eta // 60)}m{int(eta % 60):02d}s"
+    return (
+        f"[{progress['files_done']}/{progress['files_total']} files] {progress['chunks_done']} chunks  "
+        f"{progress['chunks_per_sec']:.1f} chunks/s  ETA {eta_text}"
+    )
@@ -0,0 +1,266 @@
+import re
+import json
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from app.infrastructure.shared.config import (
+    DEDUP_ENABLED,
+    DEDUP_MIN_JACCARD,
+    DEDUP_MIN_WORDS,
+    EMBEDDING_DIMENSIONS,
+)
+from app.infrastructure.shared.state_tracker import SovereignStateManager
+
+logger = logging.getLogger("zyrabit.api")
+
+_WORD = re.compile(r"\w+")
+SHINGLE_WORDS = 3
+# 64 MinHash permutations in 16 LSH bands of 4: chunks with Jaccard >= 0.8 share a band with p > 0.999
+NUM_PERM = 64
+BAND_ROWS = 4
+_MERSENNE = np.uint64((1 << 61) - 1)
+_PERM_RNG = np.random.RandomState(20240611)
+_PERM_A = _PERM_RNG.randint(1, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _PERM_RNG.randint(0, 1 << 31, size=NUM_PERM, dtype=np.uint64)
+
+
+def normalize(text: str) -> str:
+    """Case and whitespace do not make a chunk different."""
+    return " ".join(text.lower().split())
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(normalize(text).encode("utf-8")).hexdigest()[:32]
+
+
+def minhash(words: List[str]) -> np.ndarray:
+    """
+    MinHash of the set of word 3-shingles: the share of equal positions in two
+    signatures estimates the Jaccard similarity of the shingle sets.
+    """
+    shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1))}
+    hashes = np.frombuffer(
+        b"".join(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest() for s in shingles), dtype="<u4"
+    ).astype(np.uint64)
+    # a < 2^31 and hashes < 2^32: the products fit in uint64
+    permuted = (hashes[:, None] * _PERM_A + _PERM_B) % _MERSENNE & np.uint64(0xFFFFFFFF)
+    return permuted.min(axis=0).astype("<u4")
+
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def band_keys(signature: np.ndarray) -> List[int]:
+    """One signed 64-bit key per band (SQLite integers), band index included."""
+    keys = []
+    for band in range(NUM_PERM // BAND_ROWS):
+        digest = hashlib.blake2b(
+            bytes([band]) + signature[band * BAND_ROWS:(band + 1) * BAND_ROWS].tobytes(), digest_size=8
+        ).digest()
+        keys.append(int.from_bytes(digest, "little", signed=True))
+    return keys
+
+
+@dataclass
+class Signature:
+    content_hash: str
+    # None for chunks under DEDUP_MIN_WORDS: too few shingles to estimate a similarity
+    minhash: Optional[np.ndarray]
+
+    @classmethod
+    def of(cls, text: str, min_words: int = DEDUP_MIN_WORDS) -> "Signature":
+        words = _WORD.findall(normalize(text))
+        return cls(content_hash(text), minhash(words) if len(words) >= min_words else None)
+
+    @property
+    def bands(self) -> List[int]:
+        return band_keys(self.minhash) if self.minhash is not None else []
+
+    @property
+    def blob(self) -> Optional[bytes]:
+        return self.minhash.tobytes() if self.minhash is not None else None
+
+    @classmethod
+    def from_row(cls, content_hash: str, blob: Optional[bytes]) -> "Signature":
+        return cls(content_hash, np.frombuffer(blob, dtype="<u4") if blob else None)
+
+    def similar(self, other: "Signature", min_jaccard: float) -> Optional[str]:
+        """"exact", "near" or None."""
+        if self.content_hash == other.content_hash:
+            return "exact"
+        if self.minhash is not None and other.minhash is not None and jaccard(self.minhash, other.minhash) >= min_jaccard:
+            return "near"
+        return None
+
+
+@dataclass
+class DedupPlan:
+    """What store_batch writes: the chunks to embed and the signature bookkeeping to commit after."""
+    # Fresh chunks without a duplicate, then references promoted because their canonical chunk is removed
+    embed: List[Document] = field(default_factory=list)
+    # chunk_signatures rows (chunk_id, file_path, content_hash, minhash, canonical_id, kind, content, metadata, token_count)
+    signatures: List[tuple] = field(default_factory=list)
+    bands: List[Tuple[int, str]] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    promoted: List[str] = field(default_factory=list)
+    repointed: List[Tuple[str, str]] = field(default_factory=list)
+    exact: int = 0
+    near: int = 0
+
+    @property
+    def references(self) -> int:
+        return self.exact + self.near
+
+    @property
+    def reference_ids(self) -> set:
+        return {row[0] for row in self.signatures if row[4]}
+
+
+class _BatchIndex:
+    """Canonical chunks of the batch being planned, looked up like the SQLite tables (hash, then LSH bands)."""
+
+    def __init__(self):
+        self.signatures: Dict[str, Signature] = {}
+        self.by_key: Dict[object, List[str]] = {}
+
+    def add(self, chunk_id: str, signature: Signature) -> None:
+        self.signatures[chunk_id] = signature
+        for key in [signature.content_hash, *signature.bands]:
+            self.by_key.setdefault(key, []).append(chunk_id)
+
+    def candidates(self, signature: Signature) -> List[Tuple[str, Signature]]:
+        ids = dict.fromkeys(i for key in [signature.content_hash, *signature.bands] for i in self.by_key.get(key, ()))
+        return [(chunk_id, self.signatures[chunk_id]) for chunk_id in ids]
+
+
+class ChunkDeduplicator:
+    """
+    Ingestion-time dedup. A fresh chunk whose normalized text hash matches a chunk
+    already embedded (exact), or whose MinHash estimates a Jaccard similarity of at
+    least `min_jaccard` over word 3-shingles (near), is not embedded: it is recorded
+    in chunk_signatures as a reference to that canonical chunk, keeping its own text
+    and metadata. When a canonical chunk is removed, its first reference is promoted
+    (embedded under its own id) and the others are repointed to it.
+    """
+
+    def __init__(self, enabled: bool = DEDUP_ENABLED, min_jaccard: float = DEDUP_MIN_JACCARD, min_words: int = DEDUP_MIN_WORDS):
+        self.enabled = enabled
+        self.min_jaccard = min_jaccard
+        self.min_words = min_words
+
+    def _match(self, own_id: str, signature: Signature, candidates: Iterable[Tuple[str, Signature]], skip) -> Tuple[Optional[str], str]:
+        best, best_kind, best_score = None, "", self.min_jaccard
+        for chunk_id, other in candidates:
+            # A chunk re-added under its own id (legacy files are replaced whole) is not its own duplicate
+            if chunk_id in skip or chunk_id == own_id:
+                continue
+            kind = signature.similar(other, self.min_jaccard)
+            if kind == "exact":
+                return chunk_id, kind
+            if kind and (score := jaccard(signature.minhash, other.minhash)) >= best_score:
+                best, best_kind, best_score = chunk_id, kind, score
+        return best, best_kind
+
+    def plan(self, chunks: List[Document], removed: Iterable[str] = (), exclude: Iterable[str] = ()) -> DedupPlan:
+        """
+        Blocking (SQLite): run it off the event loop. Chunks in `exclude` are never
+        chosen as canonical, without being removed.
+        """
+        plan = DedupPlan(removed=list(removed))
+        skip = set(plan.removed) | set(exclude)
+        batch = _BatchIndex()
+
+        # 1. References left without their canonical chunk
+        promoted_for: Dict[str, str] = {}
+        for ref in SovereignStateManager.chunk_references(plan.removed):
+            if ref["chunk_id"] in skip:
+                continue
+            promoted = promoted_for.get(ref["canonical_id"])
+            if promoted:
+                plan.repointed.append((ref["chunk_id"], promoted))
+                continue
+            promoted_for[ref["canonical_id"]] = ref["chunk_id"]
+            plan.promoted.append(ref["chunk_id"])
+            plan.embed.append(Document(page_content=ref["content"], metadata=ref["metadata"]))
+            batch.add(ref["chunk_id"], Signature.from_row(ref["content_hash"], ref["minhash"]))
+
+        # 2. Fresh chunks against the canonical chunks stored and those of this batch
+        signatures = [Signature.of(chunk.page_content, self.min_words) for chunk in chunks]
+        stored = (
+            SovereignStateManager.duplicate_candidates([(s.content_hash, s.bands) for s in signatures])
+            if self.enabled else [[] for _ in signatures]
+        )
+        for chunk, signature, rows in zip(chunks, signatures, stored):
+            chunk_id = chunk.metadata["chunk_id"]
+            canonical, kind = None, ""
+            if self.enabled:
+                candidates = batch.candidates(signature) + [(i, Signature.from_row(h, blob)) for i, h, blob in rows]
+                canonical, kind = self._match(chunk_id, signature, candidates, skip)
+            plan.bands.extend((key, chunk_id) for key in signature.bands)
+            row = (chunk_id, chunk.metadata.get("source"), signature.content_hash, signature.blob)
+            if canonical is None:
+                batch.add(chunk_id, signature)
+                plan.embed.append(chunk)
+                plan.signatures.append((*row, None, None, None, None, chunk.metadata.get("token_count")))
+                continue
+            setattr(plan, kind, getattr(plan, kind) + 1)
+            plan.signatures.append((
+                *row, canonical, kind, chunk.page_content,
+                json.dumps(chunk.metadata, default=str), chunk.metadata.get("token_count"),
+            ))
+
+        if plan.references or plan.promoted:
+            logger.info(
+                f"🧬 Dedup: {plan.exact} exact and {plan.near} near-duplicate chunks stored as references, "
+                f"{len(plan.promoted)} references promoted"
+            )
+        return plan
+
+
+def collapse_duplicates(documents: List[Document], min_jaccard: float = DEDUP_MIN_JACCARD) -> List[Document]:
+    """
+    Retrieval side: keeps the first of each group of (near-)identical results and lists
+    the other files holding that text (collapsed hits and stored references) in
+    metadata["duplicate_sources"]. Returns copies; indexed documents are not mutated.
+    """
+    kept: List[Tuple[Document, Signature, set]] = []
+    for doc in documents:
+        signature = Signature.of(doc.page_content)
+        for _, other, sources in kept:
+            if other.similar(signature, min_jaccard):
+                sources.add(doc.metadata.get("source"))
+                break
+        else:
+            kept.append((doc, signature, set()))
+
+    ids = [doc.metadata["chunk_id"] for doc, _, _ in kept if doc.metadata.get("chunk_id")]
+    references = SovereignStateManager.duplicate_sources(ids) if ids else {}
+    collapsed = []
+    for doc, _, sources in kept:
+        sources |= set(references.get(doc.metadata.get("chunk_id"), ()))
+        sources -= {doc.metadata.get("source"), None}
+        if sources:
+            doc = Document(page_content=doc.page_content, metadata={**doc.metadata, "duplicate_sources": sorted(sources)})
+        collapsed.append(doc)
+    return collapsed
+
+
+def dedup_report() -> Dict:
+    """How much embedding and storage dedup has saved, priced with the measured embedding time per chunk."""
+    stats = SovereignStateManager.dedup_stats()
+    references = stats["exact"] + stats["near"]
+    per_chunk = stats["embed_seconds"] / stats["embedded_chunks"] if stats["embedded_chunks"] else None
+    stored = references + stats["canonical"]
+    return {
+        **stats,
+        "references": references,
+        "dedup_ratio": round(references / stored, 4) if stored else 0.0,
+        "vectors_skipped": references,
+        "vector_bytes_saved": references * EMBEDDING_DIMENSIONS * 4,
+        "embedding_seconds_per_chunk": round(per_chunk, 4) if per_chunk is not None else None,
+        "embedding_seconds_saved": round(references * per_chunk, 2) if per_chunk is not None else None,
+    }
@@ -1,6 +1,7 @@
 import logging
 from typing import Optional, Dict, Any
 from app.infrastructure.shared.state_tracker import SovereignStateManager
+from app.domain.services.chunk_dedup import dedup_report
 
 logger = logging.getLogger("zyrabit.commands")
 
@@ -20,10 +21,12 @@ class CommandRouter:
 
         if cmd == "/stats":
             stats = SovereignStateManager.get_stats()
+            dedup = dedup_report()
             response = f"""### 🏛️ Sovereign Infrastructure Stats
 - **Vault Files**: {stats['vault_files']}
 - **Total Tokens Indexed**: {stats['total_tokens']:,}
 - **Conversation History**: {stats['total_messages']} messages
+- **Deduplicated Chunks**: {dedup['references']} ({dedup['exact']} exact, {dedup['near']} near), {dedup['tokens_saved']:,} tokens not embedded
 - **Sovereign DB**: `{stats['db_path']}`
 - **Source Channel**: {source}
 - **Latency**: ⚡ < 15ms (Intercepted)
@@ -47,6 +50,7 @@ class CommandRouter:
 - **New/Modified Notes Indexed**: {stats['indexed']}
 - **Skipped (Up to date)**: {stats['skipped']}
 - **Errors**: {stats['errors']}
+- **Throughput**: {stats['notes_per_sec']} notes/s ({stats['seconds']}s)
 - **Status**: 🟢 Knowledge Base updated successfully!
 """
                 return {
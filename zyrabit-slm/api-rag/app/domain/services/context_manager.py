@@ -1,77 +1,202 @@
-try:
-    import tiktoken
-except ImportError:
-    import unittest.mock as mock
-    tiktoken = mock.MagicMock()
+import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Any
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+from app.domain.services.keyword_router import keyword_router
+from app.infrastructure.inference.tokenizer_registry import tokenizer_registry
 
 logger = logging.getLogger("zyrabit.api")
 
+_FALLBACK_TOOL_MANIFEST = """[AVAILABLE_MCP_TOOLS]:
+- import_to_vault(source_path: str, destination_name: str): Securely move files to vault.
+- list_vault_stats(): Get metadata about the sovereign vault index.
+- send_telegram_notification(message: str): Sends a secure, PII-masked alert to Telegram.
+"""
+_mcp_server = None
+_manifest_cache: Tuple[Any, int, str] = (None, 0, "")
+
+
+def tool_manifest() -> Tuple[Any, str]:
+    """
+    (version, [AVAILABLE_MCP_TOOLS] block) for the MCP tool registry (Phase 4).
+    The block is rebuilt only when the tools change (names or descriptions); the
+    version is a counter, so prompt_header keys stay cheap to hash.
+    """
+    global _mcp_server, _manifest_cache
+    try:
+        if _mcp_server is None:
+            from app.domain.services.mcp_service import mcp
+            _mcp_server = mcp
+        tools = _mcp_server._tool_manager._tools
+        # Same count is not same tools: a replaced tool or a new description changes the block
+        current = [(t.name, t.description) for t in tools.values()]
+        if _manifest_cache[0] != current:
+            manifest = "[AVAILABLE_MCP_TOOLS]:\n" + "".join(f"- {name}: {description}\n" for name, description in current)
+            _manifest_cache = (current, _manifest_cache[1] + 1, manifest)
+        return _manifest_cache[1], _manifest_cache[2]
+    except Exception:
+        # Fallback if mock/error
+        return "fallback", _FALLBACK_TOOL_MANIFEST
+
 class ContextManager:
     """
     V2.0 Sovereign Context Manager (The "Kai" Strategy).
     Handles precise token budgeting and prompt construction for SLMs.
     """
     
-    # Standard Budget for 4k Context (adjust if model supports 32k)
+    # Standard Budget for 4k Context; build_final_prompt scales memory/RAG to the model's window
     TOTAL_BUDGET = 4096
     SYSTEM_RESERVE = 1000 # Increased slightly for profile
     MEMORY_RESERVE = 1000
     TOOLS_RESERVE = 600
     RAG_RESERVE = TOTAL_BUDGET - (SYSTEM_RESERVE + MEMORY_RESERVE + TOOLS_RESERVE)
+    MEMORY_SHARE = MEMORY_RESERVE / (MEMORY_RESERVE + RAG_RESERVE)
+    TOKEN_CACHE_SIZE = 4096
+    PROMPT_CACHE_SIZE = 32
 
-    def __init__(self, model_name: str = "qwen2.5:7b"):
-        # Default to cl100k_base (standard for many modern models)
-        try:
-            self.encoder = tiktoken.get_encoding("cl100k_base")
-        except:
-            self.encoder = tiktoken.get_encoding("gpt-4") # Fallback
-        
+    _instances: Dict[str, "ContextManager"] = {}
+
+    def __init__(self, model_name: str = "qwen2.5:7b", registry=None):
         self.model_name = model_name
+        self.registry = registry or tokenizer_registry
+        # Real tokenizer.json when available offline, calibrated approximation otherwise
+        self.tokenizer = self.registry.tokenizer(model_name)
+        # Token counts memoized by content hash (history and RAG chunks repeat across turns)
+        self._token_cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._token_cache_lock = threading.Lock()
+        self._prompt_headers: "OrderedDict[tuple, str]" = OrderedDict()
+
+    @classmethod
+    def for_model(cls, model_name: str) -> "ContextManager":
+        """One shared manager (tokenizer + token cache) per model."""
+        manager = cls._instances.get(model_name)
+        if manager is None:
+            manager = cls._instances.setdefault(model_name, cls(model_name))
+        return manager
+
+    @classmethod
+    async def for_model_async(cls, model_name: str) -> "ContextManager":
+        """
+        for_model from the event loop: the first use of a model loads its tokenizer and may
+        ask Ollama for its context window (/api/show), so that happens in a thread.
+        """
+        manager = cls._instances.get(model_name)
+        if manager is None:
+            manager = await asyncio.to_thread(cls._warm, model_name)
+        return manager
+
+    @classmethod
+    def _warm(cls, model_name: str) -> "ContextManager":
+        manager = cls.for_model(model_name)
+        manager.registry.context_window(model_name)
+        return manager
+
+    @classmethod
+    def cached_entries(cls) -> Dict[str, int]:
+        """Entries held by the shared managers' token-count and prompt-header caches."""
+        managers = list(cls._instances.values())
+        return {
+            "token_counts": sum(len(m._token_cache) for m in managers),
+            "prompt_headers": sum(len(m._prompt_headers) for m in managers),
+        }
+
+    @property
+    def tokenizer_name(self) -> str:
+        return self.tokenizer.name
+
+    def budgets(self) -> Dict[str, int]:
+        """Per-section token budgets for the model's context window (4k -> the class reserves)."""
+        window = self.registry.context_window(self.model_name)
+        remaining = max(window - self.SYSTEM_RESERVE - self.TOOLS_RESERVE, 0)
+        memory = round(remaining * self.MEMORY_SHARE)
+        return {
+            "total": window,
+            "system": self.SYSTEM_RESERVE,
+            "tools": self.TOOLS_RESERVE,
+            "memory": memory,
+            "rag": remaining - memory,
+        }
 
     def count_tokens(self, text: str) -> int:
-        return len(self.encoder.encode(text))
+        key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._token_cache_lock:
+            cached = self._token_cache.get(key)
+            if cached is not None:
+                # LRU: history and system turns repeat on every request, keep them the longest
+                self._token_cache.move_to_end(key)
+                return cached
+
+        tokens = self.tokenizer.count(text)
+        with self._token_cache_lock:
+            self._token_cache[key] = tokens
+            if len(self._token_cache) > self.TOKEN_CACHE_SIZE:
+                self._token_cache.popitem(last=False)
+        return tokens
+
+    @staticmethod
+    def format_message(msg: Dict[str, Any]) -> str:
+        return f"{msg['role']}: {msg['content']}\n"
+
+    def message_tokens(self, msg: Dict[str, Any]) -> int:
+        """Uses the count stored with the message row when it came from this tokenizer."""
+        stored: Optional[int] = msg.get("token_count")
+        if stored is not None and msg.get("tokenizer") == self.tokenizer_name:
+            return stored
+        return self.count_tokens(self.format_message(msg))
+
+    def document_tokens(self, doc: Any, text: str) -> int:
+        """Uses the count stored in the chunk metadata at ingestion time when it came from this tokenizer."""
+        metadata = getattr(doc, "metadata", None)
+        if isinstance(metadata, dict) and metadata.get("tokenizer") == self.tokenizer_name:
+            stored = metadata.get("token_count")
+            if stored is not None:
+                return stored
+        return self.count_tokens(text)
 
     def trim_history(self, history: List[Dict[str, str]], budget: int = MEMORY_RESERVE) -> str:
-        """Keep only the last N turns that fit in the budget."""
+        """Keep only the last N turns that fit in the budget (single pass, newest to oldest)."""
         formatted_history = []
         current_tokens = 0
-        total_history_tokens = sum([self.count_tokens(f"{m['role']}: {m['content']}\n") for m in history])
-        
-        # Process from newest to oldest
+        total_history_tokens = 0
+        full = False
+
         for msg in reversed(history):
-            msg_text = f"{msg['role']}: {msg['content']}\n"
-            msg_tokens = self.count_tokens(msg_text)
-            
+            msg_tokens = self.message_tokens(msg)
+            total_history_tokens += msg_tokens
+            if full:
+                continue
             if current_tokens + msg_tokens > budget:
-                break
-            
-            formatted_history.insert(0, msg_text)
+                full = True
+                continue
+            formatted_history.append(self.format_message(msg))
             current_tokens += msg_tokens
-        
+
         discarded = total_history_tokens - current_tokens
         if discarded > 0:
             logger.warning(f"📉 Context Budgeter: Discarded {discarded} tokens from History to fit budget.")
-            
+
+        formatted_history.reverse()
         return "".join(formatted_history)
 
     def trim_rag_context(self, documents: List[Any], budget: int = RAG_RESERVE) -> str:
-        """Rank-Based Trimming for RAG fragments."""
+        """Rank-Based Trimming for RAG fragments (single pass)."""
         selected_fragments = []
         current_tokens = 0
-        total_rag_tokens = sum([self.count_tokens(d.page_content if hasattr(d, 'page_content') else str(d)) for d in documents])
-        
+        total_rag_tokens = 0
+
         for doc in documents:
             text = doc.page_content if hasattr(doc, 'page_content') else str(doc)
-            tokens = self.count_tokens(text)
-            
+            tokens = self.document_tokens(doc, text)
+            total_rag_tokens += tokens
+
             if current_tokens + tokens > budget:
                 continue
-            
+
             selected_fragments.append(text)
             current_tokens += tokens
-            
+
         discarded = total_rag_tokens - current_tokens
         if discarded > 0:
             logger.warning(f"📉 Context Budgeter: Discarded {discarded} tokens from RAG Context (Notes too long).")
@@ -86,11 +211,31 @@ class ContextManager:
         "general": "Eres {assistant_name}, el cerebro soberano de Zyrabit. Un asistente de IA de alto nivel diseñado para Abraham Gomez. Tu objetivo es ser eficiente, seguro y discreto."
     }
 
-    def build_final_prompt(self, system_prompt: str, history: List[Dict[str, str]], rag_docs: List[Any], user_query: str, user_profile: Dict[str, Any] = None, source: str = "WEB") -> str:
+    def prompt_header(self, user_profile: Dict[str, Any] = None, source: str = "WEB") -> str:
         """
-        V2.0 Sovereign Prompt Construction.
-        Dynamically injects Identity, MCP Tools, Profile, and Context.
+        Static part of the prompt (identity, tool manifest, instructions, profile).
+        Compiled once per profile/channel/tool-registry version and reused across turns.
         """
+        profile = user_profile or {}
+        tools_version, mcp_tools = tool_manifest()
+        key = (
+            tools_version, source,
+            profile.get("assistant_name", "Zyra"), profile.get("persona", "general"), profile.get("tone", "professional"),
+            bool(profile.get("onboarding_completed")), profile.get("name"), profile.get("role"),
+        )
+        with self._token_cache_lock:
+            header = self._prompt_headers.get(key)
+            if header is not None:
+                self._prompt_headers.move_to_end(key)
+        if header is None:
+            header = self._compile_header(user_profile, source, mcp_tools)
+            with self._token_cache_lock:
+                self._prompt_headers[key] = header
+                if len(self._prompt_headers) > self.PROMPT_CACHE_SIZE:
+                    self._prompt_headers.popitem(last=False)
+        return header
+
+    def _compile_header(self, user_profile: Dict[str, Any], source: str, mcp_tools: str) -> str:
         # 1. Identity Locking
         assistant_name = user_profile.get("assistant_name", "Zyra") if user_profile else "Zyra"
         persona_key = user_profile.get("persona", "general") if user_profile else "general"
@@ -108,44 +253,13 @@ class ContextManager:
         else:
             persona_desc = f"Identidad Principal: {assistant_name}.\n" + persona_desc
 
-
-        # 2. Dynamic Tool Discovery Injection (Phase 4)
-        from app.domain.services.mcp_service import mcp
-        try:
-            mcp_tools = "[AVAILABLE_MCP_TOOLS]:\n"
-            for t in mcp._tool_manager._tools.values():
-                mcp_tools += f"- {t.name}: {t.description}\n"
-        except Exception:
-            # Fallback if mock/error
-            mcp_tools = """[AVAILABLE_MCP_TOOLS]:
-- import_to_vault(source_path: str, destination_name: str): Securely move files to vault.
-- list_vault_stats(): Get metadata about the sovereign vault index.
-- send_telegram_notification(message: str): Sends a secure, PII-masked alert to Telegram.
-"""
-
-        # [NEW] Discriminative RAG: Detect operational/drafting queries to compress context dynamically
-        is_operational = any(w in user_query.lower() for w in [
-            "mensaje", "redactar", "borrador", "plantilla", "generar", "escribe", "draft", 
-            "resumen", "summary", "escribir", "crear mensaje"
-        ])
-        
-        if is_operational:
-            rag_budget = 400
-            logger.info("⚡ Discriminative RAG: Dynamic Context Compression active (Operational query -> budget capped at 400 tokens).")
-        else:
-            rag_budget = self.RAG_RESERVE
-
-        trimmed_history = self.trim_history(history)
-        trimmed_rag = self.trim_rag_context(rag_docs, budget=rag_budget)
-        
         tone = user_profile.get("tone", "professional") if user_profile else "professional"
 
-
         profile_str = ""
         if user_profile and user_profile.get("onboarding_completed"):
             profile_str = f"USUARIO: {user_profile.get('name')} | ROL: {user_profile.get('role')}\n"
 
-        final_prompt = f"""### IDENTIDAD SOBERANA:
+        return f"""### IDENTIDAD SOBERANA:
 {persona_desc}
 CANAL ACTIVO: {source}
 TONO: {tone.upper()}
@@ -159,14 +273,41 @@ IMPORTANTE: Si el usuario te pide enviar una notificación, alertar o usar Teleg
 {profile_str if profile_str else "Usuario nuevo."}
 
 ### CONOCIMIENTO RELEVANTE (RAG):
-{trimmed_rag if trimmed_rag else "No se encontraron documentos relevantes en el Vault."}
+"""
+
+    def build_final_prompt(self, system_prompt: str, history: List[Dict[str, str]], rag_docs: List[Any], user_query: str, user_profile: Dict[str, Any] = None, source: str = "WEB", conversation_summary: str = "") -> str:
+        """
+        V2.0 Sovereign Prompt Construction.
+        Splices History, RAG context and the query into the precompiled header.
+        `conversation_summary` (rolling summary of older turns) shares the memory budget with the recent turns.
+        """
+        header = self.prompt_header(user_profile, source)
 
-### HISTORIAL DE CONVERSACIÓN:
-{trimmed_history if trimmed_history else "No hay historial previo."}
+        # [NEW] Discriminative RAG: Detect operational/drafting queries to compress context dynamically
+        is_operational = keyword_router.has_intent(user_query, "operational")
+        
+        budgets = self.budgets()
+        if is_operational:
+            rag_budget = 400
+            logger.info("⚡ Discriminative RAG: Dynamic Context Compression active (Operational query -> budget capped at 400 tokens).")
+        else:
+            rag_budget = budgets["rag"]
 
-### CONSULTA ACTUAL:
-{user_query}
-"""
-        return final_prompt
+        memory_budget = budgets["memory"]
+        summary_block = ""
+        if conversation_summary:
+            summary_block = f"[RESUMEN DE TURNOS ANTERIORES]: {conversation_summary}\n"
+            memory_budget = max(memory_budget - self.count_tokens(summary_block), 0)
 
+        trimmed_history = summary_block + self.trim_history(history, budget=memory_budget)
+        trimmed_rag = self.trim_rag_context(rag_docs, budget=rag_budget)
 
+        return "".join((
+            header,
+            trimmed_rag if trimmed_rag else "No se encontraron documentos relevantes en el Vault.",
+            "\n\n### HISTORIAL DE CONVERSACIÓN:\n",
+            trimmed_history if trimmed_history else "No hay historial previo.",
+            "\n\n### CONSULTA ACTUAL:\n",
+            user_query,
+            "\n",
+        ))
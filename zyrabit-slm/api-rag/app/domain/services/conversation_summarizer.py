@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set
+from app.infrastructure.shared.config import MODEL_NAME
+from app.infrastructure.shared.state_tracker import SovereignStateManager
+from app.infrastructure.shared.metrics import QUEUE_DEPTH
+from app.ports.inference_port import InferenceRequest
+
+logger = logging.getLogger("zyrabit.api")
+
+SUMMARY_SYSTEM_PROMPT = "Eres el sistema de memoria de Zyra. Resumes conversaciones de forma fiel, breve y sin inventar datos."
+
+
+class ConversationSummarizer:
+    """
+    Rolling per-session summary stored in SQLite.
+
+    Older turns are folded into the summary in the background once at least
+    `min_new_messages` unsummarized messages exist beyond the `keep_recent`
+    newest ones. The prompt then carries summary + recent turns, so the
+    history cost per turn stays roughly constant however long the session is.
+    """
+
+    def __init__(self, inference_provider, model: str = MODEL_NAME, min_new_messages: int = 6, keep_recent: int = 4, max_words: int = 180):
+        self.inference_provider = inference_provider
+        self.model = model
+        self.min_new_messages = min_new_messages
+        self.keep_recent = keep_recent
+        self.max_words = max_words
+        self._in_flight: Set[str] = set()
+        # Strong references: the loop only keeps weak ones to running tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+    def pending_messages(self, session_id: str, summary: Dict) -> List[Dict]:
+        """Unsummarized messages old enough to be folded into the summary."""
+        # 50 = FIFO cap of conversation_memory
+        messages = SovereignStateManager.get_history(session_id, limit=50, after_id=summary.get("last_message_id") or 0)
+        return messages[:-self.keep_recent] if self.keep_recent else messages
+
+    def build_prompt(self, previous_summary: str, messages: List[Dict]) -> str:
+        turns = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        return f"""### RESUMEN ACTUAL:
+{previous_summary or "Sin resumen previo."}
+
+### NUEVOS TURNOS:
+{turns}
+
+### INSTRUCCIONES:
+Actualiza el resumen incorporando los nuevos turnos. Conserva decisiones, datos, preferencias y tareas pendientes.
+Mantén los marcadores como <USER_EMAIL_1> tal cual. Máximo {self.max_words} palabras, en español, sin preámbulos.
+"""
+
+    def refresh(self, session_id: str) -> bool:
+        """Folds pending turns into the summary when enough have accumulated (blocking)."""
+        summary = SovereignStateManager.get_summary(session_id)
+        pending = self.pending_messages(session_id, summary)
+        if len(pending) < self.min_new_messages:
+            return False
+
+        request = InferenceRequest(
+            model=self.model,
+            prompt=self.build_prompt(summary.get("summary", ""), pending),
+            system_prompt=SUMMARY_SYSTEM_PROMPT,
+        )
+        text = self.inference_provider.generate(request).text.strip()
+        if not text:
+            return False
+
+        SovereignStateManager.save_summary(session_id, text, pending[-1]["id"])
+        logger.info(f"🧾 Rolling Summary: folded {len(pending)} messages into session {session_id} summary.")
+        return True
+
+    def schedule(self, session_id: str) -> Optional[asyncio.Task]:
+        """Refreshes in the background; at most one refresh per session at a time."""
+        if session_id in self._in_flight:
+            return None
+        self._in_flight.add(session_id)
+        QUEUE_DEPTH.labels(queue="summary").inc()
+        task = asyncio.create_task(self._run(session_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Waits for the running refreshes, then cancels what is left (the summary is refreshed on a later turn)."""
+        tasks = list(self._tasks)
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _run(self, session_id: str) -> None:
+        try:
+            await asyncio.to_thread(self.refresh, session_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Rolling Summary failed for session {session_id}: {e}")
+        finally:
+            self._in_flight.discard(session_id)
+            QUEUE_DEPTH.labels(queue="summary").dec()
@@ -1,13 +1,28 @@
+import hashlib
 import logging
+from collections import Counter
 from typing import List
 from langchain_text_splitters import MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
 logger = logging.getLogger("zyrabit.api")
 
+def chunk_id(source: str, metadata: dict, content: str, occurrence: int = 0) -> str:
+    """
+    Content-derived chunk id: the same text under the same headers of the same file
+    always gets the same id, so re-ingesting an edited file only embeds new ids.
+    `occurrence` tells apart identical chunks repeated within one file.
+    """
+    headers = "\x1f".join(f"{key}={metadata[key]}" for key in sorted(metadata) if key.startswith("Header"))
+    key = "\x00".join((source or "", metadata.get("domain", ""), headers, content, str(occurrence)))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
 class DocumentChunker:
     """
     Splits Markdown documents structurally based on headers and size.
+    Boundaries are anchored on headers: an edit only moves the chunk boundaries of
+    its own section, and every chunk carries a content-derived "chunk_id".
     """
     
     def __init__(self, chunk_size: int = 800, chunk_overlap: int = 100):
@@ -38,21 +53,61 @@ class DocumentChunker:
         
         final_chunks = []
         for doc in documents:
-            # First level: Headers
-            header_splits = header_splitter.split_text(doc.page_content)
-            
-            # Second level: Sub-splitting large sections
-            refined_splits = text_splitter.split_documents(header_splits)
-            
-            # Inject mandatory metadata
-            for chunk in refined_splits:
-                chunk.metadata.update({
-                    "source": doc.metadata.get("source"),
-                    "domain": domain,
-                    "version": "1.0",
-                    "type": "high-precision"
-                })
-                final_chunks.append(chunk)
+            final_chunks.extend(self._split_document(doc, domain, header_splitter, text_splitter, Counter()))
                 
         logger.info(f"✅ Generated {len(final_chunks)} chunks with domain='{domain}'")
         return final_chunks
+
+    @staticmethod
+    def _split_document(doc: Document, domain: str, header_splitter, text_splitter, seen: Counter) -> List[Document]:
+        # First level: Headers
+        header_splits = header_splitter.split_text(doc.page_content)
+
+        # Second level: Sub-splitting large sections
+        refined_splits = text_splitter.split_documents(header_splits)
+
+        # Inject mandatory metadata
+        for chunk in refined_splits:
+            chunk.metadata.update({
+                "source": doc.metadata.get("source"),
+                "domain": domain,
+                "version": "1.0",
+                "type": "high-precision"
+            })
+            # Identical chunks (same text, headers and source) are counted by their first id, not their text
+            identical = chunk_id(chunk.metadata["source"], chunk.metadata, chunk.page_content)
+            chunk.metadata["chunk_id"] = chunk_id(
+                chunk.metadata["source"], chunk.metadata, chunk.page_content, seen[identical]
+            ) if seen[identical] else identical
+            seen[identical] += 1
+        return refined_splits
+
+
+class PartChunker:
+    """
+    Chunks a document read in parts (PDFProcessor.iter_parts) like DocumentChunker: the
+    headers still open at the end of a part are replayed before the next one, and
+    repeated chunks are counted across parts. When parts are cut before a header line
+    (Markdown), chunk ids match the whole-document split; PDF parts are cut by page
+    range, so a section spanning two parts is split differently.
+    """
+
+    def __init__(self, chunker: DocumentChunker, domain: str = "general"):
+        self.chunker = chunker
+        self.domain = domain
+        self.headers: dict = {}
+        self.seen = Counter()
+        self.header_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=chunker.headers_to_split_on)
+        self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunker.chunk_size, chunk_overlap=chunker.chunk_overlap)
+
+    def split(self, part: Document) -> List[Document]:
+        opened = "".join(
+            f"{marker} {self.headers[name]}\n" for marker, name in self.chunker.headers_to_split_on if name in self.headers
+        )
+        chunks = self.chunker._split_document(
+            Document(page_content=opened + part.page_content, metadata=part.metadata),
+            self.domain, self.header_splitter, self.text_splitter, self.seen,
+        )
+        if chunks:
+            self.headers = {key: value for key, value in chunks[-1].metadata.items() if key.startswith("Header")}
+        return chunks
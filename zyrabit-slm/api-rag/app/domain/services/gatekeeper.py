@@ -1,7 +1,8 @@
 import logging
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, List
 from app.infrastructure.shared.metrics import SECURITY_HITS_TOTAL
 from app.core.security import pii_pipeline
+from app.domain.services.keyword_router import keyword_router, DEFAULT_INTENTS
 
 logger = logging.getLogger("zyrabit.security")
 
@@ -11,8 +12,9 @@ class Gatekeeper:
     Follows SRP by delegating low-level masking to the pii_pipeline.
     """
     
-    # Scope Keywords (Policy-level configuration)
-    SCOPE_KEYWORDS = ["zyrabit", "slm", "architecture", "infrastructure", "docker", "mcp", "ollama", "rag"]
+    # Scope Keywords (Policy-level configuration, extendable via ROUTING_KEYWORDS_FILE)
+    SCOPE_KEYWORDS = DEFAULT_INTENTS["scope"]
+    ROUTER = keyword_router
 
     @classmethod
     def mask_pii(cls, text: str) -> Tuple[str, Dict[str, Any]]:
@@ -33,13 +35,30 @@ class Gatekeeper:
             
         return result.sanitized_text, result.token_map
 
+    @classmethod
+    def mask_pii_many(cls, texts: List[str]) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Policy: Batch masking for bulk automations.
+        One pipeline pass for the whole batch; metrics are incremented once per label.
+        """
+        results = pii_pipeline.anonymize_many(texts)
+
+        totals: Dict[str, int] = {}
+        for result in results:
+            for label, count in result.detected_entities.items():
+                if count:
+                    totals[label] = totals.get(label, 0) + count
+        for label, count in totals.items():
+            SECURITY_HITS_TOTAL.labels(entity_type=label, action="masked").inc(count)
+
+        return [(r.sanitized_text, r.token_map) for r in results]
+
     @classmethod
     def is_in_scope(cls, text: str) -> bool:
         """
         Policy: Determine if the query is within the Sovereign AI's domain.
         """
-        text_lower = text.lower()
-        return any(keyword in text_lower for keyword in cls.SCOPE_KEYWORDS)
+        return cls.ROUTER.has_intent(text, "scope")
 
     @classmethod
     def get_routing_decision(cls, text: str) -> str:
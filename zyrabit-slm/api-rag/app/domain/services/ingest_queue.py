@@ -0,0 +1,185 @@
+import time
+import asyncio
+import logging
+from typing import Dict, List, Optional
+from app.infrastructure.shared.config import (
+    INGEST_MAX_ATTEMPTS,
+    INGEST_POLL_SECONDS,
+    INGEST_RETRY_BACKOFF_SECONDS,
+    INGEST_WORKERS,
+)
+from app.infrastructure.shared.state_tracker import SovereignStateManager
+from app.infrastructure.shared.metrics import QUEUE_DEPTH
+from app.infrastructure.shared import tracing
+
+logger = logging.getLogger("zyrabit.api")
+
+PUBLIC_FIELDS = ("job_id", "filename", "domain", "state", "attempts", "max_attempts", "error", "result", "created_at", "updated_at")
+
+
+def public_job(job: Dict) -> Dict:
+    """Job status as exposed by GET /v1/ingest/{job_id} and the ingest_progress event."""
+    return {key: job.get(key) for key in PUBLIC_FIELDS}
+
+
+class IngestJobQueue:
+    """
+    Persistent ingestion queue: jobs live in SQLite (ingest_jobs) and move through
+    queued -> extracting -> embedding -> done | failed.
+
+    `workers` jobs run concurrently, so one document can be extracted while another
+    is being embedded. Retryable failures go back to 'queued' with exponential
+    backoff until `max_attempts`. Jobs interrupted by a restart are requeued on start.
+    """
+
+    def __init__(
+        self,
+        ingest_use_case,
+        workers: int = INGEST_WORKERS,
+        sio=None,
+        max_attempts: int = INGEST_MAX_ATTEMPTS,
+        backoff_seconds: float = INGEST_RETRY_BACKOFF_SECONDS,
+        poll_seconds: float = INGEST_POLL_SECONDS,
+    ):
+        self.ingest_use_case = ingest_use_case
+        self.workers = max(1, workers)
+        self.sio = sio
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.poll_seconds = poll_seconds
+        self._tasks: List[asyncio.Task] = []
+        self._wake = asyncio.Event()
+        # Trace context of the upload request, so the job span joins its trace (in-process only)
+        self._trace_contexts: Dict[str, object] = {}
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        pending = SovereignStateManager.requeue_stale_ingest_jobs()
+        QUEUE_DEPTH.labels(queue="ingest").inc(pending)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"zyrabit-ingest-worker-{n}")
+            for n in range(self.workers)
+        ]
+        logger.info(f"📥 Ingestion queue started ({self.workers} workers, {pending} pending jobs)")
+
+    async def stop(self) -> None:
+        """Cancels the workers; an interrupted job stays in its stage and is requeued on next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(
+        self, file_path: str, filename: str, domain: str = "general", file_hash: Optional[str] = None, action: str = "ingest"
+    ) -> Dict:
+        """Queues `action` ('ingest' or 'delete') for a file; a job already queued for it is updated instead."""
+        job = await asyncio.to_thread(
+            SovereignStateManager.enqueue_ingest_job, file_path, filename, domain, self.max_attempts, file_hash, action
+        )
+        if job.get("coalesced"):
+            self._wake.set()
+            logger.info(f"📥 Coalesced {action} of {filename} into queued job {job['job_id']}")
+            return job
+        self._trace_contexts[job["job_id"]] = tracing.capture_context()
+        QUEUE_DEPTH.labels(queue="ingest").inc()
+        self._wake.set()
+        await self._emit(job)
+        logger.info(f"📥 Queued {action} job {job['job_id']} for {filename}")
+        return job
+
+    def retry_delay(self, attempts: int) -> float:
+        return self.backoff_seconds * 2 ** max(attempts - 1, 0)
+
+    async def _worker(self) -> None:
+        while True:
+            self._wake.clear()
+            job = await asyncio.to_thread(SovereignStateManager.claim_ingest_job)
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._process(job)
+            except Exception as e:
+                logger.error(f"❌ Ingestion job {job['job_id']} crashed: {e}")
+
+    async def _process(self, job: Dict) -> None:
+        job_id, filename = job["job_id"], job["filename"]
+        await self._emit(job)
+
+        async def progress(state: str) -> None:
+            nonlocal job
+            if state != job["state"]:
+                job = await asyncio.to_thread(SovereignStateManager.update_ingest_job, job_id, state)
+                await self._emit(job)
+
+        logger.info(f"🧬 Processing ingestion job {job_id} ({filename}, attempt {job['attempts']}/{job['max_attempts']})")
+        action = job.get("action") or "ingest"
+        with tracing.span("ingest.job", parent=self._trace_contexts.get(job_id), filename=filename, attempt=job["attempts"], action=action):
+            try:
+                if action == "delete":
+                    result = await self.ingest_use_case.remove(job["file_path"])
+                else:
+                    result = await self.ingest_use_case.execute(
+                        job["file_path"], job["domain"], progress=progress, file_hash=job.get("file_hash")
+                    )
+            except Exception as e:
+                result = {"status": "error", "message": str(e), "retryable": True}
+            if not isinstance(result, dict):
+                result = {"status": "success"}
+            tracing.set_attributes(status=result.get("status"))
+
+        if result.get("status") != "error":
+            job = await asyncio.to_thread(SovereignStateManager.update_ingest_job, job_id, "done", result=result)
+            await self._finish(job)
+            if action == "ingest":
+                await self._notify_done(filename, result)
+            return
+
+        error = result.get("message", "unknown error")
+        if result.get("retryable") and job["attempts"] < job["max_attempts"]:
+            delay = self.retry_delay(job["attempts"])
+            job = await asyncio.to_thread(
+                SovereignStateManager.update_ingest_job, job_id, "queued", error=error, next_attempt_at=time.time() + delay
+            )
+            logger.warning(f"🔁 Ingestion job {job_id} failed ({error}); retrying in {delay:.0f}s")
+            await self._emit(job)
+            return
+
+        job = await asyncio.to_thread(SovereignStateManager.update_ingest_job, job_id, "failed", error=error, result=result)
+        logger.error(f"❌ Ingestion job {job_id} failed for {filename}: {error}")
+        await self._finish(job)
+
+    async def _finish(self, job: Dict) -> None:
+        self._trace_contexts.pop(job["job_id"], None)
+        QUEUE_DEPTH.labels(queue="ingest").dec()
+        await self._emit(job)
+
+    async def _emit(self, job: Dict) -> None:
+        if self.sio:
+            try:
+                await self.sio.emit("ingest_progress", public_job(job))
+            except Exception as e:
+                logger.warning(f"⚠️ ingest_progress event not sent: {e}")
+
+    async def _notify_done(self, filename: str, result: Dict) -> None:
+        """Proactive Notification from Zyra"""
+        if not self.sio or result.get("status") != "success":
+            return
+        await self.sio.emit("chat_response", {
+            "response": f"¡Listo! He procesado el documento '{filename}' y ya está disponible en mi Vault. ¿Qué te gustaría que analicemos de él?",
+            "metadata": {
+                "decision": "ingest-proactive",
+                "latency_ms": 0,
+                "sources": [filename],
+                "rag_hits": 1
+            }
+        })
+        logger.info(f"📢 Proactive notification sent for {filename}")
@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional
+from app.infrastructure.shared.config import ROUTING_KEYWORDS_FILE
+
+logger = logging.getLogger("zyrabit.security")
+
+# Policy-level keyword sets. Matching is case-insensitive substring matching.
+DEFAULT_INTENTS: Dict[str, List[str]] = {
+    "scope": ["zyrabit", "slm", "architecture", "infrastructure", "docker", "mcp", "ollama", "rag"],
+    "operational": [
+        "mensaje", "redactar", "borrador", "plantilla", "generar", "escribe", "draft",
+        "resumen", "summary", "escribir", "crear mensaje"
+    ],
+}
+
+_NO_INTENTS: FrozenSet[str] = frozenset()
+
+
+class _Automaton:
+    """
+    Aho-Corasick automaton over all keywords of all intents.
+    A single scan of the text reports every intent with at least one keyword hit.
+    """
+
+    def __init__(self, intents: Dict[str, List[str]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        fail: List[int] = [0]
+        outputs: List[set] = [set()]
+
+        # 1. Trie
+        for intent, keywords in intents.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if not keyword:
+                    continue
+                state = 0
+                for ch in keyword:
+                    nxt = self.goto[state].get(ch)
+                    if nxt is None:
+                        nxt = len(self.goto)
+                        self.goto[state][ch] = nxt
+                        self.goto.append({})
+                        fail.append(0)
+                        outputs.append(set())
+                    state = nxt
+                outputs[state].add(intent)
+
+        # 2. Failure links (BFS), folding outputs along the failure chain
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in self.goto[f]:
+                    f = fail[f]
+                candidate = self.goto[f].get(ch, 0)
+                fail[nxt] = candidate if candidate != nxt else 0
+                outputs[nxt] |= outputs[fail[nxt]]
+
+        self.fail = fail
+        self.outputs: List[FrozenSet[str]] = [frozenset(o) for o in outputs]
+        self.intent_count = sum(1 for keywords in intents.values() if any(keywords))
+
+    def scan(self, text: str) -> FrozenSet[str]:
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if outputs[state]:
+                found |= outputs[state]
+                if len(found) == self.intent_count:
+                    break
+        return frozenset(found) if found else _NO_INTENTS
+
+
+class KeywordRouter:
+    """
+    Unified keyword classifier shared by the Gatekeeper (scope) and the
+    ContextManager (operational queries).
+
+    Keyword sets can be extended or replaced through a JSON file
+    ({"intent": ["keyword", ...]}); the file is re-checked at most every
+    `reload_interval` seconds and reloaded when its mtime changes.
+    Decisions are memoized in an LRU keyed by the raw query text.
+    """
+
+    def __init__(
+        self,
+        intents: Optional[Dict[str, List[str]]] = None,
+        keywords_file: str = "",
+        cache_size: int = 2048,
+        reload_interval: float = 5.0,
+    ):
+        self.base_intents = {k: list(v) for k, v in (intents or DEFAULT_INTENTS).items()}
+        self.keywords_file = keywords_file
+        self.cache_size = cache_size
+        self.reload_interval = reload_interval
+        self.version = 0
+        self._cache: "OrderedDict[str, FrozenSet[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._file_mtime: Optional[float] = None
+        self._last_check = 0.0
+        self.intents: Dict[str, List[str]] = {}
+        self._automaton: Optional[_Automaton] = None
+        self.load(self.base_intents)
+        self.maybe_reload(force=True)
+
+    def load(self, intents: Dict[str, List[str]]) -> None:
+        """Builds a new automaton and atomically swaps it in; clears cached decisions."""
+        automaton = _Automaton(intents)
+        with self._lock:
+            self.intents = {k: list(v) for k, v in intents.items()}
+            self._automaton = automaton
+            self._cache.clear()
+            self.version += 1
+        logger.info(f"🧭 Keyword Router loaded v{self.version}: " + ", ".join(f"{k}={len(v)}" for k, v in intents.items()))
+
+    def maybe_reload(self, force: bool = False) -> bool:
+        """Hot-reload: picks up changes in the keywords file without restarting the API."""
+        if not self.keywords_file:
+            return False
+        now = time.monotonic()
+        if not force and now - self._last_check < self.reload_interval:
+            return False
+        self._last_check = now
+
+        try:
+            mtime = os.path.getmtime(self.keywords_file)
+        except OSError:
+            return False
+        if mtime == self._file_mtime:
+            return False
+
+        try:
+            with open(self.keywords_file, "r", encoding="utf-8") as f:
+                overrides = json.load(f)
+            if not isinstance(overrides, dict):
+                raise ValueError("keywords file must contain a JSON object")
+            for intent, words in overrides.items():
+                # A bare string would be split into one keyword per character
+                if not isinstance(words, list) or not all(isinstance(w, str) for w in words):
+                    raise ValueError(f"keywords of '{intent}' must be a list of strings")
+            merged = dict(self.base_intents)
+            merged.update({str(k): list(v) for k, v in overrides.items()})
+        except (OSError, ValueError) as e:
+            # The current intents stay in use
+            logger.warning(f"⚠️ Keyword Router: ignoring invalid keywords file {self.keywords_file}: {e}")
+            self._file_mtime = mtime
+            return False
+
+        self._file_mtime = mtime
+        self.load(merged)
+        return True
+
+    def cached_entries(self) -> int:
+        return len(self._cache)
+
+    def match(self, text: str) -> FrozenSet[str]:
+        """Returns every intent whose keywords appear in the text (one pass)."""
+        if self.keywords_file:
+            self.maybe_reload()
+
+        cached = self._cache.get(text)
+        if cached is not None:
+            with self._lock:
+                if text in self._cache:
+                    self._cache.move_to_end(text)
+            return cached
+
+        automaton = self._automaton
+        intents = automaton.scan(text.lower())
+        with self._lock:
+            if automaton is self._automaton:
+                self._cache[text] = intents
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return intents
+
+    def has_intent(self, text: str, intent: str) -> bool:
+        return intent in self.match(text)
+
+    def cache_info(self) -> Dict[str, int]:
+        return {"size": len(self._cache), "max_size": self.cache_size, "version": self.version}
+
+
+# Shared instance (one automaton per process)
+keyword_router = KeywordRouter(keywords_file=ROUTING_KEYWORDS_FILE)
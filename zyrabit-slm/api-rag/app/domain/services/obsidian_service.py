@@ -1,13 +1,20 @@
 import os
+import time
+import asyncio
 import logging
+from itertools import islice
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any
+from typing import Any, Dict, Iterator, List, Tuple
 from app.infrastructure.shared.state_tracker import SovereignStateManager
-from app.infrastructure.shared.config import DOCS_DIR
+from app.infrastructure.shared.config import DOCS_DIR, OBSIDIAN_SYNC_BATCH_SIZE, OBSIDIAN_SYNC_CONCURRENCY
+from app.infrastructure.shared import tracing
 
 logger = logging.getLogger("zyrabit.obsidian")
 
+# Notes stat-checked per scanner hop to a worker thread
+SCAN_CHUNK = 512
+
 class ObsidianService:
     """
     V2.0 Obsidian Sovereign Brain Sync & AutoLearner Service.
@@ -24,49 +31,117 @@ class ObsidianService:
         logger.info(f"📂 Obsidian Vault initialized at: {cls.VAULT_PATH}")
 
     @classmethod
-    async def sync_vault(cls, ingest_use_case) -> Dict[str, Any]:
+    def _iter_notes(cls) -> Iterator[str]:
+        for md_file in cls.VAULT_PATH.rglob("*.md"):
+            # Skip Reflective Notes folder to avoid circular indexing loops
+            if "Reflective Notes" not in md_file.parts:
+                yield str(md_file)
+
+    @staticmethod
+    def _scan_chunk(notes: Iterator[str], indexed: Dict[str, tuple], limit: int = SCAN_CHUNK) -> Tuple[List[str], int, bool]:
+        """Walks up to `limit` notes (in a thread): (paths whose stat fingerprint moved, scanned, exhausted)."""
+        moved = []
+        scanned = 0
+        for path in islice(notes, limit):
+            scanned += 1
+            if not SovereignStateManager.matches_fingerprint(path, indexed):
+                moved.append(path)
+        return moved, scanned, scanned < limit
+
+    @classmethod
+    async def sync_vault(cls, ingest_use_case, concurrency: int = OBSIDIAN_SYNC_CONCURRENCY, batch_size: int = OBSIDIAN_SYNC_BATCH_SIZE) -> Dict[str, Any]:
         """
         Scans all Markdown files in the vault and indexes new or changed files into Hybrid RAG (FTS5 + Vector).
+
+        Pipelined: the scanner stats notes off the loop and feeds the changed ones into a
+        bounded queue; `concurrency` workers hash, read and chunk them; one writer embeds
+        and indexes up to `batch_size` notes at a time (one vector store call, one FTS5 transaction).
         """
         cls.init_vault()
-        scanned = 0
-        indexed = 0
-        skipped = 0
-        errors = 0
+        stats = {"scanned": 0, "indexed": 0, "skipped": 0, "errors": 0}
+        started = time.perf_counter()
+
+        logger.info(f"🔄 Scanning Obsidian Vault: {cls.VAULT_PATH} ({concurrency} workers, batches of {batch_size})...")
+        indexed = await asyncio.to_thread(SovereignStateManager.vault_fingerprints)
+        refreshed: List[tuple] = []
+        changed: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 4)
+        ready: asyncio.Queue = asyncio.Queue(maxsize=batch_size)
+
+        async def scan():
+            notes = cls._iter_notes()
+            exhausted = False
+            while not exhausted:
+                moved, scanned, exhausted = await asyncio.to_thread(cls._scan_chunk, notes, indexed)
+                stats["scanned"] += scanned
+                stats["skipped"] += scanned - len(moved)
+                for path in moved:
+                    await changed.put(path)
+
+        async def prepare():
+            while (path := await changed.get()) is not None:
+                try:
+                    # Fingerprint moved: hash (off the loop); touched-but-identical notes stop here
+                    check = await asyncio.to_thread(SovereignStateManager.check_file, path, None, indexed, refreshed)
+                    if not check.changed:
+                        stats["skipped"] += 1
+                        continue
+                    logger.info(f"📥 Obsidian Sync: Ingesting changed note -> {os.path.basename(path)}")
+                    prepared = await ingest_use_case.prepare(path, domain="obsidian", check=check)
+                    if isinstance(prepared, dict):
+                        stats["skipped" if prepared.get("status") == "skipped" else "errors"] += 1
+                    else:
+                        await ready.put(prepared)
+                except Exception as e:
+                    logger.error(f"❌ Failed to sync Obsidian note {os.path.basename(path)}: {e}")
+                    stats["errors"] += 1
 
-        logger.info(f"🔄 Scanning Obsidian Vault: {cls.VAULT_PATH}...")
-        
-        # Recursively search for markdown files
-        for md_file in cls.VAULT_PATH.rglob("*.md"):
-            # Skip Reflective Notes folder to avoid circular indexing loops
-            if "Reflective Notes" in md_file.parts:
-                continue
-                
-            scanned += 1
-            file_str = str(md_file)
-            
+        async def flush(batch):
             try:
-                # Check hashing to avoid redundant indexing
-                if SovereignStateManager.needs_reindexing(file_str):
-                    logger.info(f"📥 Obsidian Sync: Ingesting changed note -> {md_file.name}")
-                    res = await ingest_use_case.execute(file_str, domain="obsidian")
-                    if res.get("status") == "success":
-                        indexed += 1
-                    else:
-                        errors += 1
-                else:
-                    skipped += 1
+                await ingest_use_case.store_batch(batch)
+                stats["indexed"] += len(batch)
             except Exception as e:
-                logger.error(f"❌ Failed to sync Obsidian note {md_file.name}: {e}")
-                errors += 1
-
-        logger.info(f"✅ Obsidian Sync Complete: Scanned {scanned}, Indexed {indexed}, Skipped {skipped}, Errors {errors}")
-        return {
-            "scanned": scanned,
-            "indexed": indexed,
-            "skipped": skipped,
-            "errors": errors
-        }
+                logger.error(f"❌ Failed to index a batch of {len(batch)} Obsidian notes: {e}")
+                stats["errors"] += len(batch)
+
+        async def write():
+            # Takes whatever is ready: batches grow on their own while the previous one embeds
+            while (item := await ready.get()) is not None:
+                batch = [item]
+                while len(batch) < batch_size and not ready.empty():
+                    item = ready.get_nowait()
+                    if item is None:
+                        await flush(batch)
+                        return
+                    batch.append(item)
+                await flush(batch)
+
+        with tracing.span("obsidian.sync", concurrency=concurrency, batch_size=batch_size):
+            writer = asyncio.create_task(write())
+            workers = [asyncio.create_task(prepare()) for _ in range(max(1, concurrency))]
+            try:
+                await scan()
+                for _ in workers:
+                    await changed.put(None)
+                await asyncio.gather(*workers)
+                await ready.put(None)
+                await writer
+            except BaseException:
+                for task in (writer, *workers):
+                    task.cancel()
+                raise
+            finally:
+                # Touched-but-identical notes: new fingerprints written in one transaction
+                await asyncio.to_thread(SovereignStateManager.refresh_fingerprints, refreshed)
+            tracing.set_attributes(**stats)
+
+        elapsed = time.perf_counter() - started
+        stats["seconds"] = round(elapsed, 3)
+        stats["notes_per_sec"] = round(stats["scanned"] / elapsed, 1) if elapsed else 0.0
+        logger.info(
+            f"✅ Obsidian Sync Complete: Scanned {stats['scanned']}, Indexed {stats['indexed']}, "
+            f"Skipped {stats['skipped']}, Errors {stats['errors']} in {elapsed:.2f}s ({stats['notes_per_sec']} notes/s)"
+        )
+        return stats
 
     @classmethod
     async def generate_reflective_note(cls, session_id: str, inference_provider) -> str:
@@ -156,19 +231,22 @@ La síntesis mediante IA falló, pero la memoria de la conversación se mantiene
     async def start_auto_learner_loop(cls, inference_provider, interval_seconds: int = 600):
         """Periodically scans active sessions and writes reflective notes."""
         logger.info("🧠 AutoLearner Background Service active.")
-        import asyncio
         import sqlite3
         while True:
             await asyncio.sleep(interval_seconds)
             try:
-                # Find all distinct sessions that have conversation history
-                with sqlite3.connect(SovereignStateManager.DB_PATH) as conn:
-                    cursor = conn.execute("SELECT DISTINCT session_id FROM conversation_memory")
-                    sessions = [row[0] for row in cursor.fetchall() if row[0] != "default"]
-                
-                for sid in sessions:
-                    logger.info(f"🧠 AutoLearner: Synthesizing memory for session {sid}...")
-                    await cls.generate_reflective_note(sid, inference_provider)
+                # One trace per cycle, one child span per session
+                with tracing.span("autolearner.cycle"):
+                    # Find all distinct sessions that have conversation history
+                    with sqlite3.connect(SovereignStateManager.DB_PATH) as conn:
+                        cursor = conn.execute("SELECT DISTINCT session_id FROM conversation_memory")
+                        sessions = [row[0] for row in cursor.fetchall() if row[0] != "default"]
+                    tracing.set_attributes(sessions=len(sessions))
+
+                    for sid in sessions:
+                        logger.info(f"🧠 AutoLearner: Synthesizing memory for session {sid}...")
+                        with tracing.span("autolearner.reflect", session_id=sid):
+                            await cls.generate_reflective_note(sid, inference_provider)
             except Exception as e:
                 logger.error(f"⚠️ AutoLearner background task error: {e}")
 
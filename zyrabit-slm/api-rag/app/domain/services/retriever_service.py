@@ -1,9 +1,12 @@
+import asyncio
 import logging
 from typing import List, Optional
 from langchain_community.retrievers import BM25Retriever
 from langchain_classic.retrievers import EnsembleRetriever
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
+from app.infrastructure.shared.stage_timer import stage
+from app.infrastructure.shared import tracing
 
 logger = logging.getLogger("zyrabit.api")
 
@@ -34,24 +37,56 @@ class HybridRetrieverService:
         )
         logger.info("✅ Hybrid Ensemble Retriever ready.")
 
+    def remove_from_bm25_index(self, sources: List[str]) -> int:
+        """
+        Drops the chunks of deleted files from the BM25 index. Returns how many were removed.
+        """
+        if not self.bm25_retriever:
+            return 0
+        sources = set(sources)
+        kept = [doc for doc in self.bm25_retriever.docs if doc.metadata.get("source") not in sources]
+        removed = len(self.bm25_retriever.docs) - len(kept)
+        if not removed:
+            return 0
+        if kept:
+            self.update_bm25_index(kept)
+        else:
+            self.bm25_retriever = None
+            self.ensemble_retriever = None
+        logger.info(f"📉 Removed {removed} chunks from the BM25 index.")
+        return removed
+
     async def search(self, query: str, domain: Optional[str] = None) -> List[Document]:
         """
         Executes hybrid search with FTS5 Fast-Path and Vector Fallback.
+        Duplicate hits are collapsed into one (see chunk_dedup.collapse_duplicates), off the
+        event loop: it computes a MinHash per hit and queries SQLite.
         """
         from app.infrastructure.shared.state_tracker import SovereignStateManager
-        
-        logger.info(f"⚡ FTS5 Fast-Path Search for: '{query}'")
-        fts_results = SovereignStateManager.search_fts(query)
-        
-        if fts_results:
-            logger.info(f"🚀 FTS5 Hit! Found {len(fts_results)} results instantly.")
-            return [Document(page_content=r["snippet"], metadata={"source": r["file_path"], "type": "fts5"}) for r in fts_results]
-
-        if not self.ensemble_retriever:
-            logger.warning("⚠️ Ensemble Retriever not initialized. Falling back to Vector-only.")
-            return self.vector_store.similarity_search(query, k=3)
-            
-        logger.info(f"🔎 Falling back to Hybrid Ensemble (Vector+BM25) for: '{query}'")
-        results = self.ensemble_retriever.invoke(query)
-        return results
+        from app.domain.services.chunk_dedup import collapse_duplicates
+
+        with tracing.span("retriever.search", domain=domain):
+            logger.info(f"⚡ FTS5 Fast-Path Search for: '{query}'")
+            with stage("fts"):
+                fts_results = SovereignStateManager.search_fts(query)
+
+            if fts_results:
+                logger.info(f"🚀 FTS5 Hit! Found {len(fts_results)} results instantly.")
+                tracing.set_attributes(**{"retrieval.path": "fts5", "retrieval.hits": len(fts_results)})
+                return await asyncio.to_thread(collapse_duplicates, [
+                    Document(page_content=r["snippet"], metadata={"source": r["file_path"], "type": "fts5"}) for r in fts_results
+                ])
+
+            if not self.ensemble_retriever:
+                logger.warning("⚠️ Ensemble Retriever not initialized. Falling back to Vector-only.")
+                with stage("vector_search"):
+                    results = self.vector_store.similarity_search(query, k=3)
+                tracing.set_attributes(**{"retrieval.path": "vector", "retrieval.hits": len(results)})
+                return await asyncio.to_thread(collapse_duplicates, results)
+
+            logger.info(f"🔎 Falling back to Hybrid Ensemble (Vector+BM25) for: '{query}'")
+            with stage("vector_search"):
+                results = self.ensemble_retriever.invoke(query)
+            tracing.set_attributes(**{"retrieval.path": "hybrid", "retrieval.hits": len(results)})
+            return await asyncio.to_thread(collapse_duplicates, results)
 
@@ -0,0 +1,109 @@
+import time
+import logging
+from typing import Dict, List, Optional, Any
+import numpy as np
+from app.infrastructure.shared.metrics import ROUTING_DECISIONS_TOTAL, ROUTING_LATENCY_MS
+
+logger = logging.getLogger("zyrabit.api")
+
+# Exemplar queries per route (ES + EN). Centroids are the normalized mean of their embeddings.
+DEFAULT_ROUTE_EXEMPLARS: Dict[str, List[str]] = {
+    "rag": [
+        "¿Qué dicen mis notas sobre este proyecto?",
+        "Busca en el vault la información sobre la reunión",
+        "Resume el documento que subí",
+        "¿Qué decidimos en la arquitectura de Zyrabit?",
+        "What do my documents say about the deployment?",
+        "Find the notes where I described the infrastructure",
+        "According to the PDF, what are the requirements?",
+        "Search my Obsidian vault for the onboarding checklist",
+    ],
+    "direct": [
+        "Hola, ¿cómo estás?",
+        "Cuéntame un chiste",
+        "¿Cuánto es 15 por 7?",
+        "Traduce esta frase al inglés",
+        "Hello, who are you?",
+        "Write a haiku about the sea",
+        "What is the capital of France?",
+        "Explain what a Python list comprehension is",
+    ],
+}
+
+
+class SemanticRouter:
+    """
+    Embedding-based RAG vs direct routing.
+    Scores the query embedding against one centroid per route with a single
+    matrix-vector product. The query embedding goes through the embeddings
+    query cache, so the vector search that follows reuses it (no extra HTTP call).
+    Falls back to the keyword decision when embeddings are unavailable or the
+    decision is not confident enough.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        exemplars: Optional[Dict[str, List[str]]] = None,
+        min_similarity: float = 0.35,
+        min_margin: float = 0.03,
+    ):
+        self.embeddings = embeddings
+        self.exemplars = exemplars or DEFAULT_ROUTE_EXEMPLARS
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self.routes: List[str] = []
+        self.centroids: Optional[np.ndarray] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.centroids is not None
+
+    def fit(self) -> None:
+        """Precomputes route centroids with one batched embedding call."""
+        routes = list(self.exemplars)
+        texts = [t for r in routes for t in self.exemplars[r]]
+        vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+
+        centroids = []
+        offset = 0
+        for r in routes:
+            n = len(self.exemplars[r])
+            centroid = vectors[offset:offset + n].mean(axis=0)
+            centroids.append(centroid / (np.linalg.norm(centroid) or 1.0))
+            offset += n
+
+        self.routes = routes
+        self.centroids = np.vstack(centroids)
+        logger.info(f"🧭 Semantic Router ready: {len(routes)} routes, dim={self.centroids.shape[1]}")
+
+    def scores(self, query_vector: List[float]) -> Dict[str, float]:
+        q = np.asarray(query_vector, dtype=np.float32)
+        q /= (np.linalg.norm(q) or 1.0)
+        sims = self.centroids @ q
+        return {route: float(s) for route, s in zip(self.routes, sims)}
+
+    def route(self, text: str, fallback: str) -> Dict[str, Any]:
+        """
+        Returns {"route", "strategy", "scores"}. `fallback` is the keyword decision.
+        """
+        start = time.perf_counter()
+        decision = {"route": fallback, "strategy": "keyword", "scores": {}}
+
+        if self.ready:
+            try:
+                scores = self.scores(self.embeddings.embed_query(text))
+                ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+                best, best_score = ranked[0]
+                margin = best_score - ranked[1][1] if len(ranked) > 1 else best_score
+                decision["scores"] = {k: round(v, 4) for k, v in scores.items()}
+                if best_score >= self.min_similarity and margin >= self.min_margin:
+                    decision["route"] = best
+                    decision["strategy"] = "semantic"
+            except Exception as e:
+                logger.warning(f"⚠️ Semantic Router unavailable, using keyword route: {e}")
+
+        ROUTING_LATENCY_MS.labels(strategy=decision["strategy"]).observe((time.perf_counter() - start) * 1000)
+        # keyword_route vs route shows where retrieval was saved (rag -> direct) or gained (direct -> rag)
+        ROUTING_DECISIONS_TOTAL.labels(keyword_route=fallback, route=decision["route"]).inc()
+        return decision
@@ -0,0 +1,209 @@
+import os
+import time
+import asyncio
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app.infrastructure.shared.config import (
+    DOCS_DIR,
+    WATCHER_DEBOUNCE_MS,
+    WATCHER_FORCE_POLLING,
+    WATCHER_POLL_SECONDS,
+)
+from app.infrastructure.shared.state_tracker import SovereignStateManager
+from app.domain.services.obsidian_service import ObsidianService
+
+try:
+    import watchfiles
+    WATCHFILES_AVAILABLE = True
+except ImportError:
+    WATCHFILES_AVAILABLE = False
+
+logger = logging.getLogger("zyrabit.obsidian")
+
+WATCHED_EXTENSIONS = (".md", ".pdf")
+# Generated by ObsidianService itself: indexing them would feed the notes back into their own synthesis
+EXCLUDED_DIRS = ("Reflective Notes",)
+
+
+class VaultWatcher:
+    """
+    Watches DOCS_DIR and the Obsidian vault and queues only what changed:
+    created/modified files become ingest jobs, deleted ones delete jobs.
+
+    Events are debounced and coalesced per path, so an editor saving a note five
+    times in a second queues it once. Uses inotify (FSEvents, ...) through
+    watchfiles when it is installed; otherwise, or with `force_polling`, it diffs
+    a stat snapshot of the roots every `poll_seconds`.
+    """
+
+    def __init__(
+        self,
+        ingest_queue,
+        roots: Optional[Iterable] = None,
+        vault_path: Optional[Path] = None,
+        debounce_ms: int = WATCHER_DEBOUNCE_MS,
+        poll_seconds: float = WATCHER_POLL_SECONDS,
+        force_polling: bool = WATCHER_FORCE_POLLING,
+    ):
+        self.ingest_queue = ingest_queue
+        vault_path = str(vault_path or ObsidianService.VAULT_PATH)
+        roots = [str(root) for root in roots] if roots is not None else [DOCS_DIR, vault_path]
+        self.vault_path = os.path.abspath(vault_path)
+        self.roots = self._outermost(roots)
+        # Paths are queued as the roots were configured (e.g. "./docs/x.pdf", like uploads,
+        # and "docs/obsidian/n.md", like the vault sync) so they match indexed sources
+        self._prefixes = sorted(
+            ((os.path.abspath(root), root) for root in roots + [vault_path]), key=lambda p: len(p[0]), reverse=True
+        )
+        self.debounce_ms = debounce_ms
+        self.poll_seconds = poll_seconds
+        self.force_polling = force_polling or not WATCHFILES_AVAILABLE
+        self._stop = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _outermost(roots: Iterable) -> List[str]:
+        """Absolute roots without the ones nested in another (the vault lives in DOCS_DIR by default)."""
+        paths = sorted({os.path.abspath(root) for root in roots})
+        outer: List[str] = []
+        for path in paths:
+            if not any(path == root or path.startswith(root + os.sep) for root in outer):
+                outer.append(path)
+        return outer
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        for root in self.roots:
+            os.makedirs(root, exist_ok=True)
+        self._stop.clear()
+        watch = self._poll if self.force_polling else self._watch
+        self._task = asyncio.create_task(watch(), name="zyrabit-vault-watcher")
+        mode = f"polling every {self.poll_seconds}s" if self.force_polling else "inotify"
+        logger.info(f"👀 Watching {', '.join(self.roots)} ({mode}, {self.debounce_ms}ms debounce)")
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task:
+            try:
+                await asyncio.wait_for(self._task, timeout=5)
+            except asyncio.TimeoutError:
+                self._task.cancel()
+            except Exception as e:
+                logger.warning(f"⚠️ Vault watcher stopped with an error: {e}")
+            self._task = None
+
+    # --- Event sources ---
+
+    async def _watch(self) -> None:
+        async for changes in watchfiles.awatch(
+            *self.roots,
+            watch_filter=lambda change, path: self._relevant(path),
+            debounce=self.debounce_ms,
+            stop_event=self._stop,
+        ):
+            await self._dispatch({path for _, path in changes})
+
+    async def _poll(self) -> None:
+        """Fallback: stat snapshot diff; changes are flushed once the tree stays quiet for the debounce."""
+        snapshot = await asyncio.to_thread(self._snapshot)
+        pending: Set[str] = set()
+        last_change = 0.0
+        while not self._stop.is_set():
+            wait = min(self.poll_seconds, self.debounce_ms / 1000) if pending else self.poll_seconds
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=wait)
+                break
+            except asyncio.TimeoutError:
+                pass
+            current = await asyncio.to_thread(self._snapshot)
+            changed = {path for path, stat in current.items() if snapshot.get(path) != stat}
+            changed.update(path for path in snapshot if path not in current)
+            snapshot = current
+            if changed:
+                pending |= changed
+                last_change = time.monotonic()
+            elif pending and time.monotonic() - last_change >= self.debounce_ms / 1000:
+                batch, pending = pending, set()
+                await self._dispatch(batch)
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int, int]]:
+        snapshot = {}
+        for root in self.roots:
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = [d for d in dirnames if self._relevant(os.path.join(dirpath, d))]
+                for name in filenames:
+                    path = os.path.join(dirpath, name)
+                    if self._watched(path):
+                        stat = SovereignStateManager.file_stat(path)
+                        if stat:
+                            snapshot[path] = stat
+        return snapshot
+
+    # --- Filtering and dispatch ---
+
+    def _canonical(self, path: str) -> str:
+        path = os.path.abspath(path)
+        for root, configured in self._prefixes:
+            if path.startswith(root + os.sep):
+                return os.path.join(configured, path[len(root) + 1:])
+        return path
+
+    def _relevant(self, path: str) -> bool:
+        """Not hidden (.obsidian, .git, .upload-* temp files) and not generated by us."""
+        path = os.path.abspath(path)
+        for root in self.roots:
+            if path.startswith(root + os.sep):
+                parts = Path(path[len(root) + 1:]).parts
+                return not any(part.startswith(".") or part in EXCLUDED_DIRS for part in parts)
+        return False
+
+    def _watched(self, path: str) -> bool:
+        return path.lower().endswith(WATCHED_EXTENSIONS) and self._relevant(path)
+
+    def domain_for(self, path: str) -> str:
+        return "obsidian" if os.path.abspath(path).startswith(self.vault_path + os.sep) else "general"
+
+    def classify(self, paths: Set[str]) -> Tuple[List[str], List[str]]:
+        """
+        Changed paths -> (files to ingest, indexed files to delete). Files whose stat
+        fingerprint still matches the index (touched, not modified) are dropped; a
+        directory moved in is walked, one deleted or moved out removes its indexed files.
+        """
+        upserts: Set[str] = set()
+        deletes: Set[str] = set()
+        for path in paths:
+            if os.path.isdir(path):
+                for dirpath, dirnames, filenames in os.walk(path):
+                    dirnames[:] = [d for d in dirnames if self._relevant(os.path.join(dirpath, d))]
+                    upserts.update(self._canonical(p) for p in (os.path.join(dirpath, n) for n in filenames) if self._watched(p))
+            elif os.path.isfile(path):
+                if self._watched(path):
+                    upserts.add(path)
+            elif self._watched(path):
+                deletes.add(path)
+            else:
+                deletes.update(SovereignStateManager.indexed_paths_under(path))
+
+        indexed = SovereignStateManager.vault_fingerprints(sorted(upserts | deletes))
+        upserts = {p for p in upserts if not SovereignStateManager.matches_fingerprint(p, indexed)}
+        deletes = {p for p in deletes if p in indexed}
+        return sorted(upserts), sorted(deletes)
+
+    async def _dispatch(self, paths: Set[str]) -> None:
+        try:
+            upserts, deletes = await asyncio.to_thread(self.classify, {self._canonical(p) for p in paths})
+            for path in upserts:
+                await self.ingest_queue.submit(path, os.path.basename(path), self.domain_for(path))
+            for path in deletes:
+                await self.ingest_queue.submit(path, os.path.basename(path), self.domain_for(path), action="delete")
+        except Exception as e:
+            logger.error(f"❌ Vault watcher could not queue {len(paths)} changes: {e}")
+            return
+        if upserts or deletes:
+            logger.info(f"👀 {len(paths)} filesystem events -> {len(upserts)} to ingest, {len(deletes)} to delete")
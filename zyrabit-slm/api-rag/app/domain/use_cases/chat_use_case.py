@@ -1,35 +1,56 @@
+import time
+import asyncio
 import logging
 from typing import Optional, Dict, Any
-from app.infrastructure.shared.config import MODEL_NAME
-from app.infrastructure.shared.metrics import TOKEN_USAGE_TOTAL, TOKEN_LATENCY_MS, SECURITY_HITS_TOTAL, RAG_HITS_TOTAL
+from app.infrastructure.shared.config import MODEL_NAME, STAGE_TIMINGS_IN_METADATA
+from app.infrastructure.shared.metrics import (
+    TOKEN_LATENCY_MS, RAG_HITS_TOTAL, RETRIEVAL_LATENCY_MS, IN_FLIGHT_REQUESTS,
+    observe_token_usage, observe_latency_per_token
+)
 from app.infrastructure.shared.state_tracker import SovereignStateManager
+from app.infrastructure.shared.stage_timer import StageTimer
+from app.infrastructure.shared import tracing
 from app.domain.services.context_manager import ContextManager
 from app.ports.inference_port import InferenceRequest
 
 logger = logging.getLogger("zyrabit.api")
 
+
+def _reported(value) -> Optional[int]:
+    return value if isinstance(value, int) else None
+
+
 class ChatUseCase:
     """
     V5.0 Brain: Orchestrates Security, Hybrid RAG, and Inference.
     """
-    def __init__(self, inference_provider, retriever_service, gatekeeper, cache):
+    def __init__(self, inference_provider, retriever_service, gatekeeper, cache, semantic_router=None, summarizer=None):
         self.inference_provider = inference_provider
         self.retriever_service = retriever_service
         self.gatekeeper = gatekeeper
         self.cache = cache
-        self.context_manager = ContextManager()
+        self.semantic_router = semantic_router
+        self.summarizer = summarizer
+        self.context_manager = ContextManager.for_model(MODEL_NAME)
 
     async def execute(self, text: str, client_msg_id: Optional[str] = None, history: Optional[list] = None, source: str = "WEB") -> Dict[str, Any]:
+        with IN_FLIGHT_REQUESTS.labels(pipeline="chat").track_inprogress(), \
+                tracing.span("chat_use_case.execute", source=source), StageTimer("chat") as timer:
+            return await self._execute(text, client_msg_id, history, source, timer)
+
+    async def _execute(self, text: str, client_msg_id: Optional[str], history: Optional[list], source: str, timer: StageTimer) -> Dict[str, Any]:
         try:
             # 0. Idempotency Check
             if client_msg_id:
                 cached_res = self.cache.get(client_msg_id)
                 if cached_res:
                     cached_res["metadata"]["cached"] = True
+                    tracing.set_attributes(cache_hit=True)
                     return cached_res
 
             # 1. Security Check (PII Masking)
-            sanitized_text, entities = self.gatekeeper.mask_pii(text)
+            with timer.stage("pii_mask"):
+                sanitized_text, entities = self.gatekeeper.mask_pii(text)
             
             if any(entities.values()):
                 found = [k for k, v in entities.items() if v]
@@ -38,9 +59,19 @@ class ChatUseCase:
                 logger.info(f"Sanitized: {sanitized_text}")
             
             # 2. Routing Decision
-            decision = self.gatekeeper.get_routing_decision(sanitized_text)
+            with timer.stage("routing"):
+                decision = self.gatekeeper.get_routing_decision(sanitized_text)
+                route_strategy = "keyword"
+
+                # 2b. Semantic Routing (embedding is cached and reused by the vector search)
+                if self.semantic_router and decision in ("rag", "direct"):
+                    routing = await asyncio.to_thread(self.semantic_router.route, sanitized_text, decision)
+                    decision = routing["route"]
+                    route_strategy = routing["strategy"]
             
+            tracing.set_attributes(cache_hit=False, route_strategy=route_strategy)
             if decision == "reject":
+                tracing.set_attributes(decision="rejected")
                 return {
                     "response": "I'm sorry, that query is out of scope.",
                     "metadata": {"decision": "rejected", "cached": False}
@@ -55,7 +86,10 @@ class ChatUseCase:
                     decision = "direct (no-retriever)"
                 else:
                     try:
-                        results = await self.retriever_service.search(sanitized_text)
+                        search_start = time.perf_counter()
+                        with timer.stage("retrieval"):
+                            results = await self.retriever_service.search(sanitized_text)
+                        RETRIEVAL_LATENCY_MS.observe((time.perf_counter() - search_start) * 1000)
                         if results:
                             context = "\n".join([r.page_content for r in results])
                             sources = list(set([r.metadata.get("source", "unknown") for r in results]))
@@ -66,45 +100,64 @@ class ChatUseCase:
             # 4. Inference
             system_prompt = "You are Zyra, a helpful sovereign assistant."
 
-            # 4. Memory Recovery
+            # 4. Memory Recovery (rolling summary replaces the turns it already covers)
+            session_id = client_msg_id or "default"
+            summary = {}
             if history is None:
-                history = SovereignStateManager.get_history(client_msg_id or "default")
+                with timer.stage("history"):
+                    if self.summarizer:
+                        summary = SovereignStateManager.get_summary(session_id)
+                    history = SovereignStateManager.get_history(session_id, after_id=summary.get("last_message_id") or 0)
             
             # 4b. Fetch User Profile for Personalization
-            user_profile = SovereignStateManager.get_user_profile()
-
-            # 5. Build Final Prompt via ContextManager
-            prompt = self.context_manager.build_final_prompt(
-                system_prompt=system_prompt,
-                history=history,
-                rag_docs=results if decision == "rag" else [],
-                user_query=sanitized_text,
-                user_profile=user_profile,
-                source=source
-            )
-
-
+            with timer.stage("profile"):
+                user_profile = SovereignStateManager.get_user_profile()
 
             # [NEW] Model Switching based on Persona/Profile Preference
             target_model = user_profile.get("preferred_model", MODEL_NAME) if user_profile else MODEL_NAME
+            context_manager = await ContextManager.for_model_async(target_model) if target_model != self.context_manager.model_name else self.context_manager
+
+            # 5. Build Final Prompt via ContextManager (tokenizer and window of the target model)
+            with timer.stage("prompt_build"):
+                prompt = context_manager.build_final_prompt(
+                    system_prompt=system_prompt,
+                    history=history,
+                    rag_docs=results if decision == "rag" else [],
+                    user_query=sanitized_text,
+                    user_profile=user_profile,
+                    source=source,
+                    conversation_summary=summary.get("summary") or ""
+                )
+
 
             request = InferenceRequest(
                 model=target_model, 
                 prompt=prompt,
                 system_prompt=system_prompt
             )
-            response_obj = self.inference_provider.generate(request)
+            with timer.stage("generation"):
+                response_obj = self.inference_provider.generate(request)
 
             
             # 6. Persist interaction to Sovereign State
-            SovereignStateManager.store_message(client_msg_id or "default", "user", sanitized_text)
-            SovereignStateManager.store_message(client_msg_id or "default", "assistant", response_obj.text)
+            message_tokens = {}
+            with timer.stage("persistence"):
+                for role, content in (("user", sanitized_text), ("assistant", response_obj.text)):
+                    message_tokens[role] = context_manager.message_tokens({"role": role, "content": content})
+                    SovereignStateManager.store_message(
+                        session_id, role, content,
+                        token_count=message_tokens[role],
+                        tokenizer=context_manager.tokenizer_name
+                    )
+            if self.summarizer:
+                self.summarizer.schedule(session_id)
 
             latency_ms = response_obj.latency_seconds * 1000
             final_response = {
                 "response": response_obj.text,
                 "metadata": {
                     "decision": decision,
+                    "route_strategy": route_strategy,
                     "latency_ms": round(latency_ms, 2),
                     "sources": sources,
                     "rag_hits": len(sources) if (decision == "rag" and sources) else 0,
@@ -112,12 +165,27 @@ class ChatUseCase:
                     "cached": False
                 }
             }
+            tracing.set_attributes(**{
+                "model": target_model,
+                "decision": decision,
+                "rag_hits": final_response["metadata"]["rag_hits"],
+                "pii_detected": final_response["metadata"]["pii_detected"],
+                "tokens.query": message_tokens["user"],
+                "tokens.response": message_tokens["assistant"],
+            })
+            if STAGE_TIMINGS_IN_METADATA and timer.enabled:
+                final_response["metadata"]["timings"] = timer.as_metadata()
             
-            # 5. Metrics Recording
-            TOKEN_LATENCY_MS.labels(model=MODEL_NAME).observe(latency_ms)
-            # Estimate tokens as words (approximate for SLM visibility)
-            token_count = len(response_obj.text.split())
-            TOKEN_USAGE_TOTAL.labels(model=MODEL_NAME, direction="output").inc(token_count)
+            # 5. Metrics Recording (provider-reported token counts, else the target model's tokenizer)
+            input_tokens = _reported(getattr(response_obj, "input_tokens", None))
+            output_tokens = _reported(getattr(response_obj, "output_tokens", None))
+            if input_tokens is None:
+                input_tokens = context_manager.count_tokens(prompt)
+            if output_tokens is None:
+                output_tokens = context_manager.count_tokens(response_obj.text)
+            TOKEN_LATENCY_MS.labels(model=target_model).observe(latency_ms)
+            observe_token_usage(target_model, input_tokens, output_tokens)
+            observe_latency_per_token(target_model, response_obj.latency_seconds, output_tokens)
             if decision == "rag" and sources:
                 RAG_HITS_TOTAL.labels(collection="default").inc()
 
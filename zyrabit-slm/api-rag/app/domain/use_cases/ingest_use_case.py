@@ -1,13 +1,60 @@
 import os
+import time
 import uuid
+import asyncio
 import logging
-from app.infrastructure.shared.state_tracker import SovereignStateManager
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Union
+from app.infrastructure.shared.config import (
+    BULK_INGEST_BATCH_CHUNKS,
+    INGEST_STREAM_THRESHOLD_MB,
+    MODEL_NAME,
+    STAGE_TIMINGS_IN_METADATA,
+)
+from app.infrastructure.shared.state_tracker import FileCheck, SovereignStateManager
+from app.infrastructure.shared.stage_timer import StageTimer, stage
+from app.infrastructure.shared.metrics import DEDUPLICATED_CHUNKS_TOTAL, IN_FLIGHT_REQUESTS
+from app.infrastructure.shared import tracing
 from app.infrastructure.shared.validators.ingestion_validator import IngestionValidator
 from app.infrastructure.persistence.pdf_processor import PDFProcessor
-from app.domain.services.document_chunker import DocumentChunker
+from app.domain.services.document_chunker import DocumentChunker, PartChunker
+from app.domain.services.context_manager import ContextManager
+from app.domain.services.chunk_dedup import ChunkDeduplicator
 
 logger = logging.getLogger("zyrabit.api")
 
+
+@dataclass
+class PreparedDocument:
+    """A changed file, extracted and chunked, waiting to be embedded and indexed."""
+    file_path: str
+    doc_id: str
+    chunks: list
+    check: FileCheck
+    # Set by store_batch: chunks embedded, kept from the previous version of the file,
+    # and stored as references to a duplicate already embedded
+    embedded: int = 0
+    reused: int = 0
+    deduplicated: int = 0
+    # Files over INGEST_STREAM_THRESHOLD_MB: `chunks` stays empty, store_batch reads, chunks
+    # and embeds the parts one at a time and counts the chunks in `streamed_chunks`
+    parts: Optional[AsyncIterator] = None
+    domain: str = "general"
+    streamed_chunks: int = 0
+
+    @property
+    def chunk_count(self) -> int:
+        return self.streamed_chunks if self.parts is not None else len(self.chunks)
+
+    @property
+    def full_text(self) -> str:
+        return "\n".join(chunk.page_content for chunk in self.chunks)
+
+    @property
+    def chunk_ids(self) -> List[str]:
+        return [chunk.metadata["chunk_id"] for chunk in self.chunks]
+
+
 class IngestUseCase:
     """
     V5.0 High Precision Ingestion Pipeline.
@@ -16,47 +63,295 @@ class IngestUseCase:
         self.vector_store = vector_store
         self.retriever_service = retriever_service
         self.chunker = DocumentChunker()
+        self.context_manager = ContextManager.for_model(MODEL_NAME)
+        self.deduplicator = ChunkDeduplicator()
 
-    async def execute(self, file_path: str, domain: str = "general"):
+    async def execute(self, file_path: str, domain: str = "general", progress: Optional[Callable[[str], Awaitable[None]]] = None, file_hash: Optional[str] = None):
         """
         Executes the high-precision ingestion pipeline.
+        `progress` is awaited with the stage being entered ("extracting", "embedding").
+        `file_hash` (SHA-256, e.g. computed during upload) spares re-reading the file to hash it.
         """
+        with IN_FLIGHT_REQUESTS.labels(pipeline="ingest").track_inprogress(), \
+                tracing.span("ingest_use_case.execute", domain=domain, file=os.path.basename(file_path)), StageTimer("ingest") as timer:
+            result = await self._execute(file_path, domain, timer, progress, file_hash)
+            tracing.set_attributes(status=result.get("status"), chunks=result.get("chunks"))
+            return result
+
+    async def _execute(self, file_path: str, domain: str, timer: StageTimer, progress=None, file_hash=None):
         filename = os.path.basename(file_path)
-        
-        # 1. Validation (Fail-Fast)
-        error = IngestionValidator.validate(file_path)
-        if error:
-            logger.error(f"❌ Validation failed for {filename}: {error}")
-            return {"status": "error", "message": error}
+        prepared = await self.prepare(file_path, domain, file_hash=file_hash, progress=progress)
+        if isinstance(prepared, dict):
+            return prepared
+
+        try:
+            # 4. Ingest into Vector Store (off the loop: another job can extract meanwhile)
+            if progress:
+                await progress("embedding")
+            await self.store_batch([prepared])
+            logger.info(f"✅ High-Precision Ingestion successful: {filename}")
+
+            result = {
+                "status": "success", "doc_id": prepared.doc_id, "chunks": prepared.chunk_count,
+                "embedded": prepared.embedded, "reused": prepared.reused, "deduplicated": prepared.deduplicated,
+            }
+            if STAGE_TIMINGS_IN_METADATA and timer.enabled:
+                result["timings"] = timer.as_metadata()
+            return result
             
-        # 1b. Hashing Check (Avoid Redundant Work)
-        if not SovereignStateManager.needs_reindexing(file_path):
-            logger.info(f"⏩ Skipping {filename} - already indexed and unchanged.")
-            return {"status": "skipped", "message": "unchanged"}
+        except Exception as e:
+            logger.error(f"❌ Ingestion failed for {filename}: {e}")
+            # Extraction/embedding failures may be transient (Ollama, Chroma): the job queue retries them
+            return {"status": "error", "message": str(e), "doc_id": prepared.doc_id, "retryable": True}
+
+    async def prepare(self, file_path: str, domain: str = "general", file_hash: Optional[str] = None,
+                      check: Optional[FileCheck] = None, progress=None) -> Union[PreparedDocument, Dict]:
+        """
+        Validate, change-check, extract and chunk one file (everything before embedding).
+        Returns a PreparedDocument for store_batch, or the final result dict when the file
+        is invalid, unchanged or failed to extract. `check` skips the change check.
+        Files over INGEST_STREAM_THRESHOLD_MB are not extracted here: store_batch streams them.
+        """
+        filename = os.path.basename(file_path)
+
+        with stage("validate"):
+            # 1. Validation (Fail-Fast)
+            error = IngestionValidator.validate(file_path)
+            if error:
+                logger.error(f"❌ Validation failed for {filename}: {error}")
+                return {"status": "error", "message": error}
+                
+            # 1b. Hashing Check (Avoid Redundant Work)
+            if check is None:
+                check = SovereignStateManager.check_file(file_path, file_hash=file_hash)
+            if not check.changed:
+                logger.info(f"⏩ Skipping {filename} - already indexed and unchanged.")
+                return {"status": "skipped", "message": "unchanged"}
 
         doc_id = str(uuid.uuid4())
+        if os.path.getsize(file_path) > INGEST_STREAM_THRESHOLD_MB * 1024 * 1024:
+            logger.info(f"🌊 {filename} is over {INGEST_STREAM_THRESHOLD_MB:g}MB: streaming it part by part")
+            return PreparedDocument(
+                file_path=file_path, doc_id=doc_id, chunks=[], check=check,
+                parts=PDFProcessor.iter_parts(file_path), domain=domain,
+            )
         
         try:
             # 2. Extract (Markdown Paradigm)
-            documents = PDFProcessor.to_markdown_documents(file_path)
+            if progress:
+                await progress("extracting")
+            with stage("extract"):
+                documents = await PDFProcessor.to_markdown_documents_async(file_path)
             
             # 3. Structural Chunking
-            chunks = self.chunker.split(documents, domain=domain)
-            
-            # 4. Ingest into Vector Store
-            # In V5.0 we use the LangChain vector store directly
-            self.vector_store.add_documents(chunks)
-            
-            if self.retriever_service:
-                self.retriever_service.update_bm25_index(chunks)
-            
-            # Combine text for FTS5
-            full_text = "\n".join(chunk.page_content for chunk in chunks)
-            SovereignStateManager.update_vault_index(file_path, len(chunks), full_text_content=full_text)
-            logger.info(f"✅ High-Precision Ingestion successful: {filename}")
-
-            return {"status": "success", "doc_id": doc_id, "chunks": len(chunks)}
-            
+            with stage("chunk"):
+                chunks = await asyncio.to_thread(self._chunk, documents, domain)
         except Exception as e:
             logger.error(f"❌ Ingestion failed for {filename}: {e}")
-            return {"status": "error", "message": str(e), "doc_id": doc_id}
+            return {"status": "error", "message": str(e), "doc_id": doc_id, "retryable": True}
+
+        return PreparedDocument(file_path=file_path, doc_id=doc_id, chunks=chunks, check=check)
+
+    def _chunk(self, documents, domain: str):
+        return self._count_tokens(self.chunker.split(documents, domain=domain))
+
+    def _count_tokens(self, chunks):
+        # 3b. Token counts travel with the chunk so the prompt budgeter never re-encodes it
+        for chunk in chunks:
+            chunk.metadata["token_count"] = self.context_manager.count_tokens(chunk.page_content)
+            chunk.metadata["tokenizer"] = self.context_manager.tokenizer_name
+        return chunks
+
+    async def store_batch(self, prepared: List[PreparedDocument], max_chunks_per_call: Optional[int] = None) -> None:
+        """
+        Embeds and indexes prepared documents together: one vector store call
+        (embedding batches span documents), one BM25 update and one FTS5 transaction.
+        `max_chunks_per_call` splits the vector store writes so no call embeds more.
+
+        Chunk ids are content hashes, so for a re-ingested file only the chunks whose
+        id is new are embedded; ids that disappeared are deleted and the rest are kept.
+        New chunks duplicating one already embedded are stored as references (ChunkDeduplicator).
+        Streamed documents (PreparedDocument.parts) are stored one at a time by _store_stream.
+        """
+        whole = [doc for doc in prepared if doc.parts is None]
+        if whole:
+            await self._store_documents(whole, max_chunks_per_call)
+        for doc in prepared:
+            if doc.parts is not None:
+                await self._store_stream(doc, max_chunks_per_call)
+
+    async def _store_documents(self, prepared: List[PreparedDocument], max_chunks_per_call: Optional[int] = None) -> None:
+        chunks = [chunk for doc in prepared for chunk in doc.chunks]
+        previous = await asyncio.to_thread(SovereignStateManager.indexed_chunk_ids, [doc.file_path for doc in prepared])
+
+        fresh, stale, legacy = [], [], []
+        for doc in prepared:
+            known = previous.get(doc.file_path, set())
+            if known is None:
+                # Indexed before chunk ids were recorded: its chunks can't be matched, replace them all
+                legacy.append(doc.file_path)
+                known = set()
+            ids = set(doc.chunk_ids)
+            new_chunks = [chunk for chunk in doc.chunks if chunk.metadata["chunk_id"] not in known]
+            doc.embedded, doc.reused = len(new_chunks), len(doc.chunks) - len(new_chunks)
+            fresh.extend(new_chunks)
+            stale.extend(sorted(known - ids))
+
+        with stage("dedup"):
+            plan = await asyncio.to_thread(self.deduplicator.plan, fresh, stale)
+        references = plan.reference_ids
+        for doc in prepared:
+            doc.deduplicated = sum(1 for chunk_id in doc.chunk_ids if chunk_id in references)
+            doc.embedded -= doc.deduplicated
+
+        # The embeddings adapter reports its share as "embed"
+        with stage("store"):
+            if legacy:
+                await asyncio.to_thread(self.vector_store.delete, {"source": {"$in": legacy}})
+            if stale:
+                await asyncio.to_thread(self.vector_store.delete, None, stale)
+            embed_seconds = await self._add_documents(plan.embed, max_chunks_per_call)
+        self._count_dedup(plan)
+        
+        if self.retriever_service and chunks:
+            with stage("bm25"):
+                self.retriever_service.update_bm25_index(chunks)
+        
+        # Combine text for FTS5
+        with stage("fts"):
+            entries = [
+                (doc.file_path, len(doc.chunks), doc.full_text, doc.check.file_hash, doc.check.stat)
+                for doc in prepared
+            ]
+            await asyncio.to_thread(
+                SovereignStateManager.commit_chunk_dedup,
+                plan.removed, plan.promoted, plan.repointed, plan.signatures, plan.bands, len(plan.embed), embed_seconds,
+            )
+            await asyncio.to_thread(
+                SovereignStateManager.update_vault_index_batch, entries, {doc.file_path: doc.chunk_ids for doc in prepared}
+            )
+
+    async def _store_stream(self, doc: PreparedDocument, max_chunks_per_call: Optional[int] = None) -> None:
+        """
+        Extracts, chunks and embeds a huge file part by part: only one part and at most
+        `max_chunks_per_call` (BULK_INGEST_BATCH_CHUNKS) pending chunks are held at a time.
+        Each part is indexed in FTS5 as it is read; the chunks of the previous version
+        that did not come back are deleted once the whole file has been read.
+        Markdown keeps the chunk ids of a whole-file ingest; PDF parts are cut by page
+        range, so a PDF that crosses INGEST_STREAM_THRESHOLD_MB is embedded again.
+        """
+        batch_size = max_chunks_per_call or BULK_INGEST_BATCH_CHUNKS
+        previous = await asyncio.to_thread(SovereignStateManager.indexed_chunk_ids, [doc.file_path])
+        known = previous.get(doc.file_path, set())
+        if known is None:
+            # Indexed before chunk ids were recorded: replace all its chunks
+            await asyncio.to_thread(self.vector_store.delete, {"source": doc.file_path})
+            known = set()
+
+        chunker = PartChunker(self.chunker, doc.domain)
+        ids, pending, parts = [], [], 0
+        try:
+            while True:
+                with stage("extract"):
+                    part = await anext(doc.parts, None)
+                if part is None:
+                    break
+                with stage("chunk"):
+                    chunks = await asyncio.to_thread(lambda: self._count_tokens(chunker.split(part)))
+                with stage("fts"):
+                    await asyncio.to_thread(
+                        SovereignStateManager.index_fts_part, doc.file_path,
+                        "\n".join(chunk.page_content for chunk in chunks), parts == 0,
+                    )
+                parts += 1
+                ids.extend(chunk.metadata["chunk_id"] for chunk in chunks)
+                fresh = [chunk for chunk in chunks if chunk.metadata["chunk_id"] not in known]
+                doc.reused += len(chunks) - len(fresh)
+                pending.extend(fresh)
+                while len(pending) >= batch_size:
+                    await self._store_stream_batch(doc, pending[:batch_size], known)
+                    pending = pending[batch_size:]
+            if pending:
+                await self._store_stream_batch(doc, pending, known)
+            if parts == 0:
+                # Nothing came back: the previous version's FTS5 rows go with its chunks
+                await asyncio.to_thread(SovereignStateManager.index_fts_part, doc.file_path, "", True)
+        finally:
+            await doc.parts.aclose()
+
+        stale = sorted(known - set(ids))
+        with stage("store"):
+            plan = await asyncio.to_thread(self.deduplicator.plan, [], stale)
+            embed_seconds = await self._add_documents(plan.embed, max_chunks_per_call)
+            if stale:
+                await asyncio.to_thread(self.vector_store.delete, None, stale)
+        if self.retriever_service:
+            # BM25 is rebuilt in memory from whole chunk lists: a streamed file is served by vectors and FTS5
+            self.retriever_service.remove_from_bm25_index([doc.file_path])
+        with stage("fts"):
+            await asyncio.to_thread(
+                SovereignStateManager.commit_chunk_dedup,
+                plan.removed, plan.promoted, plan.repointed, [], [], len(plan.embed), embed_seconds,
+            )
+            await asyncio.to_thread(
+                SovereignStateManager.update_vault_index_batch,
+                [(doc.file_path, len(ids), "", doc.check.file_hash, doc.check.stat)], {doc.file_path: ids},
+            )
+        doc.streamed_chunks = len(ids)
+        logger.info(f"🌊 Streamed {os.path.basename(doc.file_path)}: {parts} parts, {len(ids)} chunks")
+
+    async def _store_stream_batch(self, doc: PreparedDocument, chunks: list, known: set) -> None:
+        """One batch of new chunks of a streamed file: dedup, embed, then record their signatures."""
+        with stage("dedup"):
+            # The previous version of the file is not a duplicate source: its chunks may be about to go
+            plan = await asyncio.to_thread(self.deduplicator.plan, chunks, (), known)
+        with stage("store"):
+            embed_seconds = await self._add_documents(plan.embed)
+        self._count_dedup(plan)
+        await asyncio.to_thread(
+            SovereignStateManager.commit_chunk_dedup,
+            [], [], [], plan.signatures, plan.bands, len(plan.embed), embed_seconds,
+        )
+        doc.deduplicated += plan.references
+        doc.embedded += len(plan.embed)
+
+    @staticmethod
+    def _count_dedup(plan) -> None:
+        for kind in ("exact", "near"):
+            if getattr(plan, kind):
+                DEDUPLICATED_CHUNKS_TOTAL.labels(kind=kind).inc(getattr(plan, kind))
+
+    async def _add_documents(self, chunks: list, max_chunks_per_call: Optional[int] = None) -> float:
+        """Writes chunks under their chunk ids, at most `max_chunks_per_call` per call. Returns the seconds spent."""
+        started = time.perf_counter()
+        step = max_chunks_per_call or len(chunks)
+        for start in range(0, len(chunks), step or 1):
+            part = chunks[start:start + step]
+            await asyncio.to_thread(self.vector_store.add_documents, part, [chunk.metadata["chunk_id"] for chunk in part])
+        return time.perf_counter() - started
+
+    async def remove(self, file_path: str) -> Dict:
+        """
+        Forgets a deleted file: its chunks leave Chroma, BM25 and FTS5, and the
+        vault index entry goes so a file recreated at the same path is re-ingested.
+        Duplicates of its chunks kept as references in other files are embedded first.
+        """
+        filename = os.path.basename(file_path)
+        with tracing.span("ingest_use_case.remove", file=filename):
+            try:
+                indexed = await asyncio.to_thread(SovereignStateManager.indexed_chunk_ids, [file_path])
+                plan = await asyncio.to_thread(self.deduplicator.plan, [], sorted(indexed.get(file_path) or ()))
+                embed_seconds = await self._add_documents(plan.embed)
+                await asyncio.to_thread(self.vector_store.delete, {"source": file_path})
+                await asyncio.to_thread(
+                    SovereignStateManager.commit_chunk_dedup,
+                    plan.removed, plan.promoted, plan.repointed, [], [], len(plan.embed), embed_seconds,
+                )
+                if self.retriever_service:
+                    self.retriever_service.remove_from_bm25_index([file_path])
+                removed = await asyncio.to_thread(SovereignStateManager.remove_from_vault_index, [file_path])
+            except Exception as e:
+                logger.error(f"❌ Removal failed for {filename}: {e}")
+                return {"status": "error", "message": str(e), "retryable": True}
+        logger.info(f"🗑️ Removed {filename} from the index.")
+        return {"status": "deleted", "indexed": bool(removed)}
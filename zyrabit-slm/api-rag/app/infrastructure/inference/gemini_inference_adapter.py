@@ -62,11 +62,14 @@ class GeminiInferenceAdapter(InferenceProviderPort):
             logger.error("Invalid Gemini response format. Parsing failed.")
             raise InferenceProviderError("Gemini returned an unexpected response format.")
 
+        usage = body.get("usageMetadata") or {}
         return InferenceResult(
             text=generated_text,
             latency_seconds=latency,
             provider=self.provider_name,
             raw_payload=body,
+            input_tokens=usage.get("promptTokenCount"),
+            output_tokens=usage.get("candidatesTokenCount"),
         )
 
     def health(self) -> Dict[str, Any]:
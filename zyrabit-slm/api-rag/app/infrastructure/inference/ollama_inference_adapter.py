@@ -8,6 +8,7 @@ from urllib.parse import urlparse
 
 import requests
 
+from app.infrastructure.shared import tracing
 from app.ports.inference_port import (
     InferenceProviderError,
     InferenceProviderPort,
@@ -30,6 +31,12 @@ class OllamaInferenceAdapter(InferenceProviderPort):
         self.provider_name = provider_name
 
     def generate(self, request: InferenceRequest) -> InferenceResult:
+        with tracing.span("inference.generate", provider=self.provider_name, model=request.model):
+            result = self._generate(request)
+            tracing.set_attributes(**{"tokens.prompt": result.input_tokens, "tokens.completion": result.output_tokens})
+            return result
+
+    def _generate(self, request: InferenceRequest) -> InferenceResult:
         payload: Dict[str, Any] = {
             "model": request.model,
             "prompt": request.prompt,
@@ -71,6 +78,9 @@ class OllamaInferenceAdapter(InferenceProviderPort):
             latency_seconds=latency,
             provider=self.provider_name,
             raw_payload=body,
+            # Ollama reports exact token counts for the prompt and the completion
+            input_tokens=body.get("prompt_eval_count"),
+            output_tokens=body.get("eval_count"),
         )
 
     def health(self) -> Dict[str, Any]:
@@ -0,0 +1,234 @@
+"""Model-aware tokenizers and context windows for prompt budgeting."""
+
+from __future__ import annotations
+
+import re
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Protocol
+
+import requests
+
+from app.infrastructure.shared.config import (
+    DEFAULT_CONTEXT_WINDOW,
+    MODEL_CONTEXT_WINDOWS,
+    SLM_URL,
+    TOKENIZER_DIR,
+)
+
+logger = logging.getLogger("zyrabit.api")
+
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+# Characters per token inside a word. Conservative starting values for 100k-250k
+# BPE vocabularies; refit with ApproximateTokenizer.calibrate() against a tokenizer.json.
+FAMILY_CHARS_PER_TOKEN: Dict[str, float] = {
+    "qwen": 4.2,
+    "llama": 4.0,
+    "mistral": 3.8,
+    "gemma": 4.4,
+    "gemini": 4.4,
+    "phi": 3.9,
+}
+DEFAULT_CHARS_PER_TOKEN = 4.0
+
+# Native context windows for backends that cannot be asked (no /api/show).
+FAMILY_CONTEXT_WINDOWS: Dict[str, int] = {
+    "gemini": 1_048_576,
+}
+
+
+class Tokenizer(Protocol):
+    name: str
+
+    def count(self, text: str) -> int:
+        ...
+
+
+class ApproximateTokenizer:
+    """
+    Fast calibrated estimate: punctuation counts as one token, each word as
+    1 + extra tokens per `chars_per_token` characters beyond the first.
+    """
+
+    def __init__(self, chars_per_token: float = DEFAULT_CHARS_PER_TOKEN, name: str = "approx"):
+        self.chars_per_token = chars_per_token
+        self.name = f"{name}:{chars_per_token:g}"
+
+    def count(self, text: str) -> int:
+        step = self.chars_per_token
+        return sum(1 + int((len(piece) - 1) / step) for piece in _PIECES.findall(text))
+
+    @classmethod
+    def calibrate(cls, samples: Iterable[str], exact: Callable[[str], int], name: str = "approx") -> "ApproximateTokenizer":
+        """Fits chars_per_token so the estimate matches `exact` over the samples."""
+        samples = list(samples)
+        target = sum(exact(s) for s in samples)
+        lo, hi = 1.0, 12.0
+        for _ in range(30):
+            mid = (lo + hi) / 2
+            estimate = sum(cls(mid).count(s) for s in samples)
+            # More chars per token -> fewer tokens
+            if estimate > target:
+                lo = mid
+            else:
+                hi = mid
+        return cls(round((lo + hi) / 2, 2), name=name)
+
+
+class HFTokenizer:
+    """
+    Exact counts from a local HuggingFace tokenizer.json (no network). `tokenizers` is not
+    a direct dependency: it is installed with chromadb, and without it the registry
+    falls back to the calibrated approximation.
+    """
+
+    def __init__(self, path: Path, name: str):
+        from tokenizers import Tokenizer as _HFTokenizer
+
+        self._tokenizer = _HFTokenizer.from_file(str(path))
+        self.name = f"hf:{name}"
+
+    def count(self, text: str) -> int:
+        return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+class TiktokenTokenizer:
+    def __init__(self, model: str):
+        import tiktoken
+
+        self._encoding = tiktoken.encoding_for_model(model)
+        self.name = f"tiktoken:{self._encoding.name}"
+
+    def count(self, text: str) -> int:
+        return len(self._encoding.encode(text))
+
+
+def model_family(model: str) -> str:
+    """'qwen2.5:7b' -> 'qwen', 'gemini-1.5-flash-latest' -> 'gemini'."""
+    base = model.split("/")[-1].lower()
+    match = re.match(r"[a-z]+", base)
+    return match.group() if match else base
+
+
+def parse_context_windows(raw: str) -> Dict[str, int]:
+    """'qwen2.5:7b=32768,gemini=1048576' -> {...}; malformed entries are ignored."""
+    windows = {}
+    for item in raw.split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip().isdigit():
+            windows[name.strip()] = int(value)
+    return windows
+
+
+class TokenizerRegistry:
+    """
+    Per-model tokenizers and context windows, resolved lazily and cached.
+
+    Tokenizer lookup: `<tokenizer_dir>/<model>/tokenizer.json` (with ':' and '/'
+    replaced by '-'), then `<tokenizer_dir>/<family>/tokenizer.json`, then
+    tiktoken for OpenAI models, then a calibrated approximation.
+    Context window lookup: config, then family defaults, then Ollama /api/show.
+    """
+
+    def __init__(
+        self,
+        tokenizer_dir: str = TOKENIZER_DIR,
+        context_windows: Optional[Dict[str, int]] = None,
+        ollama_url: str = SLM_URL,
+        default_window: int = DEFAULT_CONTEXT_WINDOW,
+        timeout_seconds: float = 2.0,
+    ):
+        self.tokenizer_dir = Path(tokenizer_dir) if tokenizer_dir else None
+        self.context_windows = dict(context_windows or {})
+        self.ollama_url = ollama_url.rstrip("/") if ollama_url else ""
+        self.default_window = default_window
+        self.timeout_seconds = timeout_seconds
+        self._tokenizers: Dict[str, Tokenizer] = {}
+        self._windows: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def tokenizer(self, model: str) -> Tokenizer:
+        tokenizer = self._tokenizers.get(model)
+        if tokenizer is None:
+            tokenizer = self._load_tokenizer(model)
+            with self._lock:
+                tokenizer = self._tokenizers.setdefault(model, tokenizer)
+        return tokenizer
+
+    def _tokenizer_files(self, model: str) -> List[Path]:
+        if not self.tokenizer_dir:
+            return []
+        slug = model.replace(":", "-").replace("/", "-")
+        return [self.tokenizer_dir / name / "tokenizer.json" for name in (slug, model_family(model))]
+
+    def _load_tokenizer(self, model: str) -> Tokenizer:
+        for path in self._tokenizer_files(model):
+            if path.is_file():
+                try:
+                    tokenizer = HFTokenizer(path, model)
+                    logger.info(f"🔤 Tokenizer for {model}: {path}")
+                    return tokenizer
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not load tokenizer {path}: {e}")
+
+        if model.startswith(("gpt-", "text-embedding-")):
+            try:
+                return TiktokenTokenizer(model)
+            except Exception as e:
+                logger.warning(f"⚠️ tiktoken unavailable for {model}: {e}")
+
+        family = model_family(model)
+        tokenizer = ApproximateTokenizer(FAMILY_CHARS_PER_TOKEN.get(family, DEFAULT_CHARS_PER_TOKEN), name=family)
+        logger.info(f"🔤 No tokenizer files for {model}, using approximation {tokenizer.name}")
+        return tokenizer
+
+    def context_window(self, model: str) -> int:
+        window = self._windows.get(model)
+        if window is None:
+            window = self._resolve_window(model)
+            with self._lock:
+                window = self._windows.setdefault(model, window)
+        return window
+
+    def _resolve_window(self, model: str) -> int:
+        family = model_family(model)
+        for key in (model, family):
+            if key in self.context_windows:
+                return self.context_windows[key]
+        if family in FAMILY_CONTEXT_WINDOWS:
+            return FAMILY_CONTEXT_WINDOWS[family]
+
+        window = self._ollama_window(model) if self.ollama_url else None
+        return window or self.default_window
+
+    def _ollama_window(self, model: str) -> Optional[int]:
+        """
+        Ollama truncates at the runtime num_ctx, not the model's native length:
+        an explicit num_ctx parameter wins, otherwise the native length is capped
+        by the default window.
+        """
+        try:
+            response = requests.post(f"{self.ollama_url}/api/show", json={"model": model}, timeout=self.timeout_seconds)
+            if response.status_code != 200:
+                return None
+            body = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.debug(f"Ollama /api/show unavailable for {model}: {e}")
+            return None
+
+        for line in str(body.get("parameters", "")).splitlines():
+            parts = line.split()
+            if len(parts) == 2 and parts[0] == "num_ctx" and parts[1].isdigit():
+                return int(parts[1])
+
+        native = next(
+            (int(v) for k, v in (body.get("model_info") or {}).items() if k.endswith(".context_length")),
+            None,
+        )
+        return min(native, self.default_window) if native else None
+
+
+# Shared instance (tokenizers are loaded once per process)
+tokenizer_registry = TokenizerRegistry(context_windows=parse_context_windows(MODEL_CONTEXT_WINDOWS))
@@ -1,9 +1,14 @@
+import time
 import logging
+import threading
 import requests
-from typing import List, Dict, Any
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
 from langchain_core.embeddings import Embeddings
 from langchain_chroma import Chroma
 from app.ports.vector_store_port import VectorStorePort
+from app.infrastructure.shared.stage_timer import stage
+from app.infrastructure.shared.metrics import EMBEDDED_TEXTS_TOTAL, EMBEDDING_THROUGHPUT
 
 logger = logging.getLogger("zyrabit.api")
 
@@ -12,11 +17,25 @@ class DirectOllamaEmbeddings(Embeddings):
     Direct Ollama API Embeddings (LangChain Compatible).
     Bypasses library bugs by using raw HTTP requests.
     """
-    def __init__(self, model: str, base_url: str):
+    def __init__(self, model: str, base_url: str, query_cache_size: int = 256):
         self.model = model
         self.base_url = base_url.rstrip("/")
+        # Query embeddings are reused between routing and vector search in the same turn.
+        self.query_cache_size = query_cache_size
+        self._query_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
 
     def _embed(self, texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        with stage("embed"):
+            embeddings = self._embed_batches(texts)
+        elapsed = time.perf_counter() - start
+        EMBEDDED_TEXTS_TOTAL.labels(model=self.model).inc(len(texts))
+        if elapsed > 0:
+            EMBEDDING_THROUGHPUT.labels(model=self.model).set(len(texts) / elapsed)
+        return embeddings
+
+    def _embed_batches(self, texts: List[str]) -> List[List[float]]:
         all_embeddings = []
         batch_size = 5 # Optimized for 800-char chunks
         
@@ -43,8 +62,22 @@ class DirectOllamaEmbeddings(Embeddings):
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         return self._embed(texts)
 
+    def cached_entries(self) -> int:
+        return len(self._query_cache)
+
     def embed_query(self, text: str) -> List[float]:
-        return self._embed([text])[0]
+        with self._query_cache_lock:
+            cached = self._query_cache.get(text)
+            if cached is not None:
+                self._query_cache.move_to_end(text)
+                return cached
+
+        vector = self._embed([text])[0]
+        with self._query_cache_lock:
+            self._query_cache[text] = vector
+            if len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+        return vector
 
 class ChromaAdapter(VectorStorePort):
     """
@@ -59,12 +92,14 @@ class ChromaAdapter(VectorStorePort):
     def add_texts(self, texts: List[str], metadatas: List[Dict[str, Any]], ids: List[str]) -> None:
         self.vector_store.add_texts(texts=texts, metadatas=metadatas, ids=ids)
 
-    def add_documents(self, documents: List[Any]) -> None:
-        self.vector_store.add_documents(documents)
+    def add_documents(self, documents: List[Any], ids: Optional[List[str]] = None) -> None:
+        self.vector_store.add_documents(documents, ids=ids)
 
-    def delete(self, where: Dict[str, Any]) -> None:
-        # Simplified delete for Chroma V0.5+
-        pass
+    def delete(self, where: Optional[Dict[str, Any]] = None, ids: Optional[List[str]] = None) -> None:
+        if where:
+            self.vector_store.delete(where=where)
+        if ids:
+            self.vector_store.delete(ids=ids)
 
     def heartbeat(self) -> bool:
         """
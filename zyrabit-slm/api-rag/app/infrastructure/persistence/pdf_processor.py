@@ -1,16 +1,99 @@
 import os
+import math
+import asyncio
 import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import AsyncIterator, Iterator, List, Optional
+import pymupdf
 import pymupdf4llm
-from typing import List
 from langchain_core.documents import Document
+from app.infrastructure.shared.config import INGEST_STREAM_PART_KB, PDF_PAGES_PER_TASK, PDF_WORKERS
 
 logger = logging.getLogger("zyrabit.api")
 
+# PDF -> Markdown conversion is CPU-bound and holds the GIL: it runs in a bounded
+# process pool, split into page ranges that are converted in parallel and joined
+# in page order (pymupdf4llm output for a page range is the concatenation of its pages).
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+STREAM_PART_BYTES = INGEST_STREAM_PART_KB * 1024
+
+
+def get_pdf_pool() -> ProcessPoolExecutor:
+    """Shared conversion pool, created on first use ('spawn': the API process is multi-threaded)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"📑 PDF conversion pool started ({PDF_WORKERS} workers)")
+        return _pool
+
+
+def shutdown_pdf_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def page_ranges(page_count: int, workers: int = PDF_WORKERS, max_pages: int = PDF_PAGES_PER_TASK) -> List[List[int]]:
+    """Consecutive page ranges: at most `max_pages` each, small enough to keep every worker busy."""
+    size = max(1, min(max_pages, math.ceil(page_count / max(workers, 1))))
+    return [list(range(start, min(start + size, page_count))) for start in range(0, page_count, size)]
+
+
+def _page_count(file_path: str) -> int:
+    with pymupdf.open(file_path) as doc:
+        return doc.page_count
+
+
+def _convert_pages(file_path: str, pages: Optional[List[int]] = None) -> str:
+    """Worker entry point (module level so the pool can pickle it)."""
+    return pymupdf4llm.to_markdown(file_path, pages=pages)
+
+
+def _read_markdown(file_path: str) -> str:
+    with open(file_path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _markdown_parts(file_path: str, part_bytes: Optional[int] = None) -> Iterator[str]:
+    """
+    Reads a Markdown file in parts of about `part_bytes` (INGEST_STREAM_PART_KB), cut before
+    a header line so sections stay whole (a part without headers is cut at twice the size, on a line).
+    """
+    part_bytes = part_bytes or STREAM_PART_BYTES
+    with open(file_path, "r", encoding="utf-8") as f:
+        lines, size = [], 0
+        for line in f:
+            if lines and (size >= 2 * part_bytes or (size >= part_bytes and line.startswith("#"))):
+                yield "".join(lines)
+                lines, size = [], 0
+            lines.append(line)
+            size += len(line)
+        if lines:
+            yield "".join(lines)
+
+
 class PDFProcessor:
     """
     Handles PDF (via conversion) and native Markdown files.
     """
-    
+
+    @staticmethod
+    def _document(file_path: str, md_text: str) -> List[Document]:
+        return [Document(
+            page_content=md_text,
+            metadata={
+                "source": file_path,
+                "format": "markdown"
+            }
+        )]
+
     @staticmethod
     def to_markdown_documents(file_path: str) -> List[Document]:
         """
@@ -18,26 +101,89 @@ class PDFProcessor:
         """
         try:
             ext = os.path.splitext(file_path)[1].lower()
-            
+
             if ext == ".md":
                 logger.info(f"📝 Reading native Markdown: {file_path}")
-                with open(file_path, "r", encoding="utf-8") as f:
-                    md_text = f.read()
+                md_text = _read_markdown(file_path)
             elif ext == ".pdf":
                 logger.info(f"📑 Converting PDF to Markdown: {file_path}")
-                md_text = pymupdf4llm.to_markdown(file_path)
+                md_text = _convert_pages(file_path)
             else:
                 raise ValueError(f"Unsupported extension: {ext}")
-            
-            doc = Document(
-                page_content=md_text,
-                metadata={
-                    "source": file_path,
-                    "format": "markdown"
-                }
-            )
-            
-            return [doc]
+
+            return PDFProcessor._document(file_path, md_text)
         except Exception as e:
             logger.error(f"❌ Document processing failed: {e}")
             raise RuntimeError(f"Failed to process document: {str(e)}")
+
+    @staticmethod
+    async def to_markdown_documents_async(file_path: str, executor: Optional[Executor] = None) -> List[Document]:
+        """
+        Same result as to_markdown_documents without blocking the event loop:
+        Markdown is read in a thread, PDFs are converted by page range in the process pool.
+        """
+        try:
+            ext = os.path.splitext(file_path)[1].lower()
+
+            if ext == ".md":
+                logger.info(f"📝 Reading native Markdown: {file_path}")
+                md_text = await asyncio.to_thread(_read_markdown, file_path)
+            elif ext == ".pdf":
+                md_text = await PDFProcessor.convert_pdf(file_path, executor or get_pdf_pool())
+            else:
+                raise ValueError(f"Unsupported extension: {ext}")
+
+            return PDFProcessor._document(file_path, md_text)
+        except Exception as e:
+            logger.error(f"❌ Document processing failed: {e}")
+            raise RuntimeError(f"Failed to process document: {str(e)}")
+
+    @staticmethod
+    async def convert_pdf(file_path: str, executor: Executor, workers: int = PDF_WORKERS) -> str:
+        loop = asyncio.get_running_loop()
+        page_count = await asyncio.to_thread(_page_count, file_path)
+        ranges = page_ranges(page_count, workers)
+        logger.info(f"📑 Converting PDF to Markdown: {file_path} ({page_count} pages, {len(ranges)} ranges)")
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(executor, _convert_pages, file_path, pages) for pages in ranges
+        ))
+        return "".join(parts)
+
+    @staticmethod
+    async def iter_parts(file_path: str, executor: Optional[Executor] = None,
+                         pages_per_part: int = PDF_PAGES_PER_TASK, lookahead: int = PDF_WORKERS) -> AsyncIterator[Document]:
+        """
+        Yields the Markdown of a file part by part, in order, so huge documents are never
+        held whole: PDFs by ranges of `pages_per_part` pages (at most `lookahead` ranges
+        converting in the pool ahead of the consumer), Markdown by header-aligned parts.
+        Closing the generator early cancels the conversions not started yet.
+        """
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext == ".md":
+            logger.info(f"📝 Streaming native Markdown: {file_path}")
+            parts = _markdown_parts(file_path)
+            try:
+                while (text := await asyncio.to_thread(next, parts, None)) is not None:
+                    yield Document(page_content=text, metadata={"source": file_path, "format": "markdown"})
+            finally:
+                parts.close()
+            return
+        if ext != ".pdf":
+            raise ValueError(f"Unsupported extension: {ext}")
+
+        loop = asyncio.get_running_loop()
+        executor = executor or get_pdf_pool()
+        page_count = await asyncio.to_thread(_page_count, file_path)
+        ranges = deque(page_ranges(page_count, workers=max(1, lookahead), max_pages=pages_per_part))
+        logger.info(f"📑 Streaming PDF to Markdown: {file_path} ({page_count} pages, {len(ranges)} parts)")
+        pending: deque = deque()
+        try:
+            while ranges or pending:
+                while ranges and len(pending) < max(1, lookahead):
+                    pages = ranges.popleft()
+                    pending.append((pages, loop.run_in_executor(executor, _convert_pages, file_path, pages)))
+                _, future = pending.popleft()
+                yield Document(page_content=await future, metadata={"source": file_path, "format": "markdown"})
+        finally:
+            for _, future in pending:
+                future.cancel()
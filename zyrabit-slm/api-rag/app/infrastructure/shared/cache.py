@@ -27,5 +27,8 @@ class IdempotencyCache:
     def clear(self):
         self._cache.clear()
 
+    def __len__(self) -> int:
+        return len(self._cache)
+
 # Global Instance (Infrastructure Shared)
 global_cache = IdempotencyCache()
@@ -18,8 +18,77 @@ RAG_COLLECTION: str = os.getenv("RAG_COLLECTION", "zyrabit_knowledge")
 MODEL_NAME: str = os.getenv("MODEL_NAME", "qwen2.5:7b")
 EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "mxbai-embed-large")
 
+# Context budgeting: local HF tokenizer files (<dir>/<model>/tokenizer.json) and context windows
+TOKENIZER_DIR: str = os.getenv("TOKENIZER_DIR", "/app/tokenizers")
+# e.g. "qwen2.5:7b=32768,gemini=1048576"; otherwise Ollama /api/show is asked
+MODEL_CONTEXT_WINDOWS: str = os.getenv("MODEL_CONTEXT_WINDOWS", "")
+DEFAULT_CONTEXT_WINDOW: int = int(os.getenv("DEFAULT_CONTEXT_WINDOW", "4096"))
+# Rolling conversation summary: fold older turns once this many accumulate beyond the recent ones
+SUMMARY_ENABLED: bool = os.getenv("SUMMARY_ENABLED", "true").lower() == "true"
+SUMMARY_MIN_NEW_MESSAGES: int = int(os.getenv("SUMMARY_MIN_NEW_MESSAGES", "6"))
+SUMMARY_KEEP_RECENT: int = int(os.getenv("SUMMARY_KEEP_RECENT", "4"))
+
+# Routing: optional JSON file with keyword sets per intent (hot-reloaded)
+ROUTING_KEYWORDS_FILE: str = os.getenv("ROUTING_KEYWORDS_FILE", "")
+# Semantic router: embedding centroids decide RAG vs direct (keyword routing is the fallback)
+SEMANTIC_ROUTER_ENABLED: bool = os.getenv("SEMANTIC_ROUTER_ENABLED", "true").lower() == "true"
+SEMANTIC_ROUTER_MIN_SIMILARITY: float = float(os.getenv("SEMANTIC_ROUTER_MIN_SIMILARITY", "0.35"))
+
+# Observability: per-stage latency histograms, optionally echoed as metadata.timings in responses
+STAGE_TIMINGS_ENABLED: bool = os.getenv("STAGE_TIMINGS_ENABLED", "true").lower() == "true"
+STAGE_TIMINGS_IN_METADATA: bool = os.getenv("STAGE_TIMINGS_IN_METADATA", "false").lower() == "true"
+# Tracing (OpenTelemetry): exporter "file" (JSON lines), "otlp" (OTEL_EXPORTER_OTLP_ENDPOINT) or "console"
+TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+TRACING_EXPORTER: str = os.getenv("TRACING_EXPORTER", "file")
+TRACING_FILE: str = os.getenv("TRACING_FILE", "/app/db_data/traces.jsonl")
+TRACING_SAMPLE_RATIO: float = float(os.getenv("TRACING_SAMPLE_RATIO", "0.1"))
+# Metrics: cache-size gauges refresh interval and the cloud cost multiplier for saved tokens.
+# Multi-worker uvicorn: set PROMETHEUS_MULTIPROC_DIR to an empty directory (wiped before start).
+METRICS_REFRESH_SECONDS: float = float(os.getenv("METRICS_REFRESH_SECONDS", "15"))
+TOKEN_SAVINGS_MULTIPLIER: float = float(os.getenv("TOKEN_SAVINGS_MULTIPLIER", "1.3"))
+# Event-loop lag monitor; LOOP_BLOCK_DEBUG logs the loop's stack whenever a callback holds it past the threshold
+LOOP_MONITOR_ENABLED: bool = os.getenv("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+LOOP_MONITOR_INTERVAL_MS: float = float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "250"))
+LOOP_BLOCK_DEBUG: bool = os.getenv("LOOP_BLOCK_DEBUG", "false").lower() == "true"
+LOOP_BLOCK_THRESHOLD_MS: float = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
+
 # Security
 # Default to local dev origins if not specified. In production, this MUST be set in .env
 ALLOWED_ORIGINS: list = os.getenv("ALLOWED_ORIGINS", "http://localhost,https://localhost,http://127.0.0.1").split(",")
 N8N_SERVICE_TOKEN: str = os.getenv("N8N_SERVICE_TOKEN", "zyrabit-local-token")
+# Debug endpoints (/v1/debug/*): disabled unless an admin bearer token is configured
+DEBUG_ADMIN_TOKEN: str = os.getenv("DEBUG_ADMIN_TOKEN", "")
+DEBUG_PROFILE_MAX_SECONDS: int = int(os.getenv("DEBUG_PROFILE_MAX_SECONDS", "120"))
 DOCS_DIR: str = os.getenv("DOCS_DIR", "./docs")
+# Uploads are streamed to disk in chunks of this size (never held whole in memory)
+UPLOAD_CHUNK_BYTES: int = int(os.getenv("UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+# PDF extraction: process pool size and the largest page range converted by one task
+PDF_WORKERS: int = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGES_PER_TASK: int = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+# Largest file accepted for ingestion; files over INGEST_STREAM_THRESHOLD_MB are extracted, chunked and embedded
+# part by part (PDF_PAGES_PER_TASK pages, or about INGEST_STREAM_PART_KB of Markdown) instead of whole
+MAX_FILE_SIZE_MB: int = int(os.getenv("MAX_FILE_SIZE_MB", "50"))
+INGEST_STREAM_THRESHOLD_MB: float = float(os.getenv("INGEST_STREAM_THRESHOLD_MB", "8"))
+INGEST_STREAM_PART_KB: int = int(os.getenv("INGEST_STREAM_PART_KB", "256"))
+# Ingestion job queue: concurrent jobs (one can extract while another embeds), retries and backoff
+INGEST_WORKERS: int = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_MAX_ATTEMPTS: int = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+INGEST_RETRY_BACKOFF_SECONDS: float = float(os.getenv("INGEST_RETRY_BACKOFF_SECONDS", "5"))
+INGEST_POLL_SECONDS: float = float(os.getenv("INGEST_POLL_SECONDS", "2"))
+# Obsidian vault sync: notes prepared (hash, read, chunk) concurrently, and notes embedded/indexed per batch
+OBSIDIAN_SYNC_CONCURRENCY: int = int(os.getenv("OBSIDIAN_SYNC_CONCURRENCY", "4"))
+OBSIDIAN_SYNC_BATCH_SIZE: int = int(os.getenv("OBSIDIAN_SYNC_BATCH_SIZE", "32"))
+# Filesystem watcher on DOCS_DIR and the Obsidian vault (inotify via watchfiles, else stat polling)
+WATCHER_ENABLED: bool = os.getenv("WATCHER_ENABLED", "true").lower() == "true"
+WATCHER_DEBOUNCE_MS: int = int(os.getenv("WATCHER_DEBOUNCE_MS", "1000"))
+WATCHER_POLL_SECONDS: float = float(os.getenv("WATCHER_POLL_SECONDS", "5"))
+WATCHER_FORCE_POLLING: bool = os.getenv("WATCHER_FORCE_POLLING", "false").lower() == "true"
+# Bulk directory ingest (POST /v1/ingest/batch, scripts/ingest.py): files prepared concurrently, chunks embedded per call
+BULK_INGEST_CONCURRENCY: int = int(os.getenv("BULK_INGEST_CONCURRENCY", "2"))
+BULK_INGEST_BATCH_CHUNKS: int = int(os.getenv("BULK_INGEST_BATCH_CHUNKS", "64"))
+# Chunk dedup at ingestion: exact (normalized text hash) and near duplicates (MinHash Jaccard of word 3-shingles
+# at least this) are stored as references to the chunk already embedded; EMBEDDING_DIMENSIONS sizes the report
+DEDUP_ENABLED: bool = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_MIN_JACCARD: float = float(os.getenv("DEDUP_MIN_JACCARD", "0.8"))
+DEDUP_MIN_WORDS: int = int(os.getenv("DEDUP_MIN_WORDS", "8"))
+EMBEDDING_DIMENSIONS: int = int(os.getenv("EMBEDDING_DIMENSIONS", "1024"))
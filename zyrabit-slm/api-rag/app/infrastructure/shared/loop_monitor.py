@@ -0,0 +1,96 @@
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from typing import Optional
+from app.infrastructure.shared.config import (
+    LOOP_BLOCK_DEBUG,
+    LOOP_BLOCK_THRESHOLD_MS,
+    LOOP_MONITOR_INTERVAL_MS,
+)
+from app.infrastructure.shared.metrics import EVENT_LOOP_BLOCKS_TOTAL, EVENT_LOOP_LAG_MS
+
+logger = logging.getLogger("zyrabit.api")
+
+# --- Event loop lag monitor ---
+# A coroutine sleeps `interval` and measures how late it wakes up: that lateness is
+# time some callback kept the loop busy (sync requests.post, sqlite3, CPU work).
+# In debug mode a watchdog thread notices a missed heartbeat while the loop is
+# still blocked and logs the loop thread's stack, pointing at the offending call.
+
+STACK_LIMIT = 25
+
+
+class LoopLagMonitor:
+    def __init__(
+        self,
+        interval_ms: float = LOOP_MONITOR_INTERVAL_MS,
+        debug: bool = LOOP_BLOCK_DEBUG,
+        block_threshold_ms: float = LOOP_BLOCK_THRESHOLD_MS,
+    ):
+        self.interval = interval_ms / 1000
+        self.debug = debug
+        self.block_threshold = block_threshold_ms / 1000
+        self.max_lag_ms = 0.0
+        self.blocks_reported = 0
+        self._beat = 0
+        self._beat_at = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self) -> asyncio.Task:
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        if self.debug:
+            self._watchdog = threading.Thread(target=self._watch, name="zyrabit-loop-watchdog", daemon=True)
+            self._watchdog.start()
+        self._task = asyncio.create_task(self._run(), name="zyrabit-loop-monitor")
+        logger.info(f"⏱️ Event loop monitor active (interval {self.interval * 1000:.0f}ms, block debug={self.debug})")
+        return self._task
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._heartbeat()
+            scheduled = loop.time()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(loop.time() - scheduled - self.interval, 0.0) * 1000
+            EVENT_LOOP_LAG_MS.observe(lag_ms)
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+
+    def _heartbeat(self) -> None:
+        self._beat += 1
+        self._beat_at = time.monotonic()
+
+    def _watch(self) -> None:
+        """Runs off-loop: reports each blocking episode once, while it is still happening."""
+        reported_beat = 0
+        poll = min(self.block_threshold / 2, 0.05)
+        while not self._stop.wait(poll):
+            beat, beat_at = self._beat, self._beat_at
+            blocked_for = time.monotonic() - beat_at - self.interval
+            if blocked_for < self.block_threshold or beat == reported_beat:
+                continue
+            reported_beat = beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            self.blocks_reported += 1
+            EVENT_LOOP_BLOCKS_TOTAL.inc()
+            stack = "".join(traceback.format_stack(frame, limit=STACK_LIMIT))
+            logger.warning(f"🐢 Event loop blocked for {blocked_for * 1000:.0f}ms+ in:\n{stack}")
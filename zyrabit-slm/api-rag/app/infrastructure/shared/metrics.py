@@ -1,13 +1,23 @@
-from prometheus_client import Counter, Histogram
+import os
+import asyncio
+import logging
+from typing import Callable, Dict
+from prometheus_client import Counter, Gauge, Histogram
+from app.infrastructure.shared.config import TOKEN_SAVINGS_MULTIPLIER
+
+logger = logging.getLogger("zyrabit.api")
 
 # --- Zyrabit Prometheus Metrics ---
 # Centralized registry for application-specific metrics.
+# With PROMETHEUS_MULTIPROC_DIR set, prometheus_client writes every worker's values
+# to mmap files and /metrics aggregates them (gauges use the multiprocess_mode below).
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
 
-# Token Usage (Prompt + Completion)
+# Token Usage (real counts: provider-reported or the model tokenizer)
 TOKEN_USAGE_TOTAL = Counter(
     "zyrabit_token_usage_total",
     "Total tokens consumed by SLM",
-    ["model", "direction"] # direction: input, output
+    ["model", "direction"] # direction: input, output, saved_vs_cloud
 )
 
 # Latency Tracking
@@ -17,6 +27,13 @@ TOKEN_LATENCY_MS = Histogram(
     ["model"]
 )
 
+TOKEN_LATENCY_MS_PER_TOKEN = Histogram(
+    "zyrabit_token_latency_ms_per_token",
+    "Model latency in milliseconds per generated token",
+    ["model"],
+    buckets=(0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+
 # Security & PII Gatekeeper Hits
 SECURITY_HITS_TOTAL = Counter(
     "zyrabit_security_hits_total",
@@ -30,3 +47,131 @@ RAG_HITS_TOTAL = Counter(
     "Total number of vector database retrievals",
     ["collection"]
 )
+
+# Routing (Keyword vs Semantic)
+ROUTING_DECISIONS_TOTAL = Counter(
+    "zyrabit_routing_decisions_total",
+    "Routing decisions; keyword_route != route means the semantic router overrode the keyword policy",
+    ["keyword_route", "route"]
+)
+
+ROUTING_LATENCY_MS = Histogram(
+    "zyrabit_routing_latency_ms",
+    "Time spent deciding the route in milliseconds",
+    ["strategy"], # strategy: keyword, semantic
+    buckets=(0.05, 0.1, 0.5, 1, 2, 5, 10, 25, 50, 100, 250)
+)
+
+RETRIEVAL_LATENCY_MS = Histogram(
+    "zyrabit_retrieval_latency_ms",
+    "Hybrid retrieval latency in milliseconds (cost avoided by each direct route)",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+)
+
+# Per-stage breakdown (chat: pii_mask, routing, fts, vector_search, embed, history, profile, prompt_build, generation, persistence;
+# ingest: validate, extract, chunk, embed, store, bm25, fts)
+STAGE_LATENCY_MS = Histogram(
+    "zyrabit_stage_latency_ms",
+    "Latency per pipeline stage in milliseconds (exclusive of nested stages)",
+    ["pipeline", "stage"],
+    buckets=(0.1, 0.5, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+)
+
+# Event loop health: delay between a scheduled wake-up and the moment the loop ran it
+EVENT_LOOP_LAG_MS = Histogram(
+    "zyrabit_event_loop_lag_ms",
+    "Event loop scheduling lag in milliseconds (time callbacks spent blocking the loop)",
+    buckets=(0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+)
+
+EVENT_LOOP_BLOCKS_TOTAL = Counter(
+    "zyrabit_event_loop_blocks_total",
+    "Times a callback held the event loop longer than LOOP_BLOCK_THRESHOLD_MS (debug mode)"
+)
+
+# Saturation (summed across live workers)
+IN_FLIGHT_REQUESTS = Gauge(
+    "zyrabit_in_flight_requests",
+    "Requests currently being processed",
+    ["pipeline"], # pipeline: chat, ingest
+    multiprocess_mode="livesum"
+)
+
+QUEUE_DEPTH = Gauge(
+    "zyrabit_queue_depth",
+    "Background jobs waiting or running",
+    ["queue"], # queue: ingest, summary
+    multiprocess_mode="livesum"
+)
+
+CACHE_ENTRIES = Gauge(
+    "zyrabit_cache_entries",
+    "Entries held by in-process caches (refreshed every METRICS_REFRESH_SECONDS)",
+    ["cache"],
+    multiprocess_mode="livesum"
+)
+
+# Embeddings (rate(zyrabit_embedded_texts_total) is the sustained throughput)
+EMBEDDED_TEXTS_TOTAL = Counter(
+    "zyrabit_embedded_texts_total",
+    "Texts embedded through the Ollama embeddings endpoint",
+    ["model"]
+)
+
+EMBEDDING_THROUGHPUT = Gauge(
+    "zyrabit_embedding_throughput_texts_per_second",
+    "Throughput of the most recent embedding call",
+    ["model"],
+    multiprocess_mode="liveall"
+)
+
+# Chunks stored as references to an already embedded duplicate instead of being embedded
+DEDUPLICATED_CHUNKS_TOTAL = Counter(
+    "zyrabit_deduplicated_chunks_total",
+    "Chunks not embedded because an exact or near duplicate was already in the vector store",
+    ["kind"]
+)
+
+
+def observe_token_usage(model: str, input_tokens: int, output_tokens: int) -> None:
+    """Counts input/output tokens plus the estimated surplus a cloud API would have billed."""
+    input_tokens, output_tokens = max(input_tokens, 0), max(output_tokens, 0)
+    TOKEN_USAGE_TOTAL.labels(model=model, direction="input").inc(input_tokens)
+    TOKEN_USAGE_TOTAL.labels(model=model, direction="output").inc(output_tokens)
+    current = input_tokens + output_tokens
+    TOKEN_USAGE_TOTAL.labels(model=model, direction="saved_vs_cloud").inc(max(int(current * TOKEN_SAVINGS_MULTIPLIER) - current, 0))
+
+
+def observe_latency_per_token(model: str, latency_seconds: float, output_tokens: int) -> None:
+    if latency_seconds <= 0:
+        return
+    TOKEN_LATENCY_MS_PER_TOKEN.labels(model=model).observe(latency_seconds * 1000.0 / max(output_tokens, 1))
+
+
+# Cache sizes are sampled periodically instead of on every get/set
+_cache_sizers: Dict[str, Callable[[], int]] = {}
+
+
+def register_cache(name: str, sizer: Callable[[], int]) -> None:
+    _cache_sizers[name] = sizer
+
+
+def refresh_cache_gauges() -> None:
+    for name, sizer in list(_cache_sizers.items()):
+        try:
+            CACHE_ENTRIES.labels(cache=name).set(sizer())
+        except Exception as e:
+            logger.debug(f"Cache gauge {name} unavailable: {e}")
+
+
+async def start_cache_gauge_loop(interval_seconds: float) -> None:
+    while True:
+        refresh_cache_gauges()
+        await asyncio.sleep(interval_seconds)
+
+
+def mark_process_dead() -> None:
+    """Drops this worker's live gauges from the multiprocess aggregate on shutdown."""
+    if MULTIPROCESS:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,154 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+# --- On-demand sampling profiler ---
+# A daemon thread snapshots every thread's Python stack (sys._current_frames) at a
+# fixed interval, including the event loop thread, so a coroutine stuck in sync I/O
+# (requests.post, sqlite3) shows up with its full call chain. Nothing runs unless a
+# profile is requested; the cost while sampling is one stack walk per thread per tick.
+
+MAX_STACK_DEPTH = 128
+
+# Leaf frames of threads that are parked, not working (event loop select, idle pool workers)
+IDLE_LEAVES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("thread.py", "_worker"),
+    ("queue.py", "get"),
+}
+
+Frame = Tuple[str, str, int]  # (function, file, first line)
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler over all threads of the process.
+
+        profiler = SamplingProfiler(interval=0.01)
+        profiler.start(); ...; profiler.stop()
+        profiler.collapsed()   # flamegraph.pl / speedscope "collapsed" text
+        profiler.speedscope()  # speedscope JSON document
+    """
+
+    def __init__(self, interval: float = 0.01, include_idle: bool = False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.samples: Counter = Counter()  # (thread name, stack root->leaf) -> hits
+        self.ticks = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="zyrabit-profiler", daemon=True)
+        self._started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = self._stack(frame)
+                if not self.include_idle and (os.path.basename(stack[-1][1]), stack[-1][0]) in IDLE_LEAVES:
+                    continue
+                self.samples[(names.get(ident, f"thread-{ident}"), stack)] += 1
+            self.ticks += 1
+
+    @staticmethod
+    def _stack(frame) -> Tuple[Frame, ...]:
+        stack = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            stack.append((code.co_qualname, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+    @staticmethod
+    def _label(frame: Frame) -> str:
+        function, filename, line = frame
+        return f"{function} ({os.path.basename(filename)}:{line})"
+
+    def collapsed(self) -> str:
+        """One line per unique stack: 'thread;outer;...;leaf count'."""
+        lines = [
+            ";".join([thread] + [self._label(f) for f in stack]) + f" {count}"
+            for (thread, stack), count in self.samples.most_common()
+        ]
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str = "zyrabit") -> Dict[str, Any]:
+        """Speedscope file format: one sampled profile per thread, weights in milliseconds."""
+        frame_index: Dict[Frame, int] = {}
+        frames: List[Dict[str, Any]] = []
+        profiles: Dict[str, Dict[str, Any]] = {}
+        weight_ms = self.interval * 1000
+
+        for (thread, stack), count in self.samples.items():
+            indices = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                indices.append(frame_index[frame])
+            profile = profiles.setdefault(thread, {
+                "type": "sampled", "name": thread, "unit": "milliseconds",
+                "startValue": 0, "endValue": 0, "samples": [], "weights": [],
+            })
+            profile["samples"].append(indices)
+            profile["weights"].append(count * weight_ms)
+            profile["endValue"] += count * weight_ms
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "zyrabit-sampling-profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": list(profiles.values()),
+        }
+
+
+def _await_chain(coro) -> List[str]:
+    """Frames of a suspended coroutine and everything it awaits (Task.get_stack stops at the first)."""
+    chain = []
+    while coro is not None and len(chain) < MAX_STACK_DEPTH:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        chain.append(f"{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_qualname}")
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return chain
+
+
+def dump_tasks(loop: Optional[asyncio.AbstractEventLoop] = None) -> List[Dict[str, Any]]:
+    """
+    Snapshot of the loop's asyncio tasks: the coroutine, what it is awaiting and
+    its suspended await chain (outermost first). Call from the loop thread.
+    """
+    current = asyncio.current_task(loop)
+    tasks = []
+    for task in asyncio.all_tasks(loop):
+        coro = task.get_coro()
+        waiter = getattr(task, "_fut_waiter", None)
+        tasks.append({
+            "name": task.get_name(),
+            "coroutine": getattr(coro, "__qualname__", repr(coro)),
+            "current": task is current,
+            "waiting_on": repr(waiter) if waiter is not None else None,
+            "stack": _await_chain(coro),
+        })
+    return sorted(tasks, key=lambda t: t["name"])
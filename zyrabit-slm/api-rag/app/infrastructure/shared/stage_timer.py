@@ -0,0 +1,102 @@
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from app.infrastructure.shared.config import STAGE_TIMINGS_ENABLED
+from app.infrastructure.shared.metrics import STAGE_LATENCY_MS
+
+# --- Per-stage latency breakdown ---
+# A StageTimer is bound to the current context while a request runs, so adapters
+# deep in the call stack (embeddings, FTS5) can attribute their time with stage()
+# without the timer being passed around. Nested stages are exclusive: the parent
+# stage only keeps the time not spent in its children.
+
+_current_timer: ContextVar[Optional["StageTimer"]] = ContextVar("zyrabit_stage_timer", default=None)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("timer", "name", "start", "children_ms")
+
+    def __init__(self, timer: "StageTimer", name: str):
+        self.timer = timer
+        self.name = name
+        self.children_ms = 0.0
+
+    def __enter__(self):
+        self.timer._stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed_ms = (time.perf_counter() - self.start) * 1000
+        stack = self.timer._stack
+        stack.pop()
+        if stack:
+            stack[-1].children_ms += elapsed_ms
+        timings = self.timer.timings
+        timings[self.name] = timings.get(self.name, 0.0) + elapsed_ms - self.children_ms
+        return False
+
+
+class StageTimer:
+    """
+    Context-manager based stage timer for one pipeline run (chat turn, ingestion).
+
+        with StageTimer("chat") as timer:
+            with timer.stage("pii_mask"):
+                ...
+
+    Observes zyrabit_stage_latency_ms{pipeline, stage} once per stage on exit.
+    Disabled timers hand out a shared no-op stage.
+    """
+
+    def __init__(self, pipeline: str, enabled: bool = STAGE_TIMINGS_ENABLED):
+        self.pipeline = pipeline
+        self.enabled = enabled
+        self.timings: Dict[str, float] = {}
+        self._stack: List[_Stage] = []
+        self._token = None
+        self._start = 0.0
+        self.total_ms = 0.0
+
+    def stage(self, name: str):
+        return _Stage(self, name) if self.enabled else _NULL_STAGE
+
+    def __enter__(self):
+        if self.enabled:
+            self._token = _current_timer.set(self)
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if not self.enabled:
+            return False
+        self.total_ms = (time.perf_counter() - self._start) * 1000
+        _current_timer.reset(self._token)
+        for name, ms in self.timings.items():
+            STAGE_LATENCY_MS.labels(pipeline=self.pipeline, stage=name).observe(ms)
+        return False
+
+    def as_metadata(self) -> Dict[str, float]:
+        """Rounded per-stage milliseconds plus the total, for response metadata."""
+        data = {name: round(ms, 2) for name, ms in self.timings.items()}
+        data["total"] = round(self.total_ms or sum(self.timings.values()), 2)
+        return data
+
+
+def stage(name: str):
+    """Times a block against the timer of the current request, if any."""
+    timer = _current_timer.get()
+    return timer.stage(name) if timer is not None else _NULL_STAGE
@@ -1,12 +1,24 @@
 import os
+import json
+import time
+import uuid
 import sqlite3
 import logging
 import hashlib
+import threading
 from datetime import datetime
 from pathlib import Path
+from typing import NamedTuple
 
 logger = logging.getLogger("zyrabit.api")
 
+
+class FileCheck(NamedTuple):
+    """Result of a change check: `stat` is (mtime_ns, size, inode) taken before hashing."""
+    changed: bool
+    file_hash: str
+    stat: tuple | None
+
 class SovereignStateManager:
     """
     V2.0 Sovereign State: Manages Vault Indexing (Hashing) and Conversation Memory.
@@ -14,10 +26,20 @@ class SovereignStateManager:
     """
     DB_PATH = os.getenv("DB_PATH", "/app/db_data/sovereign_state.db")
 
+    # Profile cache: validated per read with PRAGMA data_version on a long-lived connection
+    # (changes when another connection/worker commits), then with the profile version column.
+    _profile_lock = threading.Lock()
+    _profile_cache: dict | None = None
+    _profile_version: int | None = None
+    _data_version: int | None = None
+    _watch_conn: sqlite3.Connection | None = None
+    _watch_path: str | None = None
+
     @classmethod
     def init_db(cls, db_path: str | None = None):
         if db_path:
             cls.DB_PATH = db_path
+        cls.invalidate_profile_cache()
         
         # Ensure directory exists
         Path(cls.DB_PATH).parent.mkdir(parents=True, exist_ok=True)
@@ -47,6 +69,16 @@ class SovereignStateManager:
                 )
             """)
 
+            # 2b. Rolling summary per session (replaces turns up to last_message_id in the prompt)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS conversation_summary (
+                    session_id TEXT PRIMARY KEY,
+                    summary TEXT,
+                    last_message_id INTEGER,
+                    updated_at TIMESTAMP
+                )
+            """)
+
             # 3. User Profile (Onboarding & Persona)
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS user_profile (
@@ -68,6 +100,125 @@ class SovereignStateManager:
             except sqlite3.OperationalError:
                 pass # Column exists
 
+            # Migration: token counts stored at write time so history is never re-encoded
+            for column in ("token_count INTEGER", "tokenizer TEXT"):
+                try:
+                    conn.execute(f"ALTER TABLE conversation_memory ADD COLUMN {column}")
+                except sqlite3.OperationalError:
+                    pass # Column exists
+
+            # Migration: stat fingerprint, so unchanged files are recognised without hashing them
+            for column in ("mtime_ns INTEGER", "size_bytes INTEGER", "inode INTEGER"):
+                try:
+                    conn.execute(f"ALTER TABLE vault_index ADD COLUMN {column}")
+                except sqlite3.OperationalError:
+                    pass # Column exists
+
+            # Migration: profile version, bumped on every update (cache invalidation across workers)
+            try:
+                conn.execute("ALTER TABLE user_profile ADD COLUMN version INTEGER DEFAULT 0")
+            except sqlite3.OperationalError:
+                pass # Column exists
+
+            # 3b. Ingestion job queue (survives restarts; workers claim jobs atomically)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ingest_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    file_path TEXT,
+                    filename TEXT,
+                    domain TEXT DEFAULT 'general',
+                    state TEXT DEFAULT 'queued',
+                    attempts INTEGER DEFAULT 0,
+                    max_attempts INTEGER DEFAULT 3,
+                    error TEXT,
+                    result TEXT,
+                    next_attempt_at REAL DEFAULT 0,
+                    created_at TIMESTAMP,
+                    updated_at TIMESTAMP
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ingest_jobs_state ON ingest_jobs (state, next_attempt_at)")
+
+            # Migration: SHA-256 computed while the upload streamed to disk (saves re-reading the file)
+            try:
+                conn.execute("ALTER TABLE ingest_jobs ADD COLUMN file_hash TEXT")
+            except sqlite3.OperationalError:
+                pass # Column exists
+
+            # Migration: job action ('ingest' or 'delete', queued by the filesystem watcher)
+            try:
+                conn.execute("ALTER TABLE ingest_jobs ADD COLUMN action TEXT DEFAULT 'ingest'")
+            except sqlite3.OperationalError:
+                pass # Column exists
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ingest_jobs_path ON ingest_jobs (file_path, state)")
+
+            # 3c. Chunk ids stored in Chroma per file (content hashes: unchanged chunks are never re-embedded)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS vault_chunks (
+                    chunk_id TEXT PRIMARY KEY,
+                    file_path TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_vault_chunks_path ON vault_chunks (file_path)")
+
+            # 3d. Bulk directory ingest runs: per-file checkpoints, so an interrupted run resumes
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ingest_runs (
+                    run_id TEXT PRIMARY KEY,
+                    root TEXT,
+                    domain TEXT DEFAULT 'general',
+                    state TEXT DEFAULT 'running',
+                    files_total INTEGER DEFAULT 0,
+                    files_done INTEGER DEFAULT 0,
+                    chunks_done INTEGER DEFAULT 0,
+                    errors INTEGER DEFAULT 0,
+                    started_at TIMESTAMP,
+                    updated_at TIMESTAMP
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ingest_run_files (
+                    run_id TEXT,
+                    file_path TEXT,
+                    state TEXT DEFAULT 'pending',
+                    chunks INTEGER DEFAULT 0,
+                    PRIMARY KEY (run_id, file_path)
+                )
+            """)
+
+            # 3e. Chunk dedup: a signature per chunk; duplicates reference their canonical (embedded) chunk
+            #     and keep their own text/metadata so they can be promoted when it goes away
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS chunk_signatures (
+                    chunk_id TEXT PRIMARY KEY,
+                    file_path TEXT,
+                    content_hash TEXT,
+                    minhash BLOB,
+                    canonical_id TEXT,
+                    kind TEXT,
+                    content TEXT,
+                    metadata TEXT,
+                    token_count INTEGER
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_chunk_signatures_hash ON chunk_signatures (content_hash)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_chunk_signatures_canonical ON chunk_signatures (canonical_id)")
+            # MinHash LSH bands: chunks sharing a band key are near-duplicate candidates
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS chunk_bands (
+                    band INTEGER,
+                    chunk_id TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_chunk_bands_band ON chunk_bands (band)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_chunk_bands_chunk ON chunk_bands (chunk_id)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ingest_counters (
+                    name TEXT PRIMARY KEY,
+                    value REAL DEFAULT 0
+                )
+            """)
+
             # 4. FTS5 Virtual Table for Zero-Lag Hybrid RAG
             try:
                 conn.execute("""
@@ -84,8 +235,7 @@ class SovereignStateManager:
 
 
     @classmethod
-    def get_user_profile(cls) -> dict:
-
+    def _load_user_profile(cls) -> dict:
         with sqlite3.connect(cls.DB_PATH) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.execute("SELECT * FROM user_profile WHERE id = 1")
@@ -94,13 +244,59 @@ class SovereignStateManager:
                 return dict(row)
             return {}
 
+    @classmethod
+    def invalidate_profile_cache(cls):
+        with cls._profile_lock:
+            cls._profile_cache = None
+            cls._profile_version = None
+            cls._data_version = None
+            if cls._watch_conn is not None:
+                cls._watch_conn.close()
+            cls._watch_conn = None
+            cls._watch_path = None
+
+    @classmethod
+    def get_user_profile(cls) -> dict:
+        """
+        Cached profile. A hit costs one PRAGMA data_version on an open connection;
+        the profile is re-read only when its version changed (POST /v1/profile in any worker).
+        """
+        with cls._profile_lock:
+            try:
+                if cls._watch_path != cls.DB_PATH:
+                    if cls._watch_conn is not None:
+                        cls._watch_conn.close()
+                    cls._watch_conn = sqlite3.connect(cls.DB_PATH, check_same_thread=False)
+                    cls._watch_path = cls.DB_PATH
+                    cls._profile_cache = None
+
+                data_version = cls._watch_conn.execute("PRAGMA data_version").fetchone()[0]
+                if cls._profile_cache is not None and data_version == cls._data_version:
+                    return dict(cls._profile_cache)
+
+                # Something was committed elsewhere (usually chat messages): compare the profile version only
+                row = cls._watch_conn.execute("SELECT version FROM user_profile WHERE id = 1").fetchone()
+                version = row[0] if row else None
+                if cls._profile_cache is None or version != cls._profile_version:
+                    cls._profile_cache = cls._load_user_profile()
+                    cls._profile_version = version
+                cls._data_version = data_version
+                return dict(cls._profile_cache)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Profile cache bypassed: {e}")
+                cls._profile_cache = None
+                cls._watch_path = None
+        return cls._load_user_profile()
+
     @classmethod
     def update_user_profile(cls, name: str, role: str, interests: str, email: str = "contact@zyrabit.com", persona: str = 'general', preferred_model: str = 'qwen2.5:7b', tone: str = 'professional', assistant_name: str = 'Zyra'):
         with sqlite3.connect(cls.DB_PATH) as conn:
             conn.execute("""
-                INSERT OR REPLACE INTO user_profile (id, name, email, role, interests, persona, preferred_model, tone, assistant_name, onboarding_completed)
-                VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+                INSERT OR REPLACE INTO user_profile (id, name, email, role, interests, persona, preferred_model, tone, assistant_name, onboarding_completed, version)
+                VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?, 1, COALESCE((SELECT version FROM user_profile WHERE id = 1), 0) + 1)
             """, (name, email, role, interests, persona, preferred_model, tone, assistant_name))
+        with cls._profile_lock:
+            cls._profile_cache = None
 
 
 
@@ -118,35 +314,276 @@ class SovereignStateManager:
             logger.error(f"Error hashing file {file_path}: {e}")
             return ""
 
+    @staticmethod
+    def file_stat(file_path: str) -> tuple | None:
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    @classmethod
+    def vault_fingerprints(cls, file_paths: list | None = None) -> dict:
+        """
+        file_path -> (file_hash, mtime_ns, size_bytes, inode) for the whole index (one query per sync),
+        or only for `file_paths` (a watcher batch).
+        """
+        query = "SELECT file_path, file_hash, mtime_ns, size_bytes, inode FROM vault_index"
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            if file_paths is None:
+                return {row[0]: row[1:] for row in conn.execute(query)}
+            fingerprints = {}
+            for path in file_paths:
+                row = conn.execute(f"{query} WHERE file_path = ?", (path,)).fetchone()
+                if row:
+                    fingerprints[row[0]] = row[1:]
+            return fingerprints
+
     @classmethod
-    def needs_reindexing(cls, file_path: str) -> bool:
-        """Check if file hash has changed since last indexing."""
-        current_hash = cls.get_file_hash(file_path)
-        if not current_hash: return False
+    def matches_fingerprint(cls, file_path: str, indexed: dict) -> bool:
+        """Stat-only: True when the file is indexed and its mtime/size/inode did not move."""
+        row = indexed.get(file_path)
+        return bool(row and row[0]) and tuple(row[1:]) == cls.file_stat(file_path)
 
+    @classmethod
+    def check_file(cls, file_path: str, file_hash: str | None = None, indexed: dict | None = None, refresh: list | None = None) -> FileCheck:
+        """
+        Change check that only hashes when mtime/size/inode differ from the indexed ones.
+        `file_hash` (if the caller already has it) replaces reading the file;
+        `indexed` (from vault_fingerprints) replaces the per-file lookup;
+        `refresh` collects fingerprint updates for refresh_fingerprints instead of writing each one.
+        """
+        stat = cls.file_stat(file_path)
+        if stat is None:
+            return FileCheck(False, "", None)
+
+        if indexed is not None:
+            row = indexed.get(file_path)
+        else:
+            with sqlite3.connect(cls.DB_PATH) as conn:
+                row = conn.execute(
+                    "SELECT file_hash, mtime_ns, size_bytes, inode FROM vault_index WHERE file_path = ?", (file_path,)
+                ).fetchone()
+        if row and row[0] and tuple(row[1:]) == stat:
+            return FileCheck(False, row[0], stat)
+
+        current_hash = file_hash or cls.get_file_hash(file_path)
+        if not current_hash:
+            return FileCheck(False, "", stat)
+        if row and row[0] == current_hash:
+            # Touched or copied but identical: remember the new stat so the next check skips hashing
+            if refresh is not None:
+                refresh.append((file_path, stat))
+            else:
+                cls.refresh_fingerprints([(file_path, stat)])
+            return FileCheck(False, current_hash, stat)
+        return FileCheck(True, current_hash, stat)
+
+    @classmethod
+    def refresh_fingerprints(cls, entries: list):
+        """Stores new (file_path, stat) fingerprints of files whose content did not change."""
+        if not entries:
+            return
         with sqlite3.connect(cls.DB_PATH) as conn:
-            cursor = conn.execute("SELECT file_hash FROM vault_index WHERE file_path = ?", (file_path,))
-            row = cursor.fetchone()
-            if row and row[0] == current_hash:
-                return False
-        return True
+            conn.executemany(
+                "UPDATE vault_index SET mtime_ns = ?, size_bytes = ?, inode = ? WHERE file_path = ?",
+                [(*stat, file_path) for file_path, stat in entries]
+            )
+
+    @classmethod
+    def needs_reindexing(cls, file_path: str, file_hash: str | None = None) -> bool:
+        """Check if file content has changed since last indexing."""
+        return cls.check_file(file_path, file_hash).changed
+
+    @classmethod
+    def update_vault_index(cls, file_path: str, token_count: int, full_text_content: str = "", file_hash: str | None = None, stat: tuple | None = None):
+        """`file_hash`/`stat` come from check_file, so an ingest hashes each file at most once."""
+        cls.update_vault_index_batch([(file_path, token_count, full_text_content, file_hash, stat)])
 
     @classmethod
-    def update_vault_index(cls, file_path: str, token_count: int, full_text_content: str = ""):
-        current_hash = cls.get_file_hash(file_path)
+    def update_vault_index_batch(cls, entries: list, chunk_ids: dict | None = None):
+        """
+        Indexes (file_path, token_count, full_text, file_hash, stat) entries in one transaction.
+        `chunk_ids` (file_path -> ids now in the vector store) replaces each file's recorded chunks.
+        """
+        rows = []
+        for file_path, token_count, full_text_content, file_hash, stat in entries:
+            if stat is None:
+                stat = cls.file_stat(file_path) or (None, None, None)
+            rows.append((file_path, file_hash or cls.get_file_hash(file_path), token_count, full_text_content, stat))
+
+        now = datetime.now().isoformat()
         with sqlite3.connect(cls.DB_PATH) as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO vault_index (file_path, file_hash, token_count, last_indexed)
-                VALUES (?, ?, ?, ?)
-            """, (file_path, current_hash, token_count, datetime.now().isoformat()))
+            conn.executemany("""
+                INSERT OR REPLACE INTO vault_index (file_path, file_hash, token_count, last_indexed, mtime_ns, size_bytes, inode)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [(path, digest, count, now, *stat) for path, digest, count, _, stat in rows])
             
             # Sync to FTS5 for ultra-fast retrieval
-            if full_text_content:
+            for file_path, _, _, full_text_content, _ in rows:
+                if full_text_content:
+                    conn.execute("DELETE FROM fts_vault WHERE file_path = ?", (file_path,))
+                    conn.execute("""
+                        INSERT INTO fts_vault (file_path, content)
+                        VALUES (?, ?)
+                    """, (file_path, full_text_content))
+
+            for file_path, ids in (chunk_ids or {}).items():
+                conn.execute("DELETE FROM vault_chunks WHERE file_path = ?", (file_path,))
+                conn.executemany(
+                    "INSERT OR REPLACE INTO vault_chunks (chunk_id, file_path) VALUES (?, ?)", [(i, file_path) for i in ids]
+                )
+
+    @classmethod
+    def index_fts_part(cls, file_path: str, content: str, replace: bool = False):
+        """
+        Adds one part of a file streamed in parts to FTS5 (one row per part, so the
+        full text is never built). `replace` drops the rows of the previous version first.
+        """
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            if replace:
                 conn.execute("DELETE FROM fts_vault WHERE file_path = ?", (file_path,))
-                conn.execute("""
-                    INSERT INTO fts_vault (file_path, content)
-                    VALUES (?, ?)
-                """, (file_path, full_text_content))
+            if content:
+                conn.execute("INSERT INTO fts_vault (file_path, content) VALUES (?, ?)", (file_path, content))
+
+    @classmethod
+    def indexed_chunk_ids(cls, file_paths: list) -> dict:
+        """
+        file_path -> set of chunk ids in the vector store, for files indexed before.
+        None for files indexed before chunk ids were recorded (their chunks have random ids).
+        """
+        indexed = {}
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            for file_path in file_paths:
+                rows = conn.execute("""
+                    SELECT c.chunk_id FROM vault_index v
+                    LEFT JOIN vault_chunks c ON c.file_path = v.file_path
+                    WHERE v.file_path = ?
+                """, (file_path,)).fetchall()
+                if rows:
+                    ids = {row[0] for row in rows if row[0]}
+                    indexed[file_path] = ids or None
+        return indexed
+
+    @classmethod
+    def remove_from_vault_index(cls, file_paths: list) -> int:
+        """Forgets deleted files (vault_index, FTS5, chunk ids). Returns how many were indexed."""
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            removed = conn.executemany("DELETE FROM vault_index WHERE file_path = ?", [(p,) for p in file_paths]).rowcount
+            conn.executemany("DELETE FROM fts_vault WHERE file_path = ?", [(p,) for p in file_paths])
+            conn.executemany("DELETE FROM vault_chunks WHERE file_path = ?", [(p,) for p in file_paths])
+            return removed
+
+    @classmethod
+    def indexed_paths_under(cls, directory: str) -> list:
+        """Indexed files inside `directory` (a deleted or moved-away folder)."""
+        prefix = directory.rstrip(os.sep) + os.sep
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            rows = conn.execute(
+                "SELECT file_path FROM vault_index WHERE substr(file_path, 1, ?) = ?", (len(prefix), prefix)
+            )
+            return [row[0] for row in rows]
+
+    # --- Chunk dedup ---
+    @classmethod
+    def duplicate_candidates(cls, signatures: list, limit: int = 64) -> list:
+        """
+        For each (content_hash, band keys) signature, the canonical chunks with the same hash
+        or sharing a MinHash band, exact matches first: [(chunk_id, content_hash, minhash)].
+        """
+        candidates = []
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            for content_hash, bands in signatures:
+                candidates.append(conn.execute(f"""
+                    SELECT chunk_id, content_hash, minhash FROM chunk_signatures
+                    WHERE canonical_id IS NULL AND (
+                        content_hash = ?
+                        OR chunk_id IN (SELECT chunk_id FROM chunk_bands WHERE band IN ({",".join("?" * len(bands)) or "NULL"}))
+                    )
+                    ORDER BY content_hash = ? DESC LIMIT ?
+                """, (content_hash, *bands, content_hash, limit)).fetchall())
+        return candidates
+
+    @classmethod
+    def chunk_references(cls, canonical_ids: list) -> list:
+        """References to the given canonical chunks, oldest first, with their text and metadata."""
+        references = []
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            conn.row_factory = sqlite3.Row
+            for canonical_id in canonical_ids:
+                rows = conn.execute(
+                    "SELECT * FROM chunk_signatures WHERE canonical_id = ? ORDER BY rowid", (canonical_id,)
+                ).fetchall()
+                for row in rows:
+                    reference = dict(row)
+                    reference["metadata"] = json.loads(reference["metadata"] or "{}")
+                    references.append(reference)
+        return references
+
+    @classmethod
+    def commit_chunk_dedup(cls, removed: list, promoted: list, repointed: list, signatures: list, bands: list = (),
+                           embedded_chunks: int = 0, embed_seconds: float = 0.0):
+        """
+        Applies a dedup plan once its vectors are stored: drops removed chunks, turns promoted
+        references into canonical chunks, repoints the rest, records the new signatures and
+        adds to the embedding counters the dedup report prices saved chunks with.
+        """
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            conn.executemany("DELETE FROM chunk_signatures WHERE chunk_id = ?", [(i,) for i in removed])
+            conn.executemany("DELETE FROM chunk_bands WHERE chunk_id = ?", [(i,) for i in removed])
+            conn.executemany("""
+                UPDATE chunk_signatures SET canonical_id = NULL, kind = NULL, content = NULL, metadata = NULL
+                WHERE chunk_id = ?
+            """, [(i,) for i in promoted])
+            conn.executemany(
+                "UPDATE chunk_signatures SET canonical_id = ? WHERE chunk_id = ?", [(new, i) for i, new in repointed]
+            )
+            conn.executemany("""
+                INSERT OR REPLACE INTO chunk_signatures
+                    (chunk_id, file_path, content_hash, minhash, canonical_id, kind, content, metadata, token_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, signatures)
+            conn.executemany("DELETE FROM chunk_bands WHERE chunk_id = ?", [(row[0],) for row in signatures])
+            conn.executemany("INSERT INTO chunk_bands (band, chunk_id) VALUES (?, ?)", bands)
+            if embedded_chunks:
+                conn.executemany("""
+                    INSERT INTO ingest_counters (name, value) VALUES (?, ?)
+                    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value
+                """, [("embedded_chunks", embedded_chunks), ("embed_seconds", embed_seconds)])
+
+    @classmethod
+    def duplicate_sources(cls, canonical_ids: list) -> dict:
+        """canonical chunk id -> files holding a duplicate of it."""
+        sources = {}
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            for canonical_id in canonical_ids:
+                rows = conn.execute(
+                    "SELECT DISTINCT file_path FROM chunk_signatures WHERE canonical_id = ?", (canonical_id,)
+                ).fetchall()
+                if rows:
+                    sources[canonical_id] = sorted(row[0] for row in rows)
+        return sources
+
+    @classmethod
+    def dedup_stats(cls) -> dict:
+        """References by kind with the tokens/text they did not embed, canonical chunks and embedding counters."""
+        stats = {"exact": 0, "near": 0, "tokens_saved": 0, "text_bytes_saved": 0}
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            rows = conn.execute("""
+                SELECT kind, COUNT(*), COALESCE(SUM(token_count), 0), COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0)
+                FROM chunk_signatures WHERE canonical_id IS NOT NULL GROUP BY kind
+            """)
+            for kind, count, tokens, size in rows:
+                stats[kind] = count
+                stats["tokens_saved"] += tokens
+                stats["text_bytes_saved"] += size
+            stats["canonical"] = conn.execute(
+                "SELECT COUNT(*) FROM chunk_signatures WHERE canonical_id IS NULL"
+            ).fetchone()[0]
+            counters = dict(conn.execute("SELECT name, value FROM ingest_counters"))
+        stats["embedded_chunks"] = int(counters.get("embedded_chunks", 0))
+        stats["embed_seconds"] = round(counters.get("embed_seconds", 0.0), 3)
+        return stats
 
     @classmethod
     def search_fts(cls, query: str, limit: int = 3) -> list:
@@ -176,12 +613,12 @@ class SovereignStateManager:
 
 
     @classmethod
-    def store_message(cls, session_id: str, role: str, content: str):
+    def store_message(cls, session_id: str, role: str, content: str, token_count: int | None = None, tokenizer: str | None = None):
         with sqlite3.connect(cls.DB_PATH) as conn:
             conn.execute("""
-                INSERT INTO conversation_memory (session_id, role, content, timestamp)
-                VALUES (?, ?, ?, ?)
-            """, (session_id, role, content, datetime.now().isoformat()))
+                INSERT INTO conversation_memory (session_id, role, content, timestamp, token_count, tokenizer)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (session_id, role, content, datetime.now().isoformat(), token_count, tokenizer))
 
             
             # FIFO: Clean old messages (keep last 50 per session for safety)
@@ -195,15 +632,31 @@ class SovereignStateManager:
             """, (session_id, session_id))
 
     @classmethod
-    def get_history(cls, session_id: str, limit: int = 10):
+    def get_history(cls, session_id: str, limit: int = 10, after_id: int = 0):
+        """Last `limit` messages; `after_id` skips turns already folded into the rolling summary."""
         with sqlite3.connect(cls.DB_PATH) as conn:
             cursor = conn.execute("""
-                SELECT role, content FROM conversation_memory 
-                WHERE session_id = ? 
+                SELECT role, content, token_count, tokenizer, id FROM conversation_memory 
+                WHERE session_id = ? AND id > ?
                 ORDER BY id DESC LIMIT ?
-            """, (session_id, limit))
+            """, (session_id, after_id, limit))
             # Reverse to get chronological order
-            return [{"role": r[0], "content": r[1]} for r in cursor.fetchall()][::-1]
+            return [{"role": r[0], "content": r[1], "token_count": r[2], "tokenizer": r[3], "id": r[4]} for r in cursor.fetchall()][::-1]
+
+    @classmethod
+    def get_summary(cls, session_id: str) -> dict:
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM conversation_summary WHERE session_id = ?", (session_id,)).fetchone()
+            return dict(row) if row else {}
+
+    @classmethod
+    def save_summary(cls, session_id: str, summary: str, last_message_id: int):
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO conversation_summary (session_id, summary, last_message_id, updated_at)
+                VALUES (?, ?, ?, ?)
+            """, (session_id, summary, last_message_id, datetime.now().isoformat()))
 
     @classmethod
     def get_stats(cls) -> dict:
@@ -222,10 +675,164 @@ class SovereignStateManager:
                 "db_path": cls.DB_PATH
             }
 
+    # --- Ingestion job queue ---
+    @staticmethod
+    def _ingest_job(row) -> dict:
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job.get("result") else None
+        return job
+
+    @classmethod
+    def enqueue_ingest_job(cls, file_path: str, filename: str, domain: str = "general", max_attempts: int = 3, file_hash: str | None = None, action: str = "ingest") -> dict:
+        """
+        Queues a job, or coalesces into the job already queued for the same file (latest action wins).
+        Coalesced jobs come back with "coalesced": True.
+        """
+        now = datetime.now().isoformat()
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            row = conn.execute("""
+                UPDATE ingest_jobs SET action = ?, domain = ?, file_hash = ?, updated_at = ?
+                WHERE job_id = (SELECT job_id FROM ingest_jobs WHERE file_path = ? AND state = 'queued' LIMIT 1)
+                RETURNING job_id
+            """, (action, domain, file_hash, now, file_path)).fetchone()
+            if row:
+                return dict(cls.get_ingest_job(row[0]), coalesced=True)
+
+            job_id = str(uuid.uuid4())
+            conn.execute("""
+                INSERT INTO ingest_jobs (job_id, file_path, filename, domain, state, attempts, max_attempts, next_attempt_at, created_at, updated_at, file_hash, action)
+                VALUES (?, ?, ?, ?, 'queued', 0, ?, 0, ?, ?, ?, ?)
+            """, (job_id, file_path, filename, domain, max_attempts, now, now, file_hash, action))
+        return cls.get_ingest_job(job_id)
+
+    @classmethod
+    def claim_ingest_job(cls) -> dict | None:
+        """
+        Moves the oldest due job to 'extracting' in a single statement, so concurrent workers never share one.
+        Jobs whose file is already being processed wait, so one file is never ingested/deleted concurrently.
+        """
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("""
+                UPDATE ingest_jobs SET state = 'extracting', attempts = attempts + 1, error = NULL, updated_at = ?
+                WHERE job_id = (
+                    SELECT job_id FROM ingest_jobs AS queued
+                    WHERE state = 'queued' AND next_attempt_at <= ?
+                      AND NOT EXISTS (
+                          SELECT 1 FROM ingest_jobs AS running
+                          WHERE running.file_path = queued.file_path AND running.state IN ('extracting', 'embedding')
+                      )
+                    ORDER BY created_at LIMIT 1
+                )
+                RETURNING *
+            """, (datetime.now().isoformat(), time.time())).fetchone()
+            return cls._ingest_job(row) if row else None
+
+    @classmethod
+    def update_ingest_job(cls, job_id: str, state: str, error: str | None = None, result: dict | None = None, next_attempt_at: float = 0) -> dict:
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            conn.execute("""
+                UPDATE ingest_jobs SET state = ?, error = ?, result = ?, next_attempt_at = ?, updated_at = ?
+                WHERE job_id = ?
+            """, (state, error, json.dumps(result) if result is not None else None, next_attempt_at, datetime.now().isoformat(), job_id))
+        return cls.get_ingest_job(job_id)
+
+    @classmethod
+    def get_ingest_job(cls, job_id: str) -> dict | None:
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM ingest_jobs WHERE job_id = ?", (job_id,)).fetchone()
+            return cls._ingest_job(row) if row else None
+
+    @classmethod
+    def requeue_stale_ingest_jobs(cls) -> int:
+        """Jobs interrupted mid-stage by a restart go back to the queue. Returns the pending job count."""
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            stale = conn.execute(
+                "UPDATE ingest_jobs SET state = 'queued', updated_at = ? WHERE state IN ('extracting', 'embedding')",
+                (datetime.now().isoformat(),)
+            ).rowcount
+            if stale:
+                logger.info(f"♻️ Requeued {stale} interrupted ingestion jobs.")
+            return conn.execute("SELECT COUNT(*) FROM ingest_jobs WHERE state = 'queued'").fetchone()[0]
+
+    @classmethod
+    def open_ingest_run(cls, root: str, domain: str = "general") -> dict:
+        """The unfinished run for this directory (resumed), or a new one."""
+        now = datetime.now().isoformat()
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            row = conn.execute(
+                "SELECT run_id FROM ingest_runs WHERE root = ? AND domain = ? AND state != 'done' ORDER BY started_at DESC LIMIT 1",
+                (root, domain),
+            ).fetchone()
+            if row:
+                run_id = row[0]
+                conn.execute("UPDATE ingest_runs SET state = 'running', updated_at = ? WHERE run_id = ?", (now, run_id))
+            else:
+                run_id = str(uuid.uuid4())
+                conn.execute(
+                    "INSERT INTO ingest_runs (run_id, root, domain, state, started_at, updated_at) VALUES (?, ?, ?, 'running', ?, ?)",
+                    (run_id, root, domain, now, now),
+                )
+        return cls.get_ingest_run(run_id)
+
+    @classmethod
+    def add_ingest_run_files(cls, run_id: str, file_paths: list) -> int:
+        """Registers discovered files (already known ones keep their state). Returns the run's file total."""
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO ingest_run_files (run_id, file_path) VALUES (?, ?)", [(run_id, p) for p in file_paths]
+            )
+            total = conn.execute("SELECT COUNT(*) FROM ingest_run_files WHERE run_id = ?", (run_id,)).fetchone()[0]
+            conn.execute("UPDATE ingest_runs SET files_total = ? WHERE run_id = ?", (total, run_id))
+            return total
+
+    @classmethod
+    def pending_ingest_run_files(cls, run_id: str) -> list:
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            rows = conn.execute(
+                "SELECT file_path FROM ingest_run_files WHERE run_id = ? AND state = 'pending' ORDER BY file_path", (run_id,)
+            )
+            return [row[0] for row in rows]
+
+    @classmethod
+    def checkpoint_ingest_run(cls, run_id: str, files: list) -> dict:
+        """Records (file_path, state, chunks) outcomes and the run totals in one transaction."""
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            conn.executemany(
+                "UPDATE ingest_run_files SET state = ?, chunks = ? WHERE run_id = ? AND file_path = ?",
+                [(state, chunks, run_id, path) for path, state, chunks in files],
+            )
+            conn.execute("""
+                UPDATE ingest_runs SET
+                    files_done = (SELECT COUNT(*) FROM ingest_run_files WHERE run_id = ? AND state != 'pending'),
+                    chunks_done = (SELECT COALESCE(SUM(chunks), 0) FROM ingest_run_files WHERE run_id = ?),
+                    errors = (SELECT COUNT(*) FROM ingest_run_files WHERE run_id = ? AND state = 'failed'),
+                    updated_at = ?
+                WHERE run_id = ?
+            """, (run_id, run_id, run_id, datetime.now().isoformat(), run_id))
+        return cls.get_ingest_run(run_id)
+
+    @classmethod
+    def finish_ingest_run(cls, run_id: str, state: str) -> dict:
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            conn.execute(
+                "UPDATE ingest_runs SET state = ?, updated_at = ? WHERE run_id = ?", (state, datetime.now().isoformat(), run_id)
+            )
+        return cls.get_ingest_run(run_id)
+
+    @classmethod
+    def get_ingest_run(cls, run_id: str) -> dict | None:
+        with sqlite3.connect(cls.DB_PATH) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM ingest_runs WHERE run_id = ?", (run_id,)).fetchone()
+            return dict(row) if row else None
+
     @classmethod
     def clear_session(cls, session_id: str):
         """Resets the conversation memory for a session."""
         with sqlite3.connect(cls.DB_PATH) as conn:
             conn.execute("DELETE FROM conversation_memory WHERE session_id = ?", (session_id,))
+            conn.execute("DELETE FROM conversation_summary WHERE session_id = ?", (session_id,))
             logger.info(f"🧹 Session {session_id} cleared from Sovereign State.")
 
@@ -0,0 +1,134 @@
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Optional
+from app.infrastructure.shared.config import (
+    PROJECT_NAME,
+    TRACING_ENABLED,
+    TRACING_EXPORTER,
+    TRACING_FILE,
+    TRACING_SAMPLE_RATIO,
+)
+
+logger = logging.getLogger("zyrabit.api")
+
+# --- Optional request tracing (OpenTelemetry) ---
+# Spans are no-ops until setup_tracing() installs a provider. Sampling is decided
+# once per root span (ParentBased + TraceIdRatioBased), so unsampled requests only
+# pay for a non-recording span. Context lives in contextvars: asyncio tasks and
+# asyncio.to_thread inherit it; work scheduled elsewhere (FastAPI BackgroundTasks)
+# passes capture_context() explicitly.
+
+try:
+    from opentelemetry import context as otel_context
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor, SpanExporter, SpanExportResult
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+    SpanExporter = object
+
+_tracer = None
+_provider = None
+
+
+class JsonlFileSpanExporter(SpanExporter):
+    """Appends finished spans as JSON lines, for offline inspection without a collector."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        lines = [json.dumps(json.loads(s.to_json(indent=None)), ensure_ascii=False) + "\n" for s in spans]
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(lines)
+        except OSError as e:
+            logger.warning(f"⚠️ Trace export failed ({self.path}): {e}")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+def _build_exporter(kind: str):
+    if kind == "otlp":
+        # Endpoint/headers come from the standard OTEL_EXPORTER_OTLP_* variables
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    if kind == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        return ConsoleSpanExporter()
+    return JsonlFileSpanExporter(TRACING_FILE)
+
+
+def setup_tracing(enabled: bool = TRACING_ENABLED, exporter=None, sample_ratio: float = TRACING_SAMPLE_RATIO, batch: bool = True) -> bool:
+    """Installs the tracer provider. Returns False (spans stay no-ops) when disabled or unavailable."""
+    global _tracer, _provider
+    if not enabled:
+        return False
+    if not OTEL_AVAILABLE:
+        logger.warning("⚠️ Tracing requested but opentelemetry-sdk is not installed.")
+        return False
+
+    try:
+        exporter = exporter or _build_exporter(TRACING_EXPORTER)
+    except Exception as e:
+        logger.warning(f"⚠️ Tracing disabled, exporter '{TRACING_EXPORTER}' unavailable: {e}")
+        return False
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": PROJECT_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(sample_ratio)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter) if batch else SimpleSpanProcessor(exporter))
+    _provider = provider
+    _tracer = provider.get_tracer("zyrabit")
+    logger.info(f"🔭 Tracing active: exporter={type(exporter).__name__}, sample_ratio={sample_ratio}")
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Flushes pending spans and turns spans back into no-ops."""
+    global _tracer, _provider
+    if _provider is not None:
+        _provider.shutdown()
+    _provider = None
+    _tracer = None
+
+
+def capture_context() -> Optional[Any]:
+    """Current trace context, to parent spans of work that runs outside this task."""
+    if _tracer is None:
+        return None
+    return otel_context.get_current()
+
+
+@contextmanager
+def span(name: str, parent: Optional[Any] = None, **attributes):
+    """
+    Starts a span as the current one. Attributes are only set when the span is
+    sampled; None values are skipped. Yields None when tracing is off.
+    """
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name, context=parent) as current:
+        if attributes and current.is_recording():
+            current.set_attributes({k: v for k, v in attributes.items() if v is not None})
+        yield current
+
+
+def set_attributes(**attributes) -> None:
+    """Adds attributes to the current span (model, tokens, rag hits, cache hit...)."""
+    if _tracer is None:
+        return
+    current = trace.get_current_span()
+    if current.is_recording():
+        current.set_attributes({k: v for k, v in attributes.items() if v is not None})
@@ -1,10 +1,10 @@
 import os
 import logging
 from typing import Optional
+from app.infrastructure.shared.config import MAX_FILE_SIZE_MB
 
 logger = logging.getLogger("zyrabit.api")
 
-MAX_FILE_SIZE_MB = 50
 MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
 
 class IngestionValidator:
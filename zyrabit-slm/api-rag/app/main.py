@@ -14,11 +14,17 @@ from prometheus_fastapi_instrumentator import Instrumentator
 # Infrastructure / Shared
 from app.infrastructure.shared.config import (
     PROJECT_NAME, API_V1_STR, SLM_URL, 
-    RAG_COLLECTION, EMBEDDING_MODEL, DB_HOST, DB_PORT
+    RAG_COLLECTION, EMBEDDING_MODEL, MODEL_NAME, DB_HOST, DB_PORT,
+    SEMANTIC_ROUTER_ENABLED, SEMANTIC_ROUTER_MIN_SIMILARITY,
+    SUMMARY_ENABLED, SUMMARY_MIN_NEW_MESSAGES, SUMMARY_KEEP_RECENT,
+    METRICS_REFRESH_SECONDS, LOOP_MONITOR_ENABLED, WATCHER_ENABLED
 )
 from app.infrastructure.shared.logger import setup_logging
 from app.infrastructure.shared.state_tracker import SovereignStateManager
 from app.infrastructure.shared.cache import global_cache
+from app.infrastructure.shared import tracing
+from app.infrastructure.shared import metrics
+from app.infrastructure.shared.loop_monitor import LoopLagMonitor
 
 # Domain Layer
 from app.domain.services.gatekeeper import Gatekeeper
@@ -26,11 +32,19 @@ from app.domain.use_cases.chat_use_case import ChatUseCase
 from app.domain.use_cases.ingest_use_case import IngestUseCase
 from app.domain.services.mcp_service import mcp
 from app.domain.services.command_router import CommandRouter
+from app.domain.services.semantic_router import SemanticRouter
+from app.domain.services.conversation_summarizer import ConversationSummarizer
+from app.domain.services.ingest_queue import IngestJobQueue
+from app.domain.services.vault_watcher import VaultWatcher
+from app.domain.services.context_manager import ContextManager
+from app.domain.services.keyword_router import keyword_router
 
 
 # Infrastructure Adapters
 from app.infrastructure.persistence.chroma_adapter import ChromaAdapter, DirectOllamaEmbeddings
+from app.infrastructure.persistence.pdf_processor import shutdown_pdf_pool
 from app.infrastructure.inference.ollama_inference_adapter import OllamaInferenceAdapter
+from app.infrastructure.inference.tokenizer_registry import tokenizer_registry
 from app.domain.services.retriever_service import HybridRetrieverService
 # pyrefly: ignore [missing-import]
 from langchain_chroma import Chroma
@@ -64,12 +78,25 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Failed to initialize Sovereign State: {e}")
 
+    # 0b. Request tracing (no-op unless TRACING_ENABLED)
+    tracing.setup_tracing()
+
+    # 0c. Event loop lag histogram (+ blocking-call stacks with LOOP_BLOCK_DEBUG)
+    loop_monitor = LoopLagMonitor() if LOOP_MONITOR_ENABLED else None
+    if loop_monitor:
+        loop_monitor.start()
+        app.state.loop_monitor = loop_monitor
 
     logger.info("🚀 Zyrabit SLM API Starting...")
     
     if os.getenv("TESTING") == "true":
         logger.info("🧪 Test Mode: Skipping heavy infrastructure initialization.")
         yield
+        await _stop_summarizer(app)
+        await _stop_bulk_ingests(app)
+        await _stop_ingest_queue(app)
+        if loop_monitor:
+            await loop_monitor.stop()
         return
 
     try:
@@ -94,14 +121,44 @@ async def lifespan(app: FastAPI):
         # 4. Inference Provider
         app.state.inference_provider = OllamaInferenceAdapter(endpoint=f"{SLM_URL}/api/generate")
         
+        # 4b. Semantic Router (centroids embedded once; keyword routing if unavailable)
+        semantic_router = None
+        if SEMANTIC_ROUTER_ENABLED:
+            semantic_router = SemanticRouter(embeddings, min_similarity=SEMANTIC_ROUTER_MIN_SIMILARITY)
+            try:
+                await asyncio.to_thread(semantic_router.fit)
+            except Exception as e:
+                logger.warning(f"⚠️ Semantic Router disabled (centroids unavailable): {e}")
+                semantic_router = None
+        app.state.semantic_router = semantic_router
+
+        # 4c. Context window of the default model (Ollama /api/show), resolved off the event loop
+        window = await asyncio.to_thread(tokenizer_registry.context_window, MODEL_NAME)
+        logger.info(f"🔤 Context window for {MODEL_NAME}: {window} tokens")
+
         # 5. Use Cases (Singletons for the session)
         app.state.chat_use_case = ChatUseCase(
             inference_provider=app.state.inference_provider,
             retriever_service=app.state.retriever_service,
             gatekeeper=Gatekeeper,
-            cache=global_cache
+            cache=global_cache,
+            semantic_router=semantic_router,
+            summarizer=ConversationSummarizer(
+                app.state.inference_provider,
+                min_new_messages=SUMMARY_MIN_NEW_MESSAGES,
+                keep_recent=SUMMARY_KEEP_RECENT
+            ) if SUMMARY_ENABLED else None
         )
         app.state.ingest_use_case = IngestUseCase(vector_store=app.state.vector_store)
+
+        # 5b. Persistent ingestion queue (resumes jobs interrupted by the last shutdown)
+        app.state.ingest_queue = IngestJobQueue(app.state.ingest_use_case, sio=sio)
+        app.state.ingest_queue.start()
+
+        # 5c. Filesystem watcher: changed/deleted files in DOCS_DIR and the vault go to the queue
+        if WATCHER_ENABLED:
+            app.state.vault_watcher = VaultWatcher(app.state.ingest_queue)
+            app.state.vault_watcher.start()
         
         # 6. MCP is self-contained in FastMCP
         
@@ -118,6 +175,14 @@ async def lifespan(app: FastAPI):
         # 9. Start Obsidian AutoLearner Background Task (Every 10 minutes)
         from app.domain.services.obsidian_service import ObsidianService
         asyncio.create_task(ObsidianService.start_auto_learner_loop(app.state.inference_provider, interval_seconds=600))
+
+        # 10. Cache-size gauges (sampled, not updated on every cache access)
+        metrics.register_cache("idempotency", lambda: len(global_cache))
+        metrics.register_cache("query_embeddings", embeddings.cached_entries)
+        metrics.register_cache("keyword_routes", keyword_router.cached_entries)
+        metrics.register_cache("token_counts", lambda: ContextManager.cached_entries()["token_counts"])
+        metrics.register_cache("prompt_headers", lambda: ContextManager.cached_entries()["prompt_headers"])
+        asyncio.create_task(metrics.start_cache_gauge_loop(METRICS_REFRESH_SECONDS))
         
         logger.info("✅ Infrastructure initialized successfully.")
 
@@ -129,8 +194,37 @@ async def lifespan(app: FastAPI):
     # Cleanup
     if hasattr(app.state, 'tg_worker'):
         app.state.tg_worker.stop()
+    if hasattr(app.state, 'vault_watcher'):
+        await app.state.vault_watcher.stop()
+    await _stop_summarizer(app)
+    await _stop_bulk_ingests(app)
+    await _stop_ingest_queue(app)
+    if loop_monitor:
+        await loop_monitor.stop()
+    shutdown_pdf_pool()
+    tracing.shutdown_tracing()
+    metrics.mark_process_dead()
     logger.info("🛑 Zyrabit SLM API Shutting down...")
 
+async def _stop_summarizer(app: FastAPI):
+    chat_use_case = getattr(app.state, 'chat_use_case', None)
+    summarizer = getattr(chat_use_case, 'summarizer', None)
+    if summarizer is not None:
+        await summarizer.stop()
+
+async def _stop_bulk_ingests(app: FastAPI):
+    # Interrupted runs keep their checkpoints: posting the directory again resumes them
+    tasks = [runner.task for runner in getattr(app.state, 'bulk_ingests', {}).values() if runner.task]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+async def _stop_ingest_queue(app: FastAPI):
+    queue = getattr(app.state, 'ingest_queue', None)
+    if queue is not None:
+        await queue.stop()
+        del app.state.ingest_queue
+
 app = FastAPI(title=PROJECT_NAME, version="1.7.5", lifespan=lifespan)
 
 # Mount Socket.io
@@ -159,15 +253,18 @@ async def chat_message(sid, data):
     logger.info(f"💬 Socket RAG Query from {sid}: {text[:30]}...")
     
     try:
-        # 1. COMMAND INTERCEPTION (Zero-Lag)
-        command_res = await CommandRouter.handle(text, source="WEB", session_id=sid)
-        if command_res:
-            await sio.emit("chat_response", command_res, to=sid)
-            return
-
-        # 2. RAG BRAIN EXECUTION
-        result = await _global_app.state.chat_use_case.execute(text=text, client_msg_id=msg_id)
-        await sio.emit("chat_response", result, to=sid)
+        with tracing.span("socket.chat_message", source="WEB", **{"message.length": len(text)}):
+            # 1. COMMAND INTERCEPTION (Zero-Lag)
+            with tracing.span("command_router.handle"):
+                command_res = await CommandRouter.handle(text, source="WEB", session_id=sid)
+            if command_res:
+                tracing.set_attributes(command=command_res.get("metadata", {}).get("command"))
+                await sio.emit("chat_response", command_res, to=sid)
+                return
+
+            # 2. RAG BRAIN EXECUTION
+            result = await _global_app.state.chat_use_case.execute(text=text, client_msg_id=msg_id)
+            await sio.emit("chat_response", result, to=sid)
     except Exception as e:
         logger.error(f"❌ Socket RAG Error: {e}")
         await sio.emit("chat_response", {"response": "I encountered an error processing your request."}, to=sid)
@@ -189,12 +286,13 @@ app.add_middleware(
 Instrumentator().instrument(app).expose(app)
 
 # Register Routers
-from app.api.v1.endpoints import chat, health, mcp, documents, integrations
+from app.api.v1.endpoints import chat, health, mcp, documents, integrations, debug
 app.include_router(chat.router, prefix=API_V1_STR, tags=["Chat"])
 app.include_router(health.router, prefix=API_V1_STR, tags=["Monitoring"])
 app.include_router(mcp.router, prefix="/mcp", tags=["MCP"])
 app.include_router(documents.router, prefix=API_V1_STR, tags=["Documents"])
 app.include_router(integrations.router, prefix=API_V1_STR, tags=["Integrations"])
+app.include_router(debug.router, prefix=API_V1_STR, tags=["Debug"])
 
 @app.get("/", include_in_schema=False)
 async def root():
@@ -31,6 +31,9 @@ class InferenceResult:
     latency_seconds: float
     provider: str
     raw_payload: Dict[str, Any] = field(default_factory=dict)
+    # Exact token counts when the provider reports them (None otherwise)
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
 
 
 class InferenceProviderPort(ABC):
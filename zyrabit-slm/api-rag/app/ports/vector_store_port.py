@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 class VectorStorePort(ABC):
     """
@@ -18,8 +18,8 @@ class VectorStorePort(ABC):
         pass
 
     @abstractmethod
-    def delete(self, where: Dict[str, Any]) -> None:
-        """Delete documents from the vector store."""
+    def delete(self, where: Optional[Dict[str, Any]] = None, ids: Optional[List[str]] = None) -> None:
+        """Delete documents from the vector store (by metadata filter and/or ids)."""
         pass
 
     @abstractmethod
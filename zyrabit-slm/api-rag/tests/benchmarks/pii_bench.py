@@ -0,0 +1,258 @@
+"""
+PII pipeline micro-benchmarks.
+
+Measures detect_all / anonymize / deanonymize_text / is_luhn_valid over
+realistic corpora and compares against a stored baseline.
+
+Throughput is also reported normalized by a fixed pure-Python calibration
+loop, so a baseline recorded on one machine stays meaningful on another.
+
+Usage (from zyrabit-slm/api-rag):
+    python -m tests.benchmarks.pii_bench                    # run + compare
+    python -m tests.benchmarks.pii_bench --save-baseline --runs 3   # refresh baseline
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from app.core.security.pii_pipeline import (
+    _DEFAULT_ENGINE,
+    anonymize_text,
+    deanonymize_text,
+    is_luhn_valid,
+)
+
+BENCH_DIR = Path(__file__).parent
+BASELINE_PATH = Path(os.getenv("ZYRABIT_BENCH_BASELINE", BENCH_DIR / "baselines" / "pii_pipeline.json"))
+RESULTS_PATH = Path(os.getenv("ZYRABIT_BENCH_OUTPUT", BENCH_DIR / "results" / "pii_pipeline.json"))
+MAX_REGRESSION_PCT = float(os.getenv("ZYRABIT_BENCH_MAX_REGRESSION_PCT", "25"))
+
+_WORDS = (
+    "el sistema soberano procesa notas del vault y responde con contexto local "
+    "the sovereign pipeline keeps every request on premise with hybrid retrieval "
+    "arquitectura infraestructura docker ollama reunion proyecto cliente entrega"
+).split()
+
+
+# --- Corpora ---
+
+def _luhn_complete(payload: str) -> str:
+    for d in "0123456789":
+        if is_luhn_valid(payload + d):
+            return payload + d
+    raise ValueError(payload)
+
+
+def _luhn_break(number: str) -> str:
+    return number[:-1] + str((int(number[-1]) + 1) % 10)
+
+
+def build_corpora(seed: int = 1337) -> Dict[str, List[str]]:
+    rng = random.Random(seed)
+
+    def sentence(n: int) -> str:
+        return " ".join(rng.choice(_WORDS) for _ in range(n)) + "."
+
+    clean = [sentence(rng.randint(8, 30)) for _ in range(200)]
+
+    dense = []
+    for i in range(200):
+        card = _luhn_complete("4" + "".join(rng.choice("0123456789") for _ in range(14)))
+        dense.append(
+            f"Cliente John Doe (user{i}@example.com) pagó ${rng.randint(1, 999)},{rng.randint(100, 999)}.00 "
+            f"con la tarjeta {card[:4]} {card[4:8]} {card[8:12]} {card[12:]}; "
+            f"llamar al 415-555-{rng.randint(1000, 9999)}, SSN 123-45-{rng.randint(1000, 9999)}."
+        )
+
+    # Adversarial: 13-19 digit runs with separators that fail the Luhn check
+    near_miss = []
+    for _ in range(200):
+        broken = _luhn_break(_luhn_complete("5" + "".join(rng.choice("0123456789") for _ in range(14))))
+        order = _luhn_break(_luhn_complete(str(rng.randint(10**11, 10**12 - 1))))
+        near_miss.append(f"ref {broken[:4]}-{broken[4:8]}-{broken[8:12]}-{broken[12:]} pedido {order}")
+
+    long_docs = []
+    for _ in range(5):
+        parts = []
+        for j in range(400):
+            parts.append(sentence(rng.randint(10, 25)))
+            if j % 40 == 0:
+                parts.append(f"Contacto: alice{j}@zyrabit.com, Alice Smith, $1,{rng.randint(100, 999)}.50")
+        long_docs.append("\n".join(parts))
+
+    return {"clean": clean, "pii_dense": dense, "near_miss_cards": near_miss, "long_document": long_docs}
+
+
+# --- Harness ---
+
+def _calibrate(min_time: float) -> float:
+    """Ops/sec of a fixed pure-Python workload (machine speed reference)."""
+    def work():
+        total = 0
+        for i in range(2000):
+            total += i * i % 7
+        return total
+    return _measure(work, 1, min_time)
+
+
+def _measure(fn: Callable[[], object], items: int, min_time: float, rounds: int = 5) -> float:
+    """Best-of-N items/sec; each round repeats fn until min_time has elapsed."""
+    best = 0.0
+    for _ in range(rounds):
+        loops = 0
+        start = time.perf_counter()
+        while True:
+            fn()
+            loops += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = max(best, loops * items / elapsed)
+    return best
+
+
+def build_cases(corpora: Dict[str, List[str]]) -> Dict[str, tuple]:
+    """case name -> (callable over the whole corpus, item count, total chars)"""
+    cases = {}
+    for name, texts in corpora.items():
+        chars = sum(len(t) for t in texts)
+        anonymized = [anonymize_text(t) for t in texts]
+        cases[f"detect_all/{name}"] = (lambda texts=texts: [_DEFAULT_ENGINE.detect_all(t) for t in texts], len(texts), chars)
+        cases[f"anonymize/{name}"] = (lambda texts=texts: [anonymize_text(t) for t in texts], len(texts), chars)
+        cases[f"deanonymize/{name}"] = (
+            lambda a=anonymized: [deanonymize_text(r.sanitized_text, r.token_map) for r in a],
+            len(texts),
+            sum(len(r.sanitized_text) for r in anonymized),
+        )
+
+    card_pattern = next(d.pattern for d in _DEFAULT_ENGINE.detectors if d.label == "card")
+    card_numbers = [
+        m.group()
+        for t in corpora["pii_dense"] + corpora["near_miss_cards"]
+        for m in card_pattern.finditer(t)
+    ]
+    cases["is_luhn_valid/candidates"] = (lambda c=card_numbers: [is_luhn_valid(x) for x in c], len(card_numbers), 0)
+    return cases
+
+
+def run_suite(min_time: float = 0.2, only: str = "", names: List[str] = None, cases: Dict[str, tuple] = None) -> Dict[str, object]:
+    if cases is None:
+        cases = build_cases(build_corpora())
+    results = {}
+    calibrations = []
+    for name, (fn, items, chars) in cases.items():
+        if (only and only not in name) or (names is not None and name not in names):
+            continue
+        # Calibrate next to each case so CPU frequency drift affects both equally
+        calibration = _calibrate(min_time / 2)
+        calibrations.append(calibration)
+        ops = _measure(fn, items, min_time)
+        results[name] = {
+            "items_per_sec": round(ops, 1),
+            "mb_per_sec": round(ops / items * chars / 1e6, 3) if chars else None,
+            "normalized": round(ops / calibration, 6),
+        }
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "calibration_ops_per_sec": round(sum(calibrations) / max(len(calibrations), 1), 1),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def median_of_runs(runs: List[Dict[str, object]]) -> Dict[str, object]:
+    """Per-case median across suite runs; keeps a noisy fast run from becoming the baseline."""
+    merged = {"meta": dict(runs[-1]["meta"], runs=len(runs)), "results": {}}
+    for name in runs[0]["results"]:
+        rows = sorted((r["results"][name] for r in runs), key=lambda row: row["normalized"])
+        merged["results"][name] = rows[len(rows) // 2]
+    return merged
+
+
+def compare(current: Dict[str, object], baseline: Dict[str, object], max_regression_pct: float = MAX_REGRESSION_PCT) -> List[str]:
+    """Returns one message per case whose normalized throughput dropped beyond the threshold."""
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        cur = current["results"].get(name)
+        if not cur or not base.get("normalized"):
+            continue
+        drop_pct = (1 - cur["normalized"] / base["normalized"]) * 100
+        if drop_pct > max_regression_pct:
+            regressions.append(f"{name}: -{drop_pct:.1f}% (baseline {base['normalized']}, now {cur['normalized']})")
+    return regressions
+
+
+def check(data: Dict[str, object], baseline: Dict[str, object], max_regression_pct: float = MAX_REGRESSION_PCT, retries: int = 2, min_time: float = 0.2, cases: Dict[str, tuple] = None) -> List[str]:
+    """
+    compare() with confirmation: flagged cases are re-measured up to `retries`
+    times and keep their best result, so only persistent regressions fail.
+    """
+    regressions = compare(data, baseline, max_regression_pct)
+    for _ in range(retries):
+        if not regressions:
+            break
+        flagged = [r.split(":", 1)[0] for r in regressions]
+        rerun = run_suite(min_time=min_time, names=flagged, cases=cases)
+        for name, row in rerun["results"].items():
+            if row["normalized"] > data["results"][name]["normalized"]:
+                data["results"][name] = row
+        regressions = compare(data, baseline, max_regression_pct)
+    return regressions
+
+
+def save(data: Dict[str, object], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> Dict[str, object]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def cli(argv: List[str], description: str, cases_factory: Callable[[], Dict[str, tuple]], baseline_path: Path, results_path: Path) -> int:
+    """Shared CLI for the benchmark modules: run, print, save results, compare against the baseline."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--max-regression", type=float, default=MAX_REGRESSION_PCT, help="Allowed throughput drop in percent")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per measurement round")
+    parser.add_argument("--only", default="", help="Run only cases containing this substring")
+    parser.add_argument("--runs", type=int, default=1, help="Suite repetitions (median per case); use 3+ for baselines")
+    args = parser.parse_args(argv)
+
+    cases = cases_factory()
+    data = median_of_runs([run_suite(min_time=args.min_time, only=args.only, cases=cases) for _ in range(max(args.runs, 1))])
+    save(data, results_path)
+    for name, r in data["results"].items():
+        print(f"{name:34s} {r['items_per_sec']:>14,.0f} items/s  normalized={r['normalized']}")
+    print(f"Results written to {results_path}")
+
+    if args.save_baseline:
+        save(data, baseline_path)
+        print(f"Baseline updated: {baseline_path}")
+        return 0
+
+    regressions = check(data, load_baseline(baseline_path), args.max_regression, min_time=args.min_time, cases=cases)
+    save(data, results_path)
+    for r in regressions:
+        print(f"REGRESSION {r}")
+    return 1 if regressions else 0
+
+
+def main(argv: List[str] = None) -> int:
+    return cli(argv, "Zyrabit PII pipeline micro-benchmarks", lambda: build_cases(build_corpora()), BASELINE_PATH, RESULTS_PATH)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
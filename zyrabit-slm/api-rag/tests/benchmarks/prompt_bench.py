@@ -0,0 +1,72 @@
+"""
+Prompt assembly micro-benchmarks.
+
+Measures ContextManager.build_final_prompt per turn: the precompiled header
+plus history/RAG budgeting, with token counts stored on the rows (steady
+state) and without them (first turn after ingestion or a tokenizer change).
+
+Usage (from zyrabit-slm/api-rag):
+    python -m tests.benchmarks.prompt_bench
+    python -m tests.benchmarks.prompt_bench --save-baseline --runs 3
+"""
+
+import os
+import sys
+from pathlib import Path
+from typing import Dict
+
+from langchain_core.documents import Document
+
+from app.domain.services.context_manager import ContextManager
+from tests.benchmarks import pii_bench
+
+BENCH_DIR = Path(__file__).parent
+BASELINE_PATH = Path(os.getenv("ZYRABIT_PROMPT_BENCH_BASELINE", BENCH_DIR / "baselines" / "prompt_assembly.json"))
+RESULTS_PATH = Path(os.getenv("ZYRABIT_PROMPT_BENCH_OUTPUT", BENCH_DIR / "results" / "prompt_assembly.json"))
+
+PROFILE = {
+    "assistant_name": "Zyra", "persona": "marketing", "tone": "professional",
+    "onboarding_completed": 1, "name": "Ana", "role": "CTO",
+}
+QUERY = "¿Qué decidimos sobre la arquitectura del proyecto?"
+BATCH = 100
+
+
+def build_turn(manager: ContextManager, stored_counts: bool):
+    history = [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"mensaje {i}: " + "detalle de la arquitectura soberana " * 4}
+        for i in range(10)
+    ]
+    docs = [Document(page_content=f"fragmento {i} " + "contenido del vault con notas del cliente " * 20, metadata={"source": f"nota{i}.md"}) for i in range(4)]
+    if stored_counts:
+        for msg in history:
+            msg.update(token_count=manager.message_tokens(msg), tokenizer=manager.tokenizer_name)
+        for doc in docs:
+            doc.metadata.update(token_count=manager.count_tokens(doc.page_content), tokenizer=manager.tokenizer_name)
+    return history, docs
+
+
+def build_cases() -> Dict[str, tuple]:
+    """case name -> (callable, item count, total chars); one item is one assembled prompt."""
+    cases = {}
+    for label, stored in (("stored_counts", True), ("cached_counts", False)):
+        manager = ContextManager("qwen2.5:7b")
+        history, docs = build_turn(manager, stored)
+
+        def assemble(manager=manager, history=history, docs=docs):
+            for _ in range(BATCH):
+                manager.build_final_prompt("", history, docs, QUERY, PROFILE)
+
+        cases[f"build_final_prompt/{label}"] = (assemble, BATCH, 0)
+
+    manager = ContextManager("qwen2.5:7b")
+    cases["prompt_header/cached"] = (lambda: [manager.prompt_header(PROFILE) for _ in range(BATCH)], BATCH, 0)
+    return cases
+
+
+def main(argv=None) -> int:
+    return pii_bench.cli(argv, "Zyrabit prompt assembly micro-benchmarks", build_cases, BASELINE_PATH, RESULTS_PATH)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Re-ingest cost vs edit size.
+
+Indexes one Markdown note of N sections through the real IngestUseCase with a
+vector store that sleeps like an embedding server (a fixed cost per call plus a
+cost per chunk), then edits a growing share of its sections and re-ingests it:
+  diffed        content-hashed chunk ids: only chunks with a new id are embedded
+  full_reembed  the previous behaviour: every chunk of the file is embedded again
+
+Usage (from zyrabit-slm/api-rag):
+    python -m tests.benchmarks.reingest_bench
+    python -m tests.benchmarks.reingest_bench --sections 200 --chunk-ms 2
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import asyncio
+import argparse
+import platform
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+from unittest.mock import MagicMock
+
+from app.domain.use_cases.ingest_use_case import IngestUseCase
+from app.infrastructure.shared.state_tracker import SovereignStateManager
+
+BENCH_DIR = Path(__file__).parent
+RESULTS_PATH = Path(os.getenv("ZYRABIT_REINGEST_BENCH_OUTPUT", BENCH_DIR / "results" / "reingest.json"))
+EDIT_SHARES = (0.01, 0.1, 0.5, 1.0)
+WORDS = (
+    "informe soberano pipeline ingesta costes vector indice nota modelo datos consulta latencia memoria "
+    "cache token documento seccion archivo servidor local privado embedding chunk lote red disco"
+).split()
+
+
+class SimulatedVectorStore:
+    """Keeps chunks by id; add_documents sleeps per call and per chunk, like waiting on Ollama."""
+
+    def __init__(self, call_ms: float, chunk_ms: float):
+        self.call_ms = call_ms
+        self.chunk_ms = chunk_ms
+        self.chunks: Dict[str, object] = {}
+        self.embedded = 0
+
+    def add_documents(self, chunks, ids=None):
+        time.sleep((self.call_ms + self.chunk_ms * len(chunks)) / 1000)
+        self.embedded += len(chunks)
+        self.chunks.update(zip(ids, chunks))
+
+    def delete(self, where=None, ids=None):
+        if where:
+            sources = where["source"]["$in"] if isinstance(where["source"], dict) else [where["source"]]
+            ids = [i for i, chunk in self.chunks.items() if chunk.metadata["source"] in sources]
+        for chunk_id in ids or []:
+            self.chunks.pop(chunk_id, None)
+
+
+def section(i: int, revision: int = 0) -> str:
+    # Distinct text per section and revision (template text would be deduplicated across sections)
+    rng = random.Random(f"{i}.{revision}")
+    body, tail = (" ".join(rng.choice(WORDS) for _ in range(150)) + "." for _ in range(2))
+    return f"## Seccion {i}\n\nParrafo {i}: {body}\n\n{tail}\n"
+
+
+def write_note(path: Path, sections: int, edited: List[int] = ()) -> None:
+    edited = set(edited)
+    path.write_text("# Informe\n\n" + "\n".join(section(i, int(i in edited)) for i in range(sections)), encoding="utf-8")
+
+
+def _edited_sections(sections: int, share: float) -> List[int]:
+    count = max(1, round(sections * share))
+    step = sections / count
+    return sorted({int(n * step) for n in range(count)})
+
+
+def run(sections: int = 100, call_ms: float = 20, chunk_ms: float = 2) -> Dict[str, object]:
+    results = {}
+    for share in EDIT_SHARES:
+        edited = _edited_sections(sections, share)
+        row = {"sections_edited": len(edited)}
+        for mode in ("diffed", "full_reembed"):
+            with tempfile.TemporaryDirectory() as tmp:
+                note = Path(tmp) / "informe.md"
+                saved = SovereignStateManager.DB_PATH
+                SovereignStateManager.init_db(str(Path(tmp) / "state.db"))
+                try:
+                    store = SimulatedVectorStore(call_ms, chunk_ms)
+                    ingest = IngestUseCase(store, MagicMock())
+                    write_note(note, sections)
+                    first = asyncio.run(ingest.execute(str(note)))
+                    if mode == "full_reembed":
+                        # Without recorded chunk ids every chunk of the file is replaced
+                        with sqlite3.connect(SovereignStateManager.DB_PATH) as conn:
+                            conn.execute("DELETE FROM vault_chunks")
+                    write_note(note, sections, edited)
+                    store.embedded = 0
+                    start = time.perf_counter()
+                    result = asyncio.run(ingest.execute(str(note)))
+                    elapsed = time.perf_counter() - start
+                finally:
+                    SovereignStateManager.DB_PATH = saved
+            assert result["status"] == "success" and len(store.chunks) == result["chunks"]
+            row["chunks"] = first["chunks"]
+            row[mode] = {"seconds": round(elapsed, 3), "chunks_embedded": store.embedded}
+        results[f"{share:.0%}"] = row
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "sections": sections,
+            "call_ms": call_ms,
+            "chunk_ms": chunk_ms,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def save(data: Dict[str, object], path: Path = RESULTS_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2) + "\n")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Zyrabit re-ingest cost vs edit size")
+    parser.add_argument("--sections", type=int, default=100)
+    parser.add_argument("--call-ms", type=float, default=20)
+    parser.add_argument("--chunk-ms", type=float, default=2)
+    args = parser.parse_args(argv)
+
+    data = run(args.sections, args.call_ms, args.chunk_ms)
+    for share, row in data["results"].items():
+        diffed, full = row["diffed"], row["full_reembed"]
+        print(
+            f"edit {share:>5} ({row['sections_edited']:>3} sections)  "
+            f"diffed {diffed['seconds']:>7.3f}s {diffed['chunks_embedded']:>4}/{row['chunks']} chunks  "
+            f"full {full['seconds']:>7.3f}s {full['chunks_embedded']:>4} chunks"
+        )
+    save(data)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
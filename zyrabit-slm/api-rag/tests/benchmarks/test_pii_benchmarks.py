@@ -0,0 +1,36 @@
+import os
+import pytest
+from app.core.security.pii_pipeline import anonymize_text
+from tests.benchmarks import pii_bench
+
+RUN_BENCHMARKS = os.getenv("ZYRABIT_RUN_BENCHMARKS", "false").lower() == "true"
+
+
+def test_corpora_exercise_expected_paths():
+    corpora = pii_bench.build_corpora()
+    assert all(not anonymize_text(t).token_map for t in corpora["clean"])
+    assert all(anonymize_text(t).detected_entities["card"] == 1 for t in corpora["pii_dense"])
+    # Near-miss card numbers must never be masked as cards
+    assert all(anonymize_text(t).detected_entities["card"] == 0 for t in corpora["near_miss_cards"])
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {"results": {"anonymize/clean": {"normalized": 1.0}, "anonymize/long_document": {"normalized": 1.0}}}
+    current = {"results": {"anonymize/clean": {"normalized": 0.7}, "anonymize/long_document": {"normalized": 0.95}}}
+    regressions = pii_bench.compare(current, baseline, max_regression_pct=20)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("anonymize/clean")
+
+
+def test_median_of_runs_picks_middle_value():
+    runs = [{"meta": {}, "results": {"x": {"normalized": v}}} for v in (3.0, 1.0, 2.0)]
+    assert pii_bench.median_of_runs(runs)["results"]["x"]["normalized"] == 2.0
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="set ZYRABIT_RUN_BENCHMARKS=true to run micro-benchmarks")
+def test_pii_pipeline_throughput_regression():
+    data = pii_bench.run_suite()
+    regressions = pii_bench.check(data, pii_bench.load_baseline())
+    pii_bench.save(data, pii_bench.RESULTS_PATH)
+    assert not regressions, "PII pipeline throughput regressed:\n" + "\n".join(regressions)
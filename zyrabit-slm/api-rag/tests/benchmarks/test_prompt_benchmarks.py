@@ -0,0 +1,55 @@
+import os
+import pytest
+from unittest.mock import MagicMock, patch
+from app.domain.services import context_manager as cm_module
+from app.domain.services.context_manager import ContextManager
+from tests.benchmarks import pii_bench, prompt_bench
+
+RUN_BENCHMARKS = os.getenv("ZYRABIT_RUN_BENCHMARKS", "false").lower() == "true"
+
+
+def test_prompt_cases_assemble_full_prompts():
+    cases = prompt_bench.build_cases()
+    assert set(cases) == {"build_final_prompt/stored_counts", "build_final_prompt/cached_counts", "prompt_header/cached"}
+    for fn, items, _ in cases.values():
+        fn()
+        assert items == prompt_bench.BATCH
+
+
+def test_repeated_prompts_are_served_from_the_caches():
+    # Call counts instead of wall-clock: after the first batch, every header and token count is a cache hit
+    registry = cm_module.tokenizer_registry
+    load_tokenizer = registry.tokenizer
+    tokenizers = []
+
+    def spy_tokenizer(model_name):
+        real = load_tokenizer(model_name)
+        spy = MagicMock(wraps=real)
+        spy.name = real.name
+        tokenizers.append(spy)
+        return spy
+
+    with patch.object(registry, "tokenizer", side_effect=spy_tokenizer), \
+            patch.object(ContextManager, "_compile_header", autospec=True, side_effect=ContextManager._compile_header) as compile_header:
+        cases = prompt_bench.build_cases()
+        for fn, _, _ in cases.values():
+            fn()
+        assert compile_header.call_count == len(tokenizers) == len(cases)
+
+        compile_header.reset_mock()
+        for spy in tokenizers:
+            spy.count.reset_mock()
+        for fn, _, _ in cases.values():
+            fn()
+        assert compile_header.call_count == 0
+        assert all(spy.count.call_count == 0 for spy in tokenizers)
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="set ZYRABIT_RUN_BENCHMARKS=true to run micro-benchmarks")
+def test_prompt_assembly_regression():
+    cases = prompt_bench.build_cases()
+    data = pii_bench.run_suite(cases=cases)
+    regressions = pii_bench.check(data, pii_bench.load_baseline(prompt_bench.BASELINE_PATH), cases=cases)
+    pii_bench.save(data, prompt_bench.RESULTS_PATH)
+    assert not regressions, "Prompt assembly throughput regressed:\n" + "\n".join(regressions)
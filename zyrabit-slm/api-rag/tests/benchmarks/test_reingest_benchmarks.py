@@ -0,0 +1,22 @@
+import os
+import pytest
+from tests.benchmarks import reingest_bench
+
+RUN_BENCHMARKS = os.getenv("ZYRABIT_RUN_BENCHMARKS", "false").lower() == "true"
+
+
+def test_reingest_embeds_only_edited_sections():
+    results = reingest_bench.run(sections=20, call_ms=0, chunk_ms=0)["results"]
+    one = results["1%"]
+    assert 0 < one["diffed"]["chunks_embedded"] < one["chunks"] / 10
+    assert one["full_reembed"]["chunks_embedded"] == one["chunks"]
+    assert results["100%"]["diffed"]["chunks_embedded"] == results["100%"]["chunks"]
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="set ZYRABIT_RUN_BENCHMARKS=true to run micro-benchmarks")
+def test_reingest_cost_tracks_edit_size():
+    data = reingest_bench.run()
+    reingest_bench.save(data)
+    one = data["results"]["1%"]
+    assert one["diffed"]["seconds"] * 3 < one["full_reembed"]["seconds"]
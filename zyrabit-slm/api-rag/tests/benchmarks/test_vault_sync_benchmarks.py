@@ -0,0 +1,30 @@
+import os
+import pytest
+from tests.benchmarks import vault_sync_bench
+
+RUN_BENCHMARKS = os.getenv("ZYRABIT_RUN_BENCHMARKS", "false").lower() == "true"
+
+
+def test_unchanged_vault_sync_reads_no_note():
+    results = vault_sync_bench.run(notes=200, note_bytes=512)["results"]
+    assert results["stat_fast_path"]["files_hashed"] == 0
+    assert results["first_sync"]["files_hashed"] == 200
+    assert results["after_first_sync"]["files_hashed"] == 0
+
+
+def test_first_import_batches_embedding_calls():
+    results = vault_sync_bench.run_import(notes=40, batch_size=16, call_ms=0, chunk_ms=0)["results"]
+    assert results["sequential"]["embedding_calls"] == 40
+    assert results["pipelined"]["embedding_calls"] < 40
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif(not RUN_BENCHMARKS, reason="set ZYRABIT_RUN_BENCHMARKS=true to run micro-benchmarks")
+def test_unchanged_vault_sync_20k_notes():
+    data = vault_sync_bench.run(notes=20000)
+    data["first_import"] = vault_sync_bench.run_import()
+    vault_sync_bench.save(data)
+    results = data["results"]
+    assert results["stat_fast_path"]["seconds"] * 5 < results["legacy_hash_all"]["seconds"]
+    imported = data["first_import"]["results"]
+    assert imported["pipelined"]["notes_per_sec"] > imported["sequential"]["notes_per_sec"] * 2
@@ -0,0 +1,219 @@
+"""
+Obsidian vault sync benchmarks.
+
+Unchanged vault: builds a vault of N notes, indexes it once, then times
+ObsidianService.sync_vault when nothing changed:
+  stat_fast_path   fingerprints (mtime/size/inode) match, nothing is read
+  legacy_hash_all  the previous check: hash every note + one SQLite lookup each
+  first_sync       fingerprints cleared (index from before the upgrade): every note is
+                   hashed once and its fingerprint stored
+
+First import: indexes a fresh vault through the real IngestUseCase with a vector
+store that sleeps like an embedding server (a fixed cost per call plus a cost per
+chunk). `sequential` is the previous sync (one execute() per note); `pipelined`
+is sync_vault with its worker pool and cross-note batches.
+
+Usage (from zyrabit-slm/api-rag):
+    python -m tests.benchmarks.vault_sync_bench
+    python -m tests.benchmarks.vault_sync_bench --notes 20000 --note-bytes 4096 --import-notes 500
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import asyncio
+import argparse
+import platform
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+from unittest.mock import MagicMock
+
+from app.domain.services.obsidian_service import ObsidianService
+from app.domain.use_cases.ingest_use_case import IngestUseCase
+from app.infrastructure.shared.state_tracker import SovereignStateManager
+
+BENCH_DIR = Path(__file__).parent
+RESULTS_PATH = Path(os.getenv("ZYRABIT_VAULT_BENCH_OUTPUT", BENCH_DIR / "results" / "vault_sync.json"))
+
+
+class CountingIngest:
+    """No-op ingest: an unchanged vault must never reach it."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def prepare(self, file_path, domain="general", file_hash=None, check=None):
+        self.calls += 1
+        return {"status": "skipped"}
+
+
+def build_vault(root: Path, notes: int, note_bytes: int) -> None:
+    line = "Nota soberana del vault con enlaces [[Proyecto]] y #etiquetas.\n"
+    body = (line * (note_bytes // len(line) + 1))[:note_bytes]
+    for i in range(notes):
+        folder = root / f"area-{i % 50:02d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f"nota-{i:05d}.md").write_text(f"# Nota {i}\n{body}", encoding="utf-8")
+
+
+def index_vault(root: Path) -> None:
+    for path in root.rglob("*.md"):
+        SovereignStateManager.update_vault_index(str(path), 1)
+
+
+def legacy_needs_reindexing(file_path: str) -> bool:
+    """needs_reindexing as it was before the stat fingerprint."""
+    current_hash = SovereignStateManager.get_file_hash(file_path)
+    with sqlite3.connect(SovereignStateManager.DB_PATH) as conn:
+        row = conn.execute("SELECT file_hash FROM vault_index WHERE file_path = ?", (file_path,)).fetchone()
+    return not (row and row[0] == current_hash)
+
+
+def timed_legacy(root: Path) -> Dict[str, float]:
+    start = time.perf_counter()
+    paths = [p for p in root.rglob("*.md") if "Reflective Notes" not in p.parts]
+    changed = sum(legacy_needs_reindexing(str(p)) for p in paths)
+    elapsed = time.perf_counter() - start
+    assert changed == 0
+    return {"seconds": round(elapsed, 3), "notes_per_sec": round(len(paths) / elapsed, 1), "files_hashed": len(paths)}
+
+
+def timed_sync() -> Dict[str, float]:
+    ingest = CountingIngest()
+    hashed = 0
+    original = SovereignStateManager.get_file_hash.__func__
+
+    def counting_hash(cls, file_path):
+        nonlocal hashed
+        hashed += 1
+        return original(cls, file_path)
+
+    SovereignStateManager.get_file_hash = classmethod(counting_hash)
+    try:
+        start = time.perf_counter()
+        stats = asyncio.run(ObsidianService.sync_vault(ingest))
+        elapsed = time.perf_counter() - start
+    finally:
+        SovereignStateManager.get_file_hash = classmethod(original)
+    assert ingest.calls == 0 and stats["skipped"] == stats["scanned"]
+    return {"seconds": round(elapsed, 3), "notes_per_sec": round(stats["scanned"] / elapsed, 1), "files_hashed": hashed}
+
+
+def run(notes: int = 20000, note_bytes: int = 4096) -> Dict[str, object]:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "vault"
+        db_path = str(Path(tmp) / "state.db")
+        saved = (ObsidianService.VAULT_PATH, SovereignStateManager.DB_PATH)
+        ObsidianService.VAULT_PATH = root
+        SovereignStateManager.init_db(db_path)
+        try:
+            build_vault(root, notes, note_bytes)
+            index_vault(root)
+
+            stat_path = timed_sync()
+            legacy = timed_legacy(root)
+
+            with sqlite3.connect(db_path) as conn:
+                conn.execute("UPDATE vault_index SET mtime_ns = NULL, size_bytes = NULL, inode = NULL")
+            first = timed_sync()
+            # ...which stored the fingerprints: back on the fast path
+            warm = timed_sync()
+        finally:
+            ObsidianService.VAULT_PATH, SovereignStateManager.DB_PATH = saved
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "notes": notes,
+            "note_bytes": note_bytes,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": {"stat_fast_path": stat_path, "legacy_hash_all": legacy, "first_sync": first, "after_first_sync": warm},
+    }
+
+
+class SimulatedEmbeddingStore:
+    """add_documents sleeps per call and per chunk (the GIL is released, like waiting on Ollama)."""
+
+    def __init__(self, call_ms: float, chunk_ms: float):
+        self.call_ms = call_ms
+        self.chunk_ms = chunk_ms
+        self.calls = 0
+
+    def add_documents(self, chunks, ids=None):
+        self.calls += 1
+        time.sleep((self.call_ms + self.chunk_ms * len(chunks)) / 1000)
+
+
+async def _sequential_import(root: Path, ingest: IngestUseCase) -> int:
+    """The sync loop before pipelining: one note at a time, end to end."""
+    count = 0
+    for path in root.rglob("*.md"):
+        if SovereignStateManager.needs_reindexing(str(path)):
+            await ingest.execute(str(path), domain="obsidian")
+            count += 1
+    return count
+
+
+def run_import(notes: int = 500, concurrency: int = 4, batch_size: int = 32, call_ms: float = 20, chunk_ms: float = 1) -> Dict[str, object]:
+    results = {}
+    for mode in ("sequential", "pipelined"):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "vault"
+            saved = (ObsidianService.VAULT_PATH, SovereignStateManager.DB_PATH)
+            ObsidianService.VAULT_PATH = root
+            SovereignStateManager.init_db(str(Path(tmp) / "state.db"))
+            try:
+                build_vault(root, notes, 2048)
+                store = SimulatedEmbeddingStore(call_ms, chunk_ms)
+                ingest = IngestUseCase(store, MagicMock())
+                # Every note shares the same body: dedup would spare most embedding calls being measured
+                ingest.deduplicator.enabled = False
+                start = time.perf_counter()
+                if mode == "sequential":
+                    indexed = asyncio.run(_sequential_import(root, ingest))
+                else:
+                    indexed = asyncio.run(ObsidianService.sync_vault(ingest, concurrency=concurrency, batch_size=batch_size))["indexed"]
+                elapsed = time.perf_counter() - start
+            finally:
+                ObsidianService.VAULT_PATH, SovereignStateManager.DB_PATH = saved
+        assert indexed == notes
+        results[mode] = {"seconds": round(elapsed, 3), "notes_per_sec": round(notes / elapsed, 1), "embedding_calls": store.calls}
+    return {
+        "meta": {"notes": notes, "concurrency": concurrency, "batch_size": batch_size, "call_ms": call_ms, "chunk_ms": chunk_ms},
+        "results": results,
+    }
+
+
+def save(data: Dict[str, object], path: Path = RESULTS_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2) + "\n")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Zyrabit Obsidian vault sync benchmarks")
+    parser.add_argument("--notes", type=int, default=20000)
+    parser.add_argument("--note-bytes", type=int, default=4096)
+    parser.add_argument("--import-notes", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args(argv)
+
+    data = run(args.notes, args.note_bytes)
+    for name, row in data["results"].items():
+        print(f"{name:<18} {row['seconds']:>8.3f}s  {row['notes_per_sec']:>10.1f} notes/s  hashed={row['files_hashed']}")
+    data["first_import"] = run_import(args.import_notes, args.concurrency, args.batch_size)
+    for name, row in data["first_import"]["results"].items():
+        print(f"import/{name:<11} {row['seconds']:>8.3f}s  {row['notes_per_sec']:>10.1f} notes/s  embedding calls={row['embedding_calls']}")
+    save(data)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
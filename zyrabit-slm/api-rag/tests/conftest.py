@@ -13,6 +13,16 @@ def client():
     with TestClient(app) as c:
         yield c
 
+@pytest.fixture
+def state_db(tmp_path, monkeypatch):
+    """A fresh SovereignStateManager database under tmp_path for one test."""
+    from app.infrastructure.shared.state_tracker import SovereignStateManager
+    monkeypatch.setattr(SovereignStateManager, "DB_PATH", str(tmp_path / "state.db"))
+    SovereignStateManager.init_db()
+    yield
+    # The profile cache would otherwise outlive the database it was read from
+    SovereignStateManager.invalidate_profile_cache()
+
 @pytest.fixture(autouse=True)
 def mock_infrastructure():
     """
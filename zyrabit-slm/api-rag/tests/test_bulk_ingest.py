@@ -0,0 +1,42 @@
+import time
+from unittest.mock import patch
+from app.domain.services.bulk_ingest import bulk_progress_line, discover
+
+
+def test_discover_lists_documents_in_a_stable_order(tmp_path):
+    (tmp_path / "b").mkdir()
+    (tmp_path / ".obsidian").mkdir()
+    for name in ("b/2.md", "b/1.pdf", "a.md", ".upload-x.md", ".obsidian/w.md", "notas.txt"):
+        (tmp_path / name).write_text("x")
+    assert list(discover(str(tmp_path))) == [str(tmp_path / "a.md"), str(tmp_path / "b" / "1.pdf"), str(tmp_path / "b" / "2.md")]
+
+
+def test_progress_line():
+    progress = {"files_done": 3, "files_total": 10, "chunks_done": 120, "chunks_per_sec": 40.0, "eta_seconds": 75}
+    assert bulk_progress_line(progress) == "[3/10 files] 120 chunks  40.0 chunks/s  ETA 1m15s"
+    assert bulk_progress_line({**progress, "eta_seconds": None}).endswith("ETA --")
+
+
+def test_batch_endpoint_runs_and_reports_progress(client, mock_infrastructure, state_db, tmp_path):
+    docs = tmp_path / "docs"
+    (docs / "libros").mkdir(parents=True)
+    for i in range(3):
+        (docs / "libros" / f"libro{i}.md").write_text(f"# Libro {i}\n\nContenido soberano {i}.")
+
+    with patch("app.api.v1.endpoints.documents.DOCS_DIR", str(docs)):
+        assert client.post("/v1/ingest/batch", json={"directory": "../"}).status_code == 400
+        assert client.post("/v1/ingest/batch", json={"directory": "nada"}).status_code == 404
+        response = client.post("/v1/ingest/batch", json={"directory": "libros"})
+        assert response.status_code == 200
+        run_id = response.json()["run_id"]
+
+        deadline = time.monotonic() + 5
+        while (status := client.get(f"/v1/ingest/batch/{run_id}").json())["state"] != "done":
+            assert time.monotonic() < deadline
+            time.sleep(0.02)
+
+    assert status["files_total"] == status["files_done"] == 3 and status["chunks_done"] == 3
+    assert status["errors"] == 0 and "chunks_per_sec" in status
+    added = [c for call in mock_infrastructure["vector_store"].add_documents.call_args_list for c in call.args[1]]
+    assert len(added) == 3
+    assert client.get("/v1/ingest/batch/missing").status_code == 404
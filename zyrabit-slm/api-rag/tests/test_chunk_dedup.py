@@ -0,0 +1,112 @@
+import random
+import sqlite3
+import pytest
+from unittest.mock import MagicMock
+from langchain_core.documents import Document
+from app.infrastructure.shared.state_tracker import SovereignStateManager
+from app.domain.services.chunk_dedup import Signature, collapse_duplicates, content_hash, dedup_report, jaccard
+from app.domain.use_cases.ingest_use_case import IngestUseCase
+from tests.benchmarks.reingest_bench import WORDS, SimulatedVectorStore
+
+
+def paragraph(seed: int, words: int = 80) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(words)) + "."
+
+
+def edited(text: str) -> str:
+    words = text.split()
+    words[len(words) // 2] = "reescrito"
+    return " ".join(words)
+
+
+def write(path, *paragraphs):
+    path.write_text(f"# {path.stem}\n\n" + "\n\n".join(paragraphs), encoding="utf-8")
+    return str(path)
+
+
+def _references():
+    with sqlite3.connect(SovereignStateManager.DB_PATH) as conn:
+        return conn.execute(
+            "SELECT file_path, kind FROM chunk_signatures WHERE canonical_id IS NOT NULL ORDER BY kind"
+        ).fetchall()
+
+
+def test_signatures():
+    text = paragraph(1)
+    assert content_hash(text) == content_hash("  " + text.upper().replace(" ", "\n "))
+    original, near, other = Signature.of(text), Signature.of(edited(text)), Signature.of(paragraph(2))
+    assert original.similar(Signature.of(text.upper()), 0.8) == "exact"
+    assert jaccard(original.minhash, near.minhash) >= 0.8 and original.similar(near, 0.8) == "near"
+    assert jaccard(original.minhash, other.minhash) < 0.3 and original.similar(other, 0.8) is None
+    # Too few words to estimate a similarity: only exact matches
+    assert Signature.of("Ver anexo.").minhash is None
+
+
+@pytest.mark.asyncio
+async def test_duplicates_are_stored_as_references(state_db, tmp_path):
+    store = SimulatedVectorStore(0, 0)
+    ingest = IngestUseCase(store, MagicMock())
+    first, second = paragraph(1), paragraph(2)
+
+    a = await ingest.execute(write(tmp_path / "a.md", first, second))
+    assert a["embedded"] == a["chunks"] == 2 and a["deduplicated"] == 0
+
+    b_path = write(tmp_path / "b.md", first, edited(second), paragraph(3))
+    b = await ingest.execute(b_path)
+    # Copied paragraph (exact) and lightly edited one (near) are references; only the new one is embedded
+    assert b["chunks"] == 3 and b["embedded"] == 1 and b["deduplicated"] == 2
+    assert len(store.chunks) == 3
+    assert _references() == [(b_path, "exact"), (b_path, "near")]
+
+    report = dedup_report()
+    assert report["exact"] == report["near"] == 1 and report["canonical"] == 3
+    assert report["vectors_skipped"] == 2 and report["tokens_saved"] > 0 and report["text_bytes_saved"] > 0
+    assert report["embedded_chunks"] == 3 and report["embedding_seconds_saved"] is not None
+
+    # Re-ingesting unchanged content keeps the references (no new vectors, no new references)
+    (tmp_path / "b.md").write_text((tmp_path / "b.md").read_text() + "\n")
+    again = await ingest.execute(b_path)
+    assert again["embedded"] == 0 and len(store.chunks) == 3 and len(_references()) == 2
+
+
+@pytest.mark.asyncio
+async def test_removing_the_canonical_chunk_promotes_a_reference(state_db, tmp_path):
+    store = SimulatedVectorStore(0, 0)
+    ingest = IngestUseCase(store, MagicMock())
+    shared = paragraph(1)
+    a_path = write(tmp_path / "a.md", shared, paragraph(2))
+    b_path = write(tmp_path / "b.md", shared)
+    c_path = write(tmp_path / "c.md", shared)
+    for path in (a_path, b_path, c_path):
+        await ingest.execute(path)
+    assert [doc.metadata["source"] for doc in store.chunks.values()] == [a_path, a_path]
+
+    assert (await ingest.remove(a_path))["status"] == "deleted"
+    # b.md's copy is embedded under its own id; c.md now references it
+    assert [doc.metadata["source"] for doc in store.chunks.values()] == [b_path]
+    assert set(store.chunks) == SovereignStateManager.indexed_chunk_ids([b_path])[b_path]
+    assert _references() == [(c_path, "exact")]
+    assert SovereignStateManager.duplicate_sources(list(store.chunks)) == {next(iter(store.chunks)): [c_path]}
+
+
+def test_retrieval_collapses_duplicates(state_db):
+    text = paragraph(1)
+    SovereignStateManager.commit_chunk_dedup([], [], [], [
+        ("id-a", "a.md", content_hash(text), None, None, None, None, None, 10),
+        ("id-c", "c.md", content_hash(text), None, "id-a", "exact", text, "{}", 10),
+    ])
+    results = collapse_duplicates([
+        Document(page_content=text, metadata={"source": "a.md", "chunk_id": "id-a"}),
+        Document(page_content=edited(text), metadata={"source": "b.md"}),
+        Document(page_content=paragraph(2), metadata={"source": "d.md"}),
+    ])
+    assert [doc.metadata["source"] for doc in results] == ["a.md", "d.md"]
+    assert results[0].metadata["duplicate_sources"] == ["b.md", "c.md"]
+    assert "duplicate_sources" not in results[1].metadata
+
+
+def test_dedup_report_endpoint(client, state_db):
+    response = client.get("/v1/documents/dedup")
+    assert response.status_code == 200
+    assert response.json()["references"] == 0 and response.json()["embedding_seconds_saved"] is None
@@ -0,0 +1,67 @@
+import pytest
+from unittest.mock import MagicMock
+from langchain_core.documents import Document
+from app.infrastructure.shared.state_tracker import SovereignStateManager
+from app.domain.services.document_chunker import DocumentChunker
+from app.domain.use_cases.ingest_use_case import IngestUseCase
+from tests.benchmarks.reingest_bench import SimulatedVectorStore, write_note
+
+
+def _ids(text, source="a.md", domain="general"):
+    chunks = DocumentChunker(chunk_size=200, chunk_overlap=20).split([Document(page_content=text, metadata={"source": source})], domain)
+    return [c.metadata["chunk_id"] for c in chunks]
+
+
+def test_chunk_ids_are_content_hashes_anchored_on_headers():
+    base = "# Informe\n\n## Uno\n\nPrimer parrafo.\n\n## Dos\n\nSegundo parrafo.\n\n## Tres\n\nSegundo parrafo.\n"
+    ids = _ids(base)
+    assert ids == _ids(base) and len(set(ids)) == 3
+
+    edited = _ids(base.replace("Primer parrafo.", "Primer parrafo, reescrito."))
+    # Only the edited section's chunk changes; the others keep their ids
+    assert edited[0] != ids[0] and edited[1:] == ids[1:]
+    # Same text, other file or other domain: other ids
+    assert not set(ids) & set(_ids(base, source="b.md"))
+    assert not set(ids) & set(_ids(base, domain="obsidian"))
+
+
+def test_repeated_chunks_get_distinct_ids():
+    ids = _ids("Nota repetida.\n\n" + "x" * 300 + "\n\nNota repetida.")
+    assert len(ids) == len(set(ids))
+
+
+@pytest.mark.asyncio
+async def test_reingest_embeds_only_changed_chunks(state_db, tmp_path):
+    note = tmp_path / "informe.md"
+    store = SimulatedVectorStore(0, 0)
+    ingest = IngestUseCase(store, MagicMock())
+
+    write_note(note, 5)
+    first = await ingest.execute(str(note))
+    assert first["embedded"] == first["chunks"] and first["reused"] == 0
+    before = set(store.chunks)
+
+    write_note(note, 4, edited=[2])
+    second = await ingest.execute(str(note))
+    per_section = first["chunks"] // 5
+    assert second["embedded"] == per_section
+    assert second["reused"] == second["chunks"] - per_section
+    # Chroma holds exactly the new version: edited and dropped sections are gone, the rest untouched
+    assert len(store.chunks) == second["chunks"]
+    assert len(before - set(store.chunks)) == 2 * per_section
+    assert set(store.chunks) == SovereignStateManager.indexed_chunk_ids([str(note)])[str(note)]
+    assert SovereignStateManager.search_fts("Parrafo")
+
+
+@pytest.mark.asyncio
+async def test_files_indexed_before_chunk_ids_are_replaced(state_db, tmp_path):
+    note = tmp_path / "nota.md"
+    note.write_text("# Nota\n\nVersion nueva.")
+    SovereignStateManager.update_vault_index(str(note), 1, "version vieja", file_hash="old", stat=(0, 0, 0))
+    store = MagicMock()
+
+    result = await IngestUseCase(store, MagicMock()).execute(str(note))
+
+    assert result["status"] == "success" and result["embedded"] == 1
+    store.delete.assert_called_once_with({"source": {"$in": [str(note)]}})
+    assert SovereignStateManager.indexed_chunk_ids([str(note), "otra.md"]) == {str(note): set(store.add_documents.call_args.args[1])}
@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from app.domain.services.context_manager import ContextManager
+from app.domain.services.conversation_summarizer import ConversationSummarizer
+from app.domain.use_cases.chat_use_case import ChatUseCase
+from app.infrastructure.shared.state_tracker import SovereignStateManager
+
+
+def _provider(text="Resumen: el usuario migra Zyrabit a Docker."):
+    provider = MagicMock()
+    provider.generate.return_value = MagicMock(text=text, latency_seconds=0.01)
+    return provider
+
+
+def _store_turns(session_id, n, start=0):
+    for i in range(start, start + n):
+        SovereignStateManager.store_message(session_id, "user" if i % 2 == 0 else "assistant", f"turno {i}")
+
+
+def test_refresh_waits_for_enough_new_turns(state_db):
+    summarizer = ConversationSummarizer(_provider(), min_new_messages=6, keep_recent=4)
+    _store_turns("s1", 9)
+    assert summarizer.refresh("s1") is False
+    summarizer.inference_provider.generate.assert_not_called()
+
+    _store_turns("s1", 1, start=9)
+    assert summarizer.refresh("s1") is True
+    summary = SovereignStateManager.get_summary("s1")
+    assert summary["summary"].startswith("Resumen:")
+
+    # Only turns after the summarized ones remain verbatim
+    recent = SovereignStateManager.get_history("s1", after_id=summary["last_message_id"])
+    assert [m["content"] for m in recent] == ["turno 6", "turno 7", "turno 8", "turno 9"]
+    prompt = summarizer.inference_provider.generate.call_args[0][0].prompt
+    assert "turno 5" in prompt and "turno 6" not in prompt
+
+    # Nothing new to fold
+    assert summarizer.refresh("s1") is False
+
+
+def test_refresh_extends_previous_summary(state_db):
+    summarizer = ConversationSummarizer(_provider("v2"), min_new_messages=2, keep_recent=0)
+    SovereignStateManager.save_summary("s2", "v1", 0)
+    _store_turns("s2", 2)
+    assert summarizer.refresh("s2") is True
+    assert "v1" in summarizer.inference_provider.generate.call_args[0][0].prompt
+    assert SovereignStateManager.get_summary("s2")["summary"] == "v2"
+
+    SovereignStateManager.clear_session("s2")
+    assert SovereignStateManager.get_summary("s2") == {}
+
+
+@pytest.mark.asyncio
+async def test_schedule_runs_one_refresh_per_session(state_db):
+    summarizer = ConversationSummarizer(_provider(), min_new_messages=2, keep_recent=0)
+    _store_turns("s3", 4)
+    first = summarizer.schedule("s3")
+    assert summarizer.schedule("s3") is None
+    await first
+    assert summarizer.inference_provider.generate.call_count == 1
+    assert "s3" not in summarizer._in_flight
+
+
+@pytest.mark.asyncio
+async def test_scheduled_refreshes_are_held_until_they_finish(state_db):
+    summarizer = ConversationSummarizer(_provider(), min_new_messages=2, keep_recent=0)
+    _store_turns("s5", 4)
+    # The caller drops the task: the summarizer keeps it alive and stop() waits for it
+    summarizer.schedule("s5")
+    assert len(summarizer._tasks) == 1
+    await summarizer.stop()
+    assert summarizer.inference_provider.generate.call_count == 1
+    assert not summarizer._tasks and not summarizer._in_flight
+
+
+def test_summary_shares_memory_budget():
+    manager = ContextManager()
+    history = [{"role": "user", "content": "reciente"}]
+    prompt = manager.build_final_prompt("", history, [], "hola", conversation_summary="migración a Docker")
+    assert "[RESUMEN DE TURNOS ANTERIORES]: migración a Docker\nuser: reciente\n" in prompt
+
+
+@pytest.mark.asyncio
+async def test_chat_use_case_uses_summary_instead_of_old_turns(state_db):
+    _store_turns("s4", 10)
+    summarizer = ConversationSummarizer(_provider("resumen previo"), min_new_messages=6, keep_recent=4)
+    summarizer.refresh("s4")
+
+    inference = _provider("respuesta")
+    gatekeeper = MagicMock()
+    gatekeeper.mask_pii.return_value = ("¿y ahora?", {})
+    gatekeeper.get_routing_decision.return_value = "direct"
+    cache = MagicMock()
+    cache.get.return_value = None
+    use_case = ChatUseCase(inference, None, gatekeeper, cache, summarizer=summarizer)
+
+    await use_case.execute("¿y ahora?", client_msg_id="s4")
+    prompt = inference.generate.call_args[0][0].prompt
+    assert "[RESUMEN DE TURNOS ANTERIORES]: resumen previo" in prompt
+    assert "turno 9" in prompt and "turno 5" not in prompt
+    await asyncio.sleep(0)
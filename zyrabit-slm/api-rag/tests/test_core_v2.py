@@ -144,3 +144,97 @@ async def test_context_budgeting_trimming():
         # Should only allow ~2.5 messages.
         assert "user:" in trimmed
         assert trimmed.count("user:") <= 3
+
+def test_context_manager_memoizes_token_counts():
+    manager = ContextManager()
+    manager.tokenizer = MagicMock()
+    manager.tokenizer.count.side_effect = lambda text: len(text.split())
+
+    assert manager.count_tokens("uno dos tres") == 3
+    assert manager.count_tokens("uno dos tres") == 3
+    assert manager.tokenizer.count.call_count == 1
+
+def test_token_cache_evicts_the_least_recently_used_text():
+    manager = ContextManager()
+    manager.TOKEN_CACHE_SIZE = 2
+    manager.tokenizer = MagicMock()
+    manager.tokenizer.count.side_effect = lambda text: len(text.split())
+
+    manager.count_tokens("system prompt")
+    manager.count_tokens("turno uno")
+    manager.count_tokens("system prompt")
+    manager.count_tokens("turno dos")
+    # The repeated text was used last: "turno uno" is the one evicted
+    manager.count_tokens("system prompt")
+    assert manager.tokenizer.count.call_count == 3
+
+def test_context_budgeting_uses_stored_token_counts():
+    manager = ContextManager()
+    name = manager.tokenizer_name
+    manager.tokenizer = MagicMock(name=name)
+    manager.tokenizer.name = name
+    manager.tokenizer.count.side_effect = AssertionError("stored counts must not be re-encoded")
+
+    history = [{"role": "user", "content": f"turn {i}", "token_count": 400, "tokenizer": name} for i in range(5)]
+    trimmed = manager.trim_history(history, budget=1000)
+    assert trimmed == "user: turn 3\nuser: turn 4\n"
+
+    docs = [MagicMock(page_content=f"chunk {i}", metadata={"token_count": t, "tokenizer": name}) for i, t in enumerate([300, 900, 200])]
+    assert manager.trim_rag_context(docs, budget=600) == "chunk 0\n\nchunk 2"
+
+def test_stored_token_counts_from_another_tokenizer_are_recounted():
+    manager = ContextManager()
+    history = [{"role": "user", "content": "hola", "token_count": 999, "tokenizer": "other"}]
+    assert manager.message_tokens(history[0]) == manager.count_tokens("user: hola\n")
+
+def test_store_message_persists_token_count():
+    SovereignStateManager.store_message("tokens_session", "user", "hola", token_count=7, tokenizer="approx:qwen")
+    SovereignStateManager.store_message("tokens_session", "assistant", "hey")
+    history = SovereignStateManager.get_history("tokens_session")
+    assert [(m["token_count"], m["tokenizer"]) for m in history] == [(7, "approx:qwen"), (None, None)]
+
+def test_prompt_header_is_compiled_once_per_profile_and_tool_version():
+    from app.domain.services import context_manager as cm_module
+
+    manager = ContextManager()
+    profile = {"assistant_name": "Kai", "persona": "sales", "onboarding_completed": 1, "name": "Ana", "role": "CTO"}
+    with patch.object(manager, "_compile_header", wraps=manager._compile_header) as compile_header:
+        first = manager.build_final_prompt("", [], [], "hola", profile)
+        second = manager.build_final_prompt("", [{"role": "user", "content": "previo"}], [], "otra", profile)
+        assert compile_header.call_count == 1
+
+        # Profile change -> new header
+        manager.build_final_prompt("", [], [], "hola", dict(profile, tone="casual"))
+        assert compile_header.call_count == 2
+
+        # Tool registry change -> new header
+        with patch.object(cm_module, "tool_manifest", return_value=("v2", "[AVAILABLE_MCP_TOOLS]:\n- new_tool: x\n")):
+            third = manager.build_final_prompt("", [], [], "hola", profile)
+        assert compile_header.call_count == 3
+
+    assert first.startswith("### IDENTIDAD SOBERANA:\nIdentidad Principal: Kai.")
+    assert "USUARIO: Ana | ROL: CTO" in first
+    assert "user: previo\n" in second and second.endswith("### CONSULTA ACTUAL:\notra\n")
+    assert "- new_tool: x" in third
+
+def test_tool_manifest_tracks_tool_descriptions_at_the_same_count():
+    from types import SimpleNamespace
+    from app.domain.services import context_manager as cm_module
+
+    tools = {
+        "a": SimpleNamespace(name="a", description="first tool"),
+        "b": SimpleNamespace(name="b", description="second tool"),
+    }
+    server = SimpleNamespace(_tool_manager=SimpleNamespace(_tools=tools))
+    manager = ContextManager()
+    with patch.object(cm_module, "_mcp_server", server), patch.object(cm_module, "_manifest_cache", (None, 0, "")), \
+            patch.object(manager, "_compile_header", wraps=manager._compile_header) as compile_header:
+        manager.build_final_prompt("", [], [], "hola", {})
+        manager.build_final_prompt("", [], [], "hola", {})
+        assert compile_header.call_count == 1
+
+        # Same dict, same number of tools, new description
+        tools["b"] = SimpleNamespace(name="b", description="rewritten tool")
+        prompt = manager.build_final_prompt("", [], [], "hola", {})
+        assert compile_header.call_count == 2
+        assert "- b: rewritten tool" in prompt and "second tool" not in prompt
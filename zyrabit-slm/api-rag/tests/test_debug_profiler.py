@@ -0,0 +1,93 @@
+import time
+import asyncio
+import threading
+import pytest
+from app.infrastructure.shared import config
+from app.infrastructure.shared.profiler import SamplingProfiler, dump_tasks
+
+ADMIN = {"Authorization": "Bearer admin-secret"}
+
+
+def _busy_hotspot(stop: threading.Event):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def _profile_busy_thread(**kwargs) -> SamplingProfiler:
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_hotspot, args=(stop,), name="busy-worker")
+    worker.start()
+    profiler = SamplingProfiler(interval=0.005, **kwargs)
+    profiler.start()
+    time.sleep(0.3)
+    profiler.stop()
+    stop.set()
+    worker.join()
+    return profiler
+
+
+def test_collapsed_stacks_attribute_samples_to_the_hot_thread():
+    profiler = _profile_busy_thread()
+    lines = profiler.collapsed().splitlines()
+    busy = [line for line in lines if line.startswith("busy-worker;")]
+    assert busy and any("_busy_hotspot (test_debug_profiler.py:" in line for line in busy)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in busy) >= 10
+    # The profiler never samples itself
+    assert not any(line.startswith("zyrabit-profiler;") for line in lines)
+
+
+def test_speedscope_document_is_consistent():
+    doc = _profile_busy_thread().speedscope()
+    frames = doc["shared"]["frames"]
+    profile = next(p for p in doc["profiles"] if p["name"] == "busy-worker")
+    assert profile["type"] == "sampled" and len(profile["samples"]) == len(profile["weights"])
+    assert profile["endValue"] == pytest.approx(sum(profile["weights"]))
+    leaves = {frames[stack[-1]]["name"] for stack in profile["samples"]}
+    assert leaves & {"_busy_hotspot", "_busy_hotspot.<locals>.<genexpr>"}
+
+
+@pytest.mark.asyncio
+async def test_task_dump_shows_the_await_chain():
+    async def fetch_context():
+        await asyncio.sleep(10)
+
+    async def handle_turn():
+        await fetch_context()
+
+    task = asyncio.create_task(handle_turn(), name="turn-1")
+    await asyncio.sleep(0)
+    try:
+        entry = next(t for t in dump_tasks() if t["name"] == "turn-1")
+        assert entry["coroutine"].endswith("handle_turn")
+        assert entry["waiting_on"] and not entry["current"]
+        assert [s.rsplit(" in ", 1)[1].rsplit(".", 1)[-1] for s in entry["stack"][:2]] == ["handle_turn", "fetch_context"]
+    finally:
+        task.cancel()
+
+
+def test_debug_endpoints_require_the_admin_token(client, monkeypatch):
+    monkeypatch.setattr(config, "DEBUG_ADMIN_TOKEN", "")
+    assert client.get("/v1/debug/tasks", headers=ADMIN).status_code == 404
+
+    monkeypatch.setattr(config, "DEBUG_ADMIN_TOKEN", "admin-secret")
+    assert client.get("/v1/debug/tasks").status_code == 401
+    assert client.get("/v1/debug/tasks", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    # Non-ASCII bytes in the token are a wrong token, not a server error
+    assert client.get("/v1/debug/tasks", headers={"Authorization": "Bearer s\xe9cret".encode("latin-1")}).status_code == 401
+    body = client.get("/v1/debug/tasks", headers=ADMIN).json()
+    assert body["count"] == len(body["tasks"]) >= 1
+
+
+def test_profile_endpoint(client, monkeypatch):
+    monkeypatch.setattr(config, "DEBUG_ADMIN_TOKEN", "admin-secret")
+    response = client.get("/v1/debug/profile?seconds=0.2&format=collapsed&include_idle=true", headers=ADMIN)
+    assert response.status_code == 200
+    assert "attachment" in response.headers["content-disposition"]
+    assert int(response.headers["x-profile-samples"]) > 0
+    assert response.text.strip()
+
+    response = client.get("/v1/debug/profile?seconds=0.1", headers=ADMIN)
+    assert response.json()["$schema"].startswith("https://www.speedscope.app")
+
+    too_long = config.DEBUG_PROFILE_MAX_SECONDS + 1
+    assert client.get(f"/v1/debug/profile?seconds={too_long}", headers=ADMIN).status_code == 400
@@ -0,0 +1,165 @@
+import time
+import asyncio
+import pytest
+from io import BytesIO
+from unittest.mock import AsyncMock, patch
+from app.infrastructure.shared.state_tracker import SovereignStateManager
+from app.domain.services.ingest_queue import IngestJobQueue
+
+
+class FakeIngest:
+    """Stands in for IngestUseCase: walks the stages and returns scripted results."""
+
+    def __init__(self, results=None, hold=None):
+        self.results = list(results or [])
+        self.hold = hold
+        self.calls = 0
+        self.in_flight = {}
+        self.started = []
+
+    async def execute(self, file_path, domain="general", progress=None, file_hash=None):
+        self.calls += 1
+        self.started.append(file_path)
+        await progress("extracting")
+        self.in_flight[file_path] = "extracting"
+        await asyncio.sleep(0.01)
+        await progress("embedding")
+        self.in_flight[file_path] = "embedding"
+        if self.hold:
+            await self.hold(file_path, self.in_flight)
+        del self.in_flight[file_path]
+        return self.results.pop(0) if self.results else {"status": "success", "chunks": 2}
+
+
+async def _wait_for(job_id, states=("done", "failed"), timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = SovereignStateManager.get_ingest_job(job_id)
+        if job["state"] in states:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job stuck in {job['state']}")
+
+
+@pytest.mark.asyncio
+async def test_job_walks_every_state_and_reports_progress(state_db):
+    sio = AsyncMock()
+    queue = IngestJobQueue(FakeIngest(), workers=1, sio=sio, poll_seconds=0.05)
+    queue.start()
+    try:
+        job = await queue.submit("/docs/a.md", "a.md")
+        done = await _wait_for(job["job_id"])
+    finally:
+        await queue.stop()
+
+    assert done["result"] == {"status": "success", "chunks": 2}
+    progress = [c.args[1]["state"] for c in sio.emit.call_args_list if c.args[0] == "ingest_progress"]
+    assert progress == ["queued", "extracting", "embedding", "done"]
+    assert any(c.args[0] == "chat_response" for c in sio.emit.call_args_list)
+
+
+@pytest.mark.asyncio
+async def test_retryable_failures_back_off_then_succeed(state_db):
+    ingest = FakeIngest(results=[{"status": "error", "message": "Ollama timeout", "retryable": True}])
+    queue = IngestJobQueue(ingest, workers=1, backoff_seconds=0.2, poll_seconds=0.02)
+    queue.start()
+    try:
+        job = await queue.submit("/docs/a.md", "a.md")
+        retry = await _wait_for(job["job_id"], states=("queued",))
+        while retry["attempts"] == 0:
+            retry = await _wait_for(job["job_id"], states=("queued",))
+        assert retry["error"] == "Ollama timeout"
+        assert retry["next_attempt_at"] > time.time()
+        # Not picked up again before the backoff elapses
+        await asyncio.sleep(0.1)
+        assert ingest.calls == 1
+        done = await _wait_for(job["job_id"])
+    finally:
+        await queue.stop()
+
+    assert done["state"] == "done" and done["attempts"] == 2 and done["error"] is None
+    assert queue.retry_delay(1) == 0.2 and queue.retry_delay(3) == 0.8
+
+
+@pytest.mark.asyncio
+async def test_permanent_and_exhausted_failures(state_db):
+    invalid = {"status": "error", "message": "File too large"}
+    transient = {"status": "error", "message": "Chroma down", "retryable": True}
+    ingest = FakeIngest(results=[invalid, transient, transient])
+    queue = IngestJobQueue(ingest, workers=1, max_attempts=2, backoff_seconds=0, poll_seconds=0.02)
+    queue.start()
+    try:
+        rejected = await _wait_for((await queue.submit("/docs/big.pdf", "big.pdf"))["job_id"])
+        exhausted = await _wait_for((await queue.submit("/docs/b.md", "b.md"))["job_id"])
+    finally:
+        await queue.stop()
+
+    assert rejected["state"] == "failed" and rejected["attempts"] == 1
+    assert rejected["error"] == "File too large"
+    assert exhausted["state"] == "failed" and exhausted["attempts"] == 2
+
+
+@pytest.mark.asyncio
+async def test_workers_overlap_extraction_and_embedding(state_db):
+    overlapped = asyncio.Event()
+
+    async def hold(file_path, in_flight):
+        # The first job stays in 'embedding' until another job has started
+        # (b may finish between two polls on a busy CPU: check it started, not that it is in flight)
+        if file_path == "/docs/a.md":
+            while "/docs/b.md" not in ingest.started:
+                await asyncio.sleep(0.005)
+            overlapped.set()
+
+    ingest = FakeIngest(hold=hold)
+    queue = IngestJobQueue(ingest, workers=2, poll_seconds=0.02)
+    queue.start()
+    try:
+        first = await queue.submit("/docs/a.md", "a.md")
+        second = await queue.submit("/docs/b.md", "b.md")
+        await asyncio.wait_for(overlapped.wait(), timeout=5)
+        await _wait_for(first["job_id"])
+        await _wait_for(second["job_id"])
+    finally:
+        await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_interrupted_jobs_resume_after_restart(state_db):
+    job = SovereignStateManager.enqueue_ingest_job("/docs/a.md", "a.md")
+    claimed = SovereignStateManager.claim_ingest_job()
+    assert claimed["job_id"] == job["job_id"] and claimed["state"] == "extracting"
+    # A second claimer finds nothing: the job is taken
+    assert SovereignStateManager.claim_ingest_job() is None
+
+    # The process died mid-extraction; a new queue requeues and finishes it
+    queue = IngestJobQueue(FakeIngest(), workers=1, poll_seconds=0.02)
+    queue.start()
+    try:
+        done = await _wait_for(job["job_id"])
+    finally:
+        await queue.stop()
+    assert done["state"] == "done" and done["attempts"] == 2
+
+
+@patch("app.domain.use_cases.ingest_use_case.IngestUseCase.execute", new_callable=AsyncMock)
+def test_ingest_endpoint_returns_a_pollable_job(mock_execute, client, tmp_path, monkeypatch):
+    monkeypatch.setattr(SovereignStateManager, "DB_PATH", str(tmp_path / "state.db"))
+    SovereignStateManager.init_db()
+    mock_execute.return_value = {"status": "success", "chunks": 4}
+
+    with patch("app.api.v1.endpoints.documents.DOCS_DIR", str(tmp_path)):
+        files = {"file": ("notas.md", BytesIO(b"# Notas\n\nVault soberano."), "text/markdown")}
+        response = client.post("/v1/ingest", files=files)
+    assert response.status_code == 200
+    job_id = response.json()["job_id"]
+
+    deadline = time.monotonic() + 5
+    while (status := client.get(f"/v1/ingest/{job_id}").json())["state"] != "done":
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    assert status["filename"] == "notas.md" and status["result"]["chunks"] == 4
+    mock_execute.assert_awaited_once()
+    assert mock_execute.await_args.args[0] == str(tmp_path / "notas.md")
+
+    assert client.get("/v1/ingest/missing").status_code == 404
@@ -1,11 +1,13 @@
 import sys
 import os
+import asyncio
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 
 # Importar las funciones del script de ingesta
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../scripts'))
-from ingest import check_ollama_model, load_documents, split_documents, populate_vector_db
+from ingest import check_ollama_model, ingest_directory, main
+from app.infrastructure.shared.state_tracker import SovereignStateManager
 
 # --- PRUEBA 1: Verificar Modelo Ollama Disponible ---
 
@@ -43,141 +45,87 @@ def test_check_ollama_model_unavailable(mock_embeddings):
     # THEN
     assert result is False
 
-# --- PRUEBA 2: Cargar Documentos ---
+# --- PRUEBA 2: Ingesta masiva reanudable ---
 
 
-@patch('os.path.exists')
-@patch('os.listdir')
-@patch('ingest.PyPDFLoader')
-def test_load_documents_success(mock_pdf_loader, mock_listdir, mock_exists):
-    """
-    Prueba que load_documents cargue PDFs exitosamente.
-    """
-    # GIVEN
-    mock_exists.return_value = True
-    mock_listdir.return_value = [
-        "document1.pdf",
-        "document2.pdf",
-        "readme.txt"]
-
-    # Mock del loader
-    mock_doc1 = MagicMock()
-    mock_doc1.page_content = "Content 1"
-    mock_doc2 = MagicMock()
-    mock_doc2.page_content = "Content 2"
-
-    mock_loader_instance = mock_pdf_loader.return_value
-    mock_loader_instance.load.side_effect = [[mock_doc1], [mock_doc2]]
-
-    # WHEN
-    docs = load_documents("document_source")
+class RecordingStore:
+    """Vector store en memoria que registra el tamaño de cada llamada de embeddings."""
 
-    # THEN
-    assert len(docs) == 2
-    assert mock_pdf_loader.call_count == 2
+    def __init__(self, fail_on_call=None):
+        self.chunks = {}
+        self.calls = []
+        self.fail_on_call = fail_on_call
 
+    def add_documents(self, chunks, ids=None):
+        self.calls.append(len(chunks))
+        if len(self.calls) == self.fail_on_call:
+            raise RuntimeError("Ollama caído")
+        self.chunks.update(zip(ids, chunks))
 
-@patch('os.path.exists')
-def test_load_documents_no_directory(mock_exists):
-    """
-    Prueba que load_documents termine si el directorio no existe.
-    """
-    # GIVEN
-    mock_exists.return_value = False
+    def delete(self, where=None, ids=None):
+        if where:
+            sources = where["source"]["$in"] if isinstance(where["source"], dict) else [where["source"]]
+            ids = [i for i, chunk in self.chunks.items() if chunk.metadata["source"] in sources]
+        for chunk_id in ids or []:
+            self.chunks.pop(chunk_id, None)
 
-    # WHEN/THEN
-    with pytest.raises(SystemExit):
-        load_documents("non_existent_dir")
 
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    # main() apunta DB_PATH a --state-db; monkeypatch lo restaura al terminar
+    monkeypatch.setattr(SovereignStateManager, "DB_PATH", str(tmp_path / "state.db"))
+    docs = tmp_path / "document_source"
+    (docs / "capitulos").mkdir(parents=True)
+    for i in range(4):
+        (docs / "capitulos" / f"cap{i}.md").write_text(f"# Capitulo {i}\n\n" + "".join(f"Texto {j} del capitulo {i}. " for j in range(60)))
+    (docs / "notas.txt").write_text("ignorado")
+    return docs
 
-@patch('os.path.exists')
-@patch('os.listdir')
-def test_load_documents_no_pdfs(mock_listdir, mock_exists):
-    """
-    Prueba que load_documents termine si no hay archivos PDF.
-    """
-    # GIVEN
-    mock_exists.return_value = True
-    mock_listdir.return_value = ["readme.txt", "data.csv"]
-
-    # WHEN/THEN
-    with pytest.raises(SystemExit):
-        load_documents("document_source")
 
-# --- PRUEBA 3: Dividir Documentos ---
+def _args(source, tmp_path, *extra):
+    return [str(source), "--state-db", str(tmp_path / "ingest_state.db"), *extra]
 
 
-def test_split_documents_correct_chunks():
+def test_main_streams_in_bounded_batches_with_deterministic_ids(source, tmp_path, capsys):
     """
-    Prueba que split_documents divida los documentos en chunks correctamente.
+    Prueba que la ingesta embeba en lotes acotados y que re-ejecutarla no duplique chunks.
     """
-    # GIVEN
-    mock_doc = MagicMock()
-    # Crear contenido largo para que se divida en múltiples chunks
-    mock_doc.page_content = "A" * 3000  # 3000 caracteres
-    mock_doc.metadata = {"page": 1}
+    store = RecordingStore()
+    assert main(_args(source, tmp_path, "--batch-chunks", "3"), vector_store=store) == 0
 
-    docs = [mock_doc]
+    assert max(store.calls) <= 3 and sum(store.calls) == len(store.chunks) > 4
+    ids = set(store.chunks)
+    output = capsys.readouterr().out
+    assert "[4/4 files]" in output and "chunks/s" in output and "ETA" in output
 
-    # WHEN
-    chunks = split_documents(docs)
+    # Segunda ejecución: nada cambió, nada se embebe y los ids siguen siendo los mismos
+    assert main(_args(source, tmp_path), vector_store=store) == 0
+    assert sum(store.calls) == len(ids) and set(store.chunks) == ids
 
-    # THEN
-    # Con CHUNK_SIZE=1000, deberíamos tener al menos 3 chunks
-    assert len(chunks) >= 3
-    # Verificar que cada chunk no exceda el tamaño máximo
-    for chunk in chunks:
-        # Con overlap podría ser un poco más
-        assert len(chunk.page_content) <= 1200
 
-# --- PRUEBA 4: Poblar Vector DB ---
-
-
-@patch('ingest.chromadb.HttpClient')
-@patch('ingest.OllamaEmbeddings')
-def test_populate_vector_db_batching(mock_embeddings, mock_chroma_client):
+def test_interrupted_run_resumes_from_its_checkpoint(source, tmp_path):
     """
-    Prueba que populate_vector_db ingeste chunks en batches correctamente.
+    Prueba que una ingesta interrumpida retome sólo los archivos pendientes.
     """
-    # GIVEN
-    mock_chunks = []
-    for i in range(250):  # 250 chunks para probar batching
-        mock_chunk = MagicMock()
-        mock_chunk.page_content = f"Content {i}"
-        mock_chunk.metadata = {"page": i}
-        mock_chunks.append(mock_chunk)
-
-    # Mock de embeddings
-    mock_embeddings_instance = mock_embeddings.return_value
-    # Retornar un embedding por cada chunk
-    mock_embeddings_instance.embed_documents.return_value = [
-        [0.1, 0.2] for _ in range(250)]
+    SovereignStateManager.init_db(str(tmp_path / "ingest_state.db"))
+    failing = RecordingStore(fail_on_call=3)
+    with pytest.raises(RuntimeError):
+        asyncio.run(ingest_directory(str(source), failing, concurrency=1, batch_chunks=1))
 
-    # Mock de ChromaDB
-    mock_collection = MagicMock()
-    mock_collection.count.return_value = 250
-    mock_chroma_instance = mock_chroma_client.return_value
-    mock_chroma_instance.get_or_create_collection.return_value = mock_collection
+    run = SovereignStateManager.open_ingest_run(os.path.abspath(str(source)))
+    assert run["files_total"] == 4 and 0 < run["files_done"] < 4
+    done_before = run["files_done"]
 
-    # WHEN
-    populate_vector_db(mock_chunks, mock_embeddings_instance)
+    store = RecordingStore()
+    stats = asyncio.run(ingest_directory(str(source), store, concurrency=1, batch_chunks=1))
+    assert stats["run_id"] == run["run_id"] and stats["state"] == "done"
+    assert stats["files_done"] == 4 and stats["errors"] == 0
+    # Sólo se procesaron los archivos pendientes
+    assert len({c.metadata["source"] for c in store.chunks.values()}) == 4 - done_before
 
-    # THEN
-    # Con batch_size=100, deberíamos tener 3 llamadas a collection.add
-    assert mock_collection.add.call_count == 3
-    mock_collection.count.assert_called_once()
 
-
-@patch('ingest.chromadb.HttpClient')
-def test_populate_vector_db_connection_error(mock_chroma_client):
+def test_main_missing_directory(tmp_path):
     """
-    Prueba que populate_vector_db termine si no puede conectar a ChromaDB.
+    Prueba que main termine con error si el directorio no existe.
     """
-    # GIVEN
-    mock_chroma_client.side_effect = Exception("Connection refused")
-    mock_chunks = [MagicMock()]
-    mock_embeddings = MagicMock()
-
-    # WHEN/THEN
-    with pytest.raises(SystemExit):
-        populate_vector_db(mock_chunks, mock_embeddings)
+    assert main([str(tmp_path / "no_existe"), "--skip-check"]) == 1
@@ -0,0 +1,77 @@
+import os
+import json
+import random
+
+from app.domain.services.keyword_router import KeywordRouter, DEFAULT_INTENTS
+from app.domain.services.gatekeeper import Gatekeeper
+
+
+def _naive(intents, text):
+    text_lower = text.lower()
+    return {intent for intent, words in intents.items() if any(w in text_lower for w in words)}
+
+
+def test_router_matches_naive_substring_scan():
+    router = KeywordRouter()
+    random.seed(7)
+    words = ["docker", "rag", "storage", "hola", "Crear Mensaje", "resumen", "SLM", "ollamas", "x", " "]
+    for _ in range(500):
+        text = "".join(random.choice(words) for _ in range(random.randint(0, 8)))
+        assert router.match(text) == _naive(DEFAULT_INTENTS, text)
+
+
+def test_router_reports_all_intents_in_one_pass():
+    router = KeywordRouter({"a": ["he", "she"], "b": ["hers"], "c": ["his"]})
+    assert router.match("ushers") == {"a", "b"}
+    assert router.match("nothing") == frozenset()
+
+
+def test_router_caches_and_evicts_decisions():
+    router = KeywordRouter(cache_size=2)
+    router.match("docker one")
+    router.match("docker two")
+    router.match("docker one")
+    router.match("docker three")
+    assert router.cache_info()["size"] == 2
+    assert "docker two" not in router._cache
+
+
+def test_router_hot_reloads_keywords_file(tmp_path):
+    keywords_file = tmp_path / "keywords.json"
+    keywords_file.write_text(json.dumps({"scope": ["obsidian"]}), encoding="utf-8")
+    router = KeywordRouter(keywords_file=str(keywords_file), reload_interval=0)
+    assert router.has_intent("sync my obsidian vault", "scope")
+    assert not router.has_intent("docker compose", "scope")
+    assert router.has_intent("escribe un borrador", "operational")
+
+    keywords_file.write_text(json.dumps({"scope": ["vault"]}), encoding="utf-8")
+    os.utime(keywords_file, (1, 1))
+    assert not router.has_intent("sync my obsidian notes", "scope")
+    assert router.has_intent("open the vault", "scope")
+    assert router.version == 3
+
+
+def test_router_ignores_keyword_values_that_are_not_lists_of_strings(tmp_path):
+    keywords_file = tmp_path / "keywords.json"
+    keywords_file.write_text(json.dumps({"scope": 5}), encoding="utf-8")
+    router = KeywordRouter(keywords_file=str(keywords_file), reload_interval=0)
+    # Invalid at startup: the built-in intents are used
+    assert router.intents == DEFAULT_INTENTS and router.has_intent("docker compose", "scope")
+
+    keywords_file.write_text(json.dumps({"scope": ["obsidian"]}), encoding="utf-8")
+    os.utime(keywords_file, (1, 1))
+    assert router.has_intent("sync my obsidian vault", "scope")
+
+    # A string would become one keyword per character: rejected, the current intents stay
+    keywords_file.write_text(json.dumps({"scope": "python"}), encoding="utf-8")
+    os.utime(keywords_file, (2, 2))
+    assert not router.has_intent("what is the weather today", "scope")
+    assert router.intents["scope"] == ["obsidian"]
+    for invalid in ({"scope": 5}, {"scope": ["vault", 3]}):
+        keywords_file.write_text(json.dumps(invalid), encoding="utf-8")
+        os.utime(keywords_file, (os.path.getmtime(keywords_file) + 1,) * 2)
+        assert router.has_intent("sync my obsidian vault", "scope") and router.intents["scope"] == ["obsidian"]
+
+def test_gatekeeper_uses_router_for_scope():
+    assert Gatekeeper.is_in_scope("How does the RAG pipeline work?")
+    assert Gatekeeper.get_routing_decision("¿Qué es Python?") == "direct"
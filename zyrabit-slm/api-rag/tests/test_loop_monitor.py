@@ -0,0 +1,57 @@
+import time
+import asyncio
+import logging
+import pytest
+from prometheus_client import REGISTRY
+from app.infrastructure.shared.loop_monitor import LoopLagMonitor
+
+
+def _lag_count():
+    return REGISTRY.get_sample_value("zyrabit_event_loop_lag_ms_count") or 0
+
+
+def _blocking_handler():
+    # Stand-in for a sync requests.post inside an async handler
+    time.sleep(0.25)
+
+
+@pytest.mark.asyncio
+async def test_lag_reflects_blocking_callbacks():
+    monitor = LoopLagMonitor(interval_ms=20, debug=False)
+    before = _lag_count()
+    monitor.start()
+    try:
+        await asyncio.sleep(0.1)
+        assert monitor.max_lag_ms < 100
+        _blocking_handler()
+        await asyncio.sleep(0.1)
+    finally:
+        await monitor.stop()
+    assert monitor.max_lag_ms >= 150
+    assert _lag_count() > before
+
+
+@pytest.mark.asyncio
+async def test_debug_mode_logs_the_blocking_stack_once(caplog):
+    monitor = LoopLagMonitor(interval_ms=20, debug=True, block_threshold_ms=50)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        with caplog.at_level(logging.WARNING, logger="zyrabit.api"):
+            _blocking_handler()
+            await asyncio.sleep(0.1)
+    finally:
+        await monitor.stop()
+
+    assert monitor.blocks_reported == 1
+    blocked = [r.getMessage() for r in caplog.records if "Event loop blocked" in r.getMessage()]
+    assert len(blocked) == 1 and "_blocking_handler" in blocked[0]
+
+
+@pytest.mark.asyncio
+async def test_idle_loop_reports_nothing():
+    monitor = LoopLagMonitor(interval_ms=10, debug=True, block_threshold_ms=100)
+    monitor.start()
+    await asyncio.sleep(0.15)
+    await monitor.stop()
+    assert monitor.blocks_reported == 0
@@ -0,0 +1,106 @@
+import os
+import sys
+import subprocess
+import pytest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+from prometheus_client import REGISTRY, CollectorRegistry, multiprocess
+from app.infrastructure.shared import metrics
+from app.ports.inference_port import InferenceResult
+# Imported at collection time: the autouse conftest fixture patches these module attributes
+from app.domain.use_cases.chat_use_case import ChatUseCase
+from app.infrastructure.persistence.chroma_adapter import DirectOllamaEmbeddings
+
+API_RAG_DIR = Path(__file__).resolve().parents[1]
+
+
+def _sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def _chat_use_case(result):
+    inference = MagicMock()
+    inference.generate.return_value = result
+    gatekeeper = MagicMock()
+    gatekeeper.mask_pii.return_value = ("hola", {})
+    gatekeeper.get_routing_decision.return_value = "direct"
+    cache = MagicMock()
+    cache.get.return_value = None
+    return ChatUseCase(inference, None, gatekeeper, cache)
+
+
+@pytest.mark.asyncio
+async def test_chat_counts_provider_reported_tokens(state_db):
+    labels = {"model": "qwen2.5:7b", "direction": "input"}
+    before_in = _sample("zyrabit_token_usage_total", labels)
+    before_out = _sample("zyrabit_token_usage_total", dict(labels, direction="output"))
+
+    result = InferenceResult(text="hola mundo", latency_seconds=0.2, provider="ollama", input_tokens=321, output_tokens=4)
+    await _chat_use_case(result).execute("hola", client_msg_id="metrics-reported")
+
+    assert _sample("zyrabit_token_usage_total", labels) == before_in + 321
+    assert _sample("zyrabit_token_usage_total", dict(labels, direction="output")) == before_out + 4
+    assert _sample("zyrabit_in_flight_requests", {"pipeline": "chat"}) == 0
+
+
+@pytest.mark.asyncio
+async def test_chat_falls_back_to_the_model_tokenizer(state_db):
+    labels = {"model": "qwen2.5:7b", "direction": "output"}
+    before = _sample("zyrabit_token_usage_total", labels)
+
+    use_case = _chat_use_case(InferenceResult(text="respuesta sin conteo del proveedor", latency_seconds=0.1, provider="x"))
+    await use_case.execute("hola", client_msg_id="metrics-fallback")
+
+    expected = use_case.context_manager.count_tokens("respuesta sin conteo del proveedor")
+    assert _sample("zyrabit_token_usage_total", labels) == before + expected
+
+
+def test_saved_vs_cloud_uses_the_multiplier():
+    labels = {"model": "unit-model", "direction": "saved_vs_cloud"}
+    before = _sample("zyrabit_token_usage_total", labels)
+    metrics.observe_token_usage("unit-model", 70, 30)
+    assert _sample("zyrabit_token_usage_total", labels) == before + int(100 * metrics.TOKEN_SAVINGS_MULTIPLIER) - 100
+
+
+def test_cache_gauges_are_sampled_on_refresh(monkeypatch):
+    monkeypatch.setattr(metrics, "_cache_sizers", {})
+    sizes = {"n": 3}
+    metrics.register_cache("unit_cache", lambda: sizes["n"])
+    metrics.register_cache("broken_cache", lambda: 1 / 0)
+    metrics.refresh_cache_gauges()
+    assert _sample("zyrabit_cache_entries", {"cache": "unit_cache"}) == 3
+    sizes["n"] = 7
+    assert _sample("zyrabit_cache_entries", {"cache": "unit_cache"}) == 3
+    metrics.refresh_cache_gauges()
+    assert _sample("zyrabit_cache_entries", {"cache": "unit_cache"}) == 7
+
+
+def test_embedding_throughput():
+    embeddings = DirectOllamaEmbeddings(model="unit-embed", base_url="http://slm")
+    before = _sample("zyrabit_embedded_texts_total", {"model": "unit-embed"})
+    response = MagicMock(status_code=200)
+    response.json.side_effect = lambda: {"embeddings": [[0.1]] * 5}
+    with patch("app.infrastructure.persistence.chroma_adapter.requests.post", return_value=response):
+        embeddings.embed_documents([f"doc {i}" for i in range(10)])
+    assert _sample("zyrabit_embedded_texts_total", {"model": "unit-embed"}) == before + 10
+    assert _sample("zyrabit_embedding_throughput_texts_per_second", {"model": "unit-embed"}) > 0
+
+
+def test_multiprocess_registry_aggregates_workers(tmp_path):
+    worker = (
+        "import sys\n"
+        "from app.infrastructure.shared import metrics\n"
+        "metrics.observe_token_usage('mp-model', 10, 5)\n"
+        "metrics.QUEUE_DEPTH.labels(queue='ingest').inc(2)\n"
+        "if sys.argv[1] == 'shutdown':\n"
+        "    metrics.mark_process_dead()\n"
+    )
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path), PYTHONPATH=str(API_RAG_DIR))
+    for mode in ("shutdown", "running"):
+        subprocess.run([sys.executable, "-c", worker, mode], env=env, check=True, cwd=API_RAG_DIR, capture_output=True)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=str(tmp_path))
+    assert registry.get_sample_value("zyrabit_token_usage_total", {"model": "mp-model", "direction": "input"}) == 20
+    # Counters survive worker exit; live gauges of a worker that shut down are dropped
+    assert registry.get_sample_value("zyrabit_queue_depth", {"queue": "ingest"}) == 2
@@ -77,6 +77,49 @@ def test_n8n_webhook_requires_text_field(client, monkeypatch):
     assert response.status_code == 400
     assert "text" in response.json()["detail"].lower()
 
+def test_n8n_anonymize_masks_batch(client, monkeypatch):
+    from app.main import app
+    from app.api.v1.endpoints.integrations import get_n8n_adapter
+    app.dependency_overrides[get_n8n_adapter] = _build_adapter
+    raw_body = b'{"texts":["mail john@example.com","nothing here"]}'
+    headers = {
+        "authorization": "Bearer test-token",
+        "x-zyrabit-signature": _signature("test-secret", raw_body),
+        "content-type": "application/json",
+    }
+
+    response = client.post(
+        "/v1/integrations/n8n/anonymize",
+        content=raw_body,
+        headers=headers,
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 2
+    assert data["results"][0]["sanitized_text"] == "mail <USER_EMAIL_1>"
+    assert data["results"][0]["token_map"] == {"<USER_EMAIL_1>": "john@example.com"}
+    assert data["results"][1]["token_map"] == {}
+
+def test_n8n_anonymize_requires_texts_list(client, monkeypatch):
+    from app.main import app
+    from app.api.v1.endpoints.integrations import get_n8n_adapter
+    app.dependency_overrides[get_n8n_adapter] = _build_adapter
+    raw_body = b'{"texts":"not a list"}'
+    headers = {
+        "authorization": "Bearer test-token",
+        "x-zyrabit-signature": _signature("test-secret", raw_body),
+        "content-type": "application/json",
+    }
+
+    response = client.post(
+        "/v1/integrations/n8n/anonymize",
+        content=raw_body,
+        headers=headers,
+    )
+    assert response.status_code == 400
+    assert "texts" in response.json()["detail"].lower()
+
 def test_n8n_policy_reads_secrets_from_file(monkeypatch, tmp_path):
     from app.infrastructure.integrations.n8n_adapter import N8nIntegrationPolicy
     token_path = tmp_path / "n8n_service_token"
@@ -0,0 +1,63 @@
+import sqlite3
+import pytest
+from unittest.mock import MagicMock
+from app.infrastructure.shared.state_tracker import SovereignStateManager
+from app.domain.services.obsidian_service import ObsidianService
+from app.domain.use_cases.ingest_use_case import IngestUseCase
+
+
+@pytest.fixture
+def vault(tmp_path, monkeypatch):
+    monkeypatch.setattr(SovereignStateManager, "DB_PATH", str(tmp_path / "state.db"))
+    monkeypatch.setattr(ObsidianService, "VAULT_PATH", tmp_path / "vault")
+    SovereignStateManager.init_db()
+    for i in range(30):
+        note = tmp_path / "vault" / f"area-{i % 3}" / f"nota-{i}.md"
+        note.parent.mkdir(parents=True, exist_ok=True)
+        note.write_text(f"# Nota {i}\n\nContenido soberano numero {i}.")
+    reflective = tmp_path / "vault" / "Reflective Notes"
+    reflective.mkdir(parents=True)
+    (reflective / "reflective_x.md").write_text("# Reflexion\n\nNo se indexa.")
+    return tmp_path / "vault"
+
+
+def _fts_paths():
+    with sqlite3.connect(SovereignStateManager.DB_PATH) as conn:
+        return {row[0] for row in conn.execute("SELECT file_path FROM fts_vault")}
+
+
+@pytest.mark.asyncio
+async def test_pipelined_sync_batches_embeddings_across_notes(vault):
+    vector_store = MagicMock()
+    stats = await ObsidianService.sync_vault(IngestUseCase(vector_store), concurrency=4, batch_size=8)
+
+    assert (stats["scanned"], stats["indexed"], stats["skipped"], stats["errors"]) == (30, 30, 0, 0)
+    assert stats["notes_per_sec"] > 0
+    sources = [{c.metadata["source"] for c in call.args[0]} for call in vector_store.add_documents.call_args_list]
+    assert len(sources) < 30 and max(len(s) for s in sources) <= 8
+    assert sum(len(s) for s in sources) == 30
+    assert len(_fts_paths()) == 30 and not any("Reflective Notes" in p for p in _fts_paths())
+    assert all(c.metadata["domain"] == "obsidian" for call in vector_store.add_documents.call_args_list for c in call.args[0])
+
+
+@pytest.mark.asyncio
+async def test_resync_only_touches_changed_notes(vault):
+    use_case = IngestUseCase(MagicMock())
+    await ObsidianService.sync_vault(use_case, concurrency=2, batch_size=4)
+
+    (vault / "area-1" / "nota-1.md").write_text("# Nota 1\n\nEditada.")
+    stats = await ObsidianService.sync_vault(use_case, concurrency=2, batch_size=4)
+    assert (stats["scanned"], stats["indexed"], stats["skipped"]) == (30, 1, 29)
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_counted_and_retried_next_sync(vault):
+    vector_store = MagicMock()
+    vector_store.add_documents.side_effect = [RuntimeError("Ollama down")] + [None] * 100
+    use_case = IngestUseCase(vector_store)
+
+    stats = await ObsidianService.sync_vault(use_case, concurrency=1, batch_size=30)
+    assert stats["errors"] >= 1 and stats["indexed"] + stats["errors"] == 30
+
+    retry = await ObsidianService.sync_vault(use_case, concurrency=1, batch_size=30)
+    assert retry["indexed"] == stats["errors"] and retry["errors"] == 0
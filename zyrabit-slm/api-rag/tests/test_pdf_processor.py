@@ -0,0 +1,71 @@
+import time
+import asyncio
+import multiprocessing
+import pytest
+import pymupdf
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from app.infrastructure.persistence.pdf_processor import PDFProcessor, page_ranges
+
+
+@pytest.fixture
+def sample_pdf(tmp_path):
+    path = tmp_path / "informe.pdf"
+    doc = pymupdf.open()
+    for i in range(3):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Capitulo {i}", fontsize=20)
+        for j in range(5):
+            page.insert_text((72, 110 + 20 * j), f"Linea {j} de la pagina {i}: el pipeline soberano.", fontsize=10)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_page_ranges_cover_every_page_in_order():
+    assert page_ranges(0, workers=4) == []
+    assert page_ranges(3, workers=4) == [[0], [1], [2]]
+    # Capped by max_pages, otherwise one range per worker
+    assert page_ranges(10, workers=2, max_pages=8) == [[0, 1, 2, 3, 4], [5, 6, 7, 8, 9]]
+    ranges = page_ranges(100, workers=4, max_pages=8)
+    assert max(len(r) for r in ranges) == 8
+    assert [p for r in ranges for p in r] == list(range(100))
+
+
+@pytest.mark.asyncio
+async def test_parallel_ranges_match_the_sequential_conversion(sample_pdf):
+    sequential = PDFProcessor.to_markdown_documents(sample_pdf)[0]
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        parallel = (await PDFProcessor.to_markdown_documents_async(sample_pdf, executor=executor))[0]
+    assert parallel.page_content == sequential.page_content
+    assert parallel.page_content.index("Capitulo 0") < parallel.page_content.index("Capitulo 2")
+    assert parallel.metadata == {"source": sample_pdf, "format": "markdown"}
+
+
+@pytest.mark.asyncio
+async def test_process_pool_keeps_the_event_loop_responsive(sample_pdf):
+    ticks = 0
+
+    async def heartbeat():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        beat = asyncio.create_task(heartbeat())
+        start = time.perf_counter()
+        text = await PDFProcessor.convert_pdf(sample_pdf, executor, workers=2)
+        elapsed = time.perf_counter() - start
+        beat.cancel()
+
+    assert "Capitulo 1" in text
+    # The loop kept ticking for most of the conversion
+    assert ticks >= elapsed / 0.01 * 0.5
+
+
+@pytest.mark.asyncio
+async def test_unsupported_extension(tmp_path):
+    path = tmp_path / "notas.txt"
+    path.write_text("hola")
+    with pytest.raises(RuntimeError, match="Unsupported extension"):
+        await PDFProcessor.to_markdown_documents_async(str(path))
@@ -1,5 +1,6 @@
 from app.core.security.pii_pipeline import (
     anonymize_text,
+    anonymize_many,
     deanonymize_text,
     is_luhn_valid,
     build_shards,
@@ -8,7 +9,10 @@ from app.core.security.pii_pipeline import (
     build_default_pipeline,
     PipelineContext,
     EntitySpan,
-    ShardAnonymizationInterceptor
+    ShardAnonymizationInterceptor,
+    StreamingDeanonymizer,
+    stream_deanonymize,
+    RECORD_SEPARATOR
 )
 
 def test_luhn_validity():
@@ -103,3 +107,56 @@ def test_pipeline_context_init():
     ctx = PipelineContext()
     assert ctx.detected_entities["email"] == 0
     assert isinstance(ctx.token_map, dict)
+
+def test_anonymize_many_matches_single_calls():
+    texts = [
+        "My name is John Doe, email john@example.com",
+        "",
+        "no pii here",
+        "card 4242424242424242 and $1,000 then $2,500.00",
+        "Contact +1 (415) 555-1234, SSN 123-45-6789",
+    ]
+    batch = anonymize_many(texts)
+    assert len(batch) == len(texts)
+    for text, res in zip(texts, batch):
+        single = anonymize_text(text)
+        assert res.sanitized_text == single.sanitized_text
+        assert res.token_map == single.token_map
+        assert res.detected_entities == single.detected_entities
+
+def test_anonymize_many_numbers_placeholders_per_record():
+    batch = anonymize_many(["a@b.com", "c@d.com x@y.com"])
+    assert batch[0].sanitized_text == "<USER_EMAIL_1>"
+    assert batch[1].sanitized_text == "<USER_EMAIL_2> <USER_EMAIL_1>"
+    assert deanonymize_text(batch[1].sanitized_text, batch[1].token_map) == "c@d.com x@y.com"
+
+def test_anonymize_many_falls_back_when_separator_present():
+    texts = [f"a@b.com{RECORD_SEPARATOR}c@d.com", "John Doe"]
+    batch = anonymize_many(texts)
+    assert batch[0].detected_entities["email"] == 2
+    assert batch[1].sanitized_text == "<USER_NAME_1>"
+    assert anonymize_many([]) == []
+
+def test_stream_deanonymize_matches_batch_for_any_chunking():
+    res = anonymize_text("John Doe <john@example.com> paid 4242424242424242, a<b > c")
+    sanitized = res.sanitized_text
+    expected = deanonymize_text(sanitized, res.token_map)
+    for size in range(1, len(sanitized) + 1):
+        chunks = [sanitized[i:i + size] for i in range(0, len(sanitized), size)]
+        assert "".join(stream_deanonymize(chunks, res.token_map)) == expected
+
+def test_streaming_deanonymizer_buffers_only_placeholder_prefixes():
+    stream = StreamingDeanonymizer({"<USER_EMAIL_1>": "a@b.com"})
+    assert stream.feed("hola <USER_") == "hola "
+    assert stream.feed("EMAIL_1> y") == "a@b.com y"
+    # "<x" can never become a placeholder, so it is emitted immediately
+    assert stream.feed(" 3 <x") == " 3 <x"
+    assert stream.feed(" <USER") == " "
+    assert stream.flush() == "<USER"
+
+def test_interceptor_process_response_stream():
+    interceptor = ShardAnonymizationInterceptor()
+    context = PipelineContext()
+    sanitized = interceptor.process_request("email test@test.com", context)
+    chunks = [sanitized[i:i + 3] for i in range(0, len(sanitized), 3)]
+    assert "".join(interceptor.process_response_stream(chunks, context)) == "email test@test.com"
@@ -0,0 +1,43 @@
+import sqlite3
+from unittest.mock import patch
+from app.infrastructure.shared.state_tracker import SovereignStateManager
+
+
+def test_profile_cache_hit_skips_profile_query(state_db):
+    SovereignStateManager.update_user_profile("Ana", "CTO", "rag")
+    assert SovereignStateManager.get_user_profile()["name"] == "Ana"
+
+    with patch.object(SovereignStateManager, "_load_user_profile", side_effect=AssertionError("cache miss")):
+        for _ in range(3):
+            assert SovereignStateManager.get_user_profile()["role"] == "CTO"
+        # Unrelated commits (chat turns) bump data_version but not the profile version
+        SovereignStateManager.store_message("s", "user", "hola")
+        assert SovereignStateManager.get_user_profile()["name"] == "Ana"
+
+
+def test_profile_update_invalidates_cache(state_db):
+    SovereignStateManager.update_user_profile("Ana", "CTO", "rag")
+    first = SovereignStateManager.get_user_profile()
+    first["name"] = "mutated by caller"
+
+    SovereignStateManager.update_user_profile("Ana", "CEO", "rag", persona="sales")
+    profile = SovereignStateManager.get_user_profile()
+    assert (profile["name"], profile["role"], profile["persona"]) == ("Ana", "CEO", "sales")
+    assert profile["version"] == 2
+
+
+def test_profile_change_from_another_worker_is_detected(state_db):
+    SovereignStateManager.update_user_profile("Ana", "CTO", "rag")
+    assert SovereignStateManager.get_user_profile()["tone"] == "professional"
+
+    # Simulates another worker process: its own connection, no in-process invalidation
+    with sqlite3.connect(SovereignStateManager.DB_PATH) as conn:
+        conn.execute("UPDATE user_profile SET tone = 'casual', version = version + 1 WHERE id = 1")
+
+    assert SovereignStateManager.get_user_profile()["tone"] == "casual"
+
+
+def test_empty_profile_is_cached_until_onboarding(state_db):
+    assert SovereignStateManager.get_user_profile() == {}
+    SovereignStateManager.update_user_profile("Ana", "CTO", "rag")
+    assert SovereignStateManager.get_user_profile()["onboarding_completed"] == 1
@@ -0,0 +1,92 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from app.domain.services.semantic_router import SemanticRouter
+from app.infrastructure.persistence.chroma_adapter import DirectOllamaEmbeddings
+
+VOCAB = ["vault", "notas", "documento", "notes", "pdf", "chiste", "hola", "capital", "haiku", "docker"]
+
+
+class FakeEmbeddings:
+    """Bag-of-words embeddings over a tiny vocabulary."""
+
+    def __init__(self):
+        self.query_calls = 0
+
+    def _vec(self, text):
+        t = text.lower()
+        return [float(t.count(w)) for w in VOCAB]
+
+    def embed_documents(self, texts):
+        return [self._vec(t) for t in texts]
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        return self._vec(text)
+
+
+EXEMPLARS = {
+    "rag": ["busca en mis notas del vault", "resume el documento pdf", "search my notes"],
+    "direct": ["hola", "cuéntame un chiste", "capital of france", "write a haiku"],
+}
+
+
+def _router():
+    router = SemanticRouter(FakeEmbeddings(), exemplars=EXEMPLARS, min_similarity=0.3, min_margin=0.05)
+    router.fit()
+    return router
+
+
+def test_semantic_router_overrides_keyword_decision():
+    router = _router()
+    # Spanish vault question with no scope keyword goes to RAG
+    assert router.route("¿Qué dicen mis notas del vault?", fallback="direct")["route"] == "rag"
+    # Chit-chat that happens to mention docker skips retrieval
+    decision = router.route("hola, cuéntame un chiste sobre docker", fallback="rag")
+    assert decision["route"] == "direct"
+    assert decision["strategy"] == "semantic"
+
+
+def test_semantic_router_falls_back_when_not_confident():
+    router = _router()
+    decision = router.route("something unrelated", fallback="rag")
+    assert decision == {"route": "rag", "strategy": "keyword", "scores": {"rag": 0.0, "direct": 0.0}}
+
+
+def test_semantic_router_falls_back_when_embeddings_fail():
+    router = _router()
+    router.embeddings.embed_query = MagicMock(side_effect=RuntimeError("ollama down"))
+    assert router.route("mis notas", fallback="direct")["route"] == "direct"
+    assert SemanticRouter(FakeEmbeddings()).route("mis notas", fallback="rag")["strategy"] == "keyword"
+
+
+def test_query_embedding_is_reused_between_routing_and_search():
+    embeddings = DirectOllamaEmbeddings(model="m", base_url="http://localhost:11434")
+    with patch.object(embeddings, "_embed", return_value=[[0.1, 0.2]]) as embed:
+        first = embeddings.embed_query("mis notas")
+        second = embeddings.embed_query("mis notas")
+    assert first == second
+    embed.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_chat_use_case_skips_retrieval_on_semantic_direct_route(monkeypatch, tmp_path):
+    from app.domain.use_cases.chat_use_case import ChatUseCase
+    from app.infrastructure.shared.state_tracker import SovereignStateManager
+    monkeypatch.setattr(SovereignStateManager, "DB_PATH", str(tmp_path / "state.db"))
+    SovereignStateManager.init_db()
+
+    inference = MagicMock()
+    inference.generate.return_value = MagicMock(text="ok", latency_seconds=0.1)
+    retriever = MagicMock()
+    gatekeeper = MagicMock()
+    gatekeeper.mask_pii.return_value = ("hola, cuéntame un chiste sobre docker", {})
+    gatekeeper.get_routing_decision.return_value = "rag"
+    cache = MagicMock()
+    cache.get.return_value = None
+
+    use_case = ChatUseCase(inference, retriever, gatekeeper, cache, semantic_router=_router())
+    result = await use_case.execute("hola, cuéntame un chiste sobre docker", history=[])
+
+    assert result["metadata"]["decision"] == "direct"
+    assert result["metadata"]["route_strategy"] == "semantic"
+    retriever.search.assert_not_called()
@@ -0,0 +1,116 @@
+import pytest
+import pymupdf
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+from langchain_core.documents import Document
+from app.infrastructure.shared.state_tracker import SovereignStateManager
+from app.infrastructure.persistence import pdf_processor
+from app.infrastructure.persistence.pdf_processor import PDFProcessor, _markdown_parts
+from app.domain.services.document_chunker import DocumentChunker, PartChunker
+from app.domain.use_cases import ingest_use_case
+from app.domain.use_cases.ingest_use_case import IngestUseCase
+from tests.benchmarks.reingest_bench import SimulatedVectorStore, section, write_note
+
+
+@pytest.fixture
+def streaming(monkeypatch):
+    """Every file is streamed, in parts of about 2KB."""
+    monkeypatch.setattr(ingest_use_case, "INGEST_STREAM_THRESHOLD_MB", 0)
+    monkeypatch.setattr(pdf_processor, "STREAM_PART_BYTES", 2048)
+
+
+class RecordingStore(SimulatedVectorStore):
+    def __init__(self, events):
+        super().__init__(0, 0)
+        self.events = events
+
+    def add_documents(self, chunks, ids=None):
+        self.events.append(("embed", len(chunks)))
+        super().add_documents(chunks, ids)
+
+
+def test_part_chunker_matches_the_whole_document(tmp_path):
+    note = tmp_path / "informe.md"
+    write_note(note, 30)
+    text = note.read_text(encoding="utf-8")
+    chunker = DocumentChunker()
+    whole = chunker.split([Document(page_content=text, metadata={"source": "informe.md"})])
+
+    parts = list(_markdown_parts(str(note), 2048))
+    assert len(parts) > 5 and "".join(parts) == text
+    # Parts are cut before a header, so sections are never split between parts
+    assert all(part.startswith("#") for part in parts)
+    part_chunker = PartChunker(chunker)
+    streamed = [chunk for part in parts for chunk in part_chunker.split(Document(page_content=part, metadata={"source": "informe.md"}))]
+    assert [chunk.metadata for chunk in streamed] == [chunk.metadata for chunk in whole]
+    # The top-level header stays open across parts
+    assert all(chunk.metadata["Header 1"] == "Informe" for chunk in streamed)
+
+
+@pytest.mark.asyncio
+async def test_streamed_ingest_embeds_part_by_part(state_db, streaming, tmp_path, monkeypatch):
+    events = []
+    store = RecordingStore(events)
+    ingest = IngestUseCase(store, MagicMock())
+    index_part = SovereignStateManager.index_fts_part
+    monkeypatch.setattr(
+        SovereignStateManager, "index_fts_part", lambda *args: (events.append(("part", 1)), index_part(*args))[1]
+    )
+    note = tmp_path / "informe.md"
+    write_note(note, 40)
+
+    result = await ingest.execute(str(note))
+    assert result["status"] == "success" and result["chunks"] == len(store.chunks) == result["embedded"]
+    assert set(store.chunks) == SovereignStateManager.indexed_chunk_ids([str(note)])[str(note)]
+    # Embedding starts before the last part is read, in batches no larger than BULK_INGEST_BATCH_CHUNKS
+    kinds = [kind for kind, _ in events]
+    assert kinds.index("embed") < len(kinds) - 1 - kinds[::-1].index("part")
+    assert max(count for kind, count in events if kind == "embed") <= ingest_use_case.BULK_INGEST_BATCH_CHUNKS
+    # Every part reached FTS5, the last one included
+    assert SovereignStateManager.search_fts("Seccion 39")[0]["file_path"] == str(note)
+
+    # Editing one section re-embeds only its chunks and drops the old ones
+    write_note(note, 40, edited=[7])
+    events.clear()
+    again = await ingest.execute(str(note))
+    edited = len(DocumentChunker().split([Document(page_content=section(7, 1), metadata={})]))
+    assert again["status"] == "success" and again["embedded"] == edited and again["reused"] == again["chunks"] - edited
+    assert len(store.chunks) == again["chunks"]
+    assert set(store.chunks) == SovereignStateManager.indexed_chunk_ids([str(note)])[str(note)]
+
+
+@pytest.mark.asyncio
+async def test_stream_without_parts_clears_the_previous_version(state_db, streaming, tmp_path, monkeypatch):
+    store = SimulatedVectorStore(0, 0)
+    ingest = IngestUseCase(store, MagicMock())
+    note = tmp_path / "informe.md"
+    write_note(note, 3)
+    await ingest.execute(str(note))
+    assert SovereignStateManager.search_fts("Seccion")
+
+    async def no_parts(file_path):
+        return
+        yield
+
+    monkeypatch.setattr(PDFProcessor, "iter_parts", no_parts)
+    note.write_text("# Informe\n\nOtro contenido.\n", encoding="utf-8")
+    result = await ingest.execute(str(note))
+    assert result["status"] == "success" and result["chunks"] == 0 and not store.chunks
+    assert SovereignStateManager.search_fts("Seccion") == []
+
+
+@pytest.mark.asyncio
+async def test_pdf_parts_come_in_page_order(tmp_path):
+    path = str(tmp_path / "libro.pdf")
+    doc = pymupdf.open()
+    for i in range(7):
+        doc.new_page().insert_text((72, 72), f"Pagina numero {i}", fontsize=12)
+    doc.save(path)
+    doc.close()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        parts = [part async for part in PDFProcessor.iter_parts(path, executor, pages_per_part=3, lookahead=2)]
+        whole = await PDFProcessor.convert_pdf(path, executor)
+    assert len(parts) == 3 and all(part.metadata["source"] == path for part in parts)
+    assert "".join(part.page_content for part in parts) == whole
+    assert "Pagina numero 6" in parts[-1].page_content and "Pagina numero 6" not in parts[1].page_content
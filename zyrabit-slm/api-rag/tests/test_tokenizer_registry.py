@@ -0,0 +1,100 @@
+import threading
+from unittest.mock import MagicMock, patch
+
+from app.domain.services.context_manager import ContextManager
+from app.infrastructure.inference.tokenizer_registry import (
+    ApproximateTokenizer,
+    TokenizerRegistry,
+    model_family,
+    parse_context_windows,
+)
+
+
+def test_model_family_and_window_parsing():
+    assert model_family("qwen2.5:7b") == "qwen"
+    assert model_family("library/llama3:8b") == "llama"
+    assert model_family("gemini-1.5-flash-latest") == "gemini"
+    assert parse_context_windows("qwen2.5:7b=32768, gemini=1048576,broken,x=y") == {
+        "qwen2.5:7b": 32768,
+        "gemini": 1048576,
+    }
+
+
+def test_approximate_tokenizer_counts_words_and_punctuation():
+    tok = ApproximateTokenizer(chars_per_token=4.0)
+    assert tok.count("") == 0
+    assert tok.count("hola, sol!") == 4
+    # 13 chars -> 1 + 12 // 4
+    assert tok.count("infraestructu") == 4
+
+
+def test_approximate_tokenizer_calibrates_against_reference():
+    samples = ["la arquitectura soberana procesa documentos locales"] * 3
+    reference = lambda text: len(text) // 3
+    tok = ApproximateTokenizer.calibrate(samples, reference)
+    estimate = sum(tok.count(s) for s in samples)
+    target = sum(reference(s) for s in samples)
+    assert abs(estimate - target) / target < 0.15
+
+
+def test_registry_loads_local_hf_tokenizer(tmp_path):
+    from tokenizers import Tokenizer, models, pre_tokenizers
+
+    hf = Tokenizer(models.WordLevel({"hola": 0, "mundo": 1, "[UNK]": 2}, unk_token="[UNK]"))
+    hf.pre_tokenizer = pre_tokenizers.Whitespace()
+    (tmp_path / "qwen2.5-7b").mkdir()
+    hf.save(str(tmp_path / "qwen2.5-7b" / "tokenizer.json"))
+
+    registry = TokenizerRegistry(tokenizer_dir=str(tmp_path), ollama_url="")
+    tok = registry.tokenizer("qwen2.5:7b")
+    assert tok.name == "hf:qwen2.5:7b"
+    assert tok.count("hola mundo otra") == 3
+    assert registry.tokenizer("qwen2.5:7b") is tok
+
+    # No files for this model -> calibrated approximation, never a mock
+    assert isinstance(registry.tokenizer("llama3:8b"), ApproximateTokenizer)
+
+
+def test_context_window_resolution_order():
+    registry = TokenizerRegistry(tokenizer_dir="", context_windows={"qwen2.5:7b": 32768}, ollama_url="", default_window=4096)
+    assert registry.context_window("qwen2.5:7b") == 32768
+    assert registry.context_window("gemini-1.5-flash-latest") == 1_048_576
+    assert registry.context_window("mistral:7b") == 4096
+
+
+def test_context_window_from_ollama_show():
+    registry = TokenizerRegistry(tokenizer_dir="", ollama_url="http://ollama:11434", default_window=4096)
+    native = MagicMock(status_code=200)
+    native.json.return_value = {"model_info": {"qwen2.context_length": 32768}, "parameters": ""}
+    explicit = MagicMock(status_code=200)
+    explicit.json.return_value = {"model_info": {"llama.context_length": 131072}, "parameters": "num_ctx 16384\nstop \"<|eot|>\""}
+
+    with patch("app.infrastructure.inference.tokenizer_registry.requests.post", side_effect=[native, explicit]) as post:
+        # Native length is capped by Ollama's runtime default; explicit num_ctx wins
+        assert registry.context_window("qwen2.5:7b") == 4096
+        assert registry.context_window("llama3:8b") == 16384
+        assert registry.context_window("llama3:8b") == 16384
+    assert post.call_count == 2
+
+
+def test_budgets_scale_with_context_window():
+    small = ContextManager("qwen2.5:7b", registry=TokenizerRegistry(tokenizer_dir="", ollama_url="", default_window=4096))
+    assert small.budgets()["memory"] == ContextManager.MEMORY_RESERVE
+    assert small.budgets()["rag"] == ContextManager.RAG_RESERVE
+
+    large = ContextManager("qwen2.5:7b", registry=TokenizerRegistry(tokenizer_dir="", context_windows={"qwen": 32768}, ollama_url=""))
+    budgets = large.budgets()
+    assert budgets["memory"] + budgets["rag"] == 32768 - ContextManager.SYSTEM_RESERVE - ContextManager.TOOLS_RESERVE
+    assert budgets["rag"] > budgets["memory"] > ContextManager.MEMORY_RESERVE
+
+
+async def test_first_use_of_a_model_resolves_its_window_off_the_event_loop(monkeypatch):
+    threads = []
+    monkeypatch.setattr(ContextManager, "_instances", {})
+    monkeypatch.setattr(
+        TokenizerRegistry, "_ollama_window", lambda self, model: threads.append(threading.current_thread()) or 8192
+    )
+    manager = await ContextManager.for_model_async("mistral:7b-ollama-only")
+    assert threads and threads[0] is not threading.main_thread()
+    assert manager.registry.context_window("mistral:7b-ollama-only") == 8192
+    assert await ContextManager.for_model_async("mistral:7b-ollama-only") is manager and len(threads) == 1
@@ -0,0 +1,126 @@
+import json
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+from langchain_core.documents import Document
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from app.infrastructure.shared import tracing
+from app.infrastructure.shared.state_tracker import SovereignStateManager
+# Imported at collection time: the autouse conftest fixture patches these module attributes
+from app.domain.use_cases.chat_use_case import ChatUseCase
+from app.domain.services.retriever_service import HybridRetrieverService
+from app.infrastructure.inference.ollama_inference_adapter import OllamaInferenceAdapter
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemorySpanExporter()
+    assert tracing.setup_tracing(enabled=True, exporter=exporter, sample_ratio=1.0, batch=False)
+    yield exporter
+    tracing.shutdown_tracing()
+
+
+def _by_name(exporter):
+    return {s.name: s for s in exporter.get_finished_spans()}
+
+
+def test_spans_are_no_ops_when_disabled():
+    assert tracing.setup_tracing(enabled=False) is False
+    with tracing.span("anything", model="x") as current:
+        assert current is None
+        tracing.set_attributes(tokens=1)
+    assert tracing.capture_context() is None
+
+
+def test_nested_spans_share_the_trace(exporter):
+    with tracing.span("parent", model="qwen2.5:7b", skipped=None):
+        with tracing.span("child"):
+            tracing.set_attributes(rag_hits=2)
+    spans = _by_name(exporter)
+    assert spans["child"].parent.span_id == spans["parent"].context.span_id
+    assert spans["parent"].attributes == {"model": "qwen2.5:7b"}
+    assert spans["child"].attributes["rag_hits"] == 2
+
+
+def test_zero_sample_ratio_records_nothing():
+    exporter = InMemorySpanExporter()
+    tracing.setup_tracing(enabled=True, exporter=exporter, sample_ratio=0.0, batch=False)
+    try:
+        with tracing.span("root"):
+            with tracing.span("child"):
+                tracing.set_attributes(tokens=10)
+    finally:
+        tracing.shutdown_tracing()
+    assert exporter.get_finished_spans() == ()
+
+
+@pytest.mark.asyncio
+async def test_context_reaches_tasks_threads_and_deferred_work(exporter):
+    def in_thread():
+        with tracing.span("thread"):
+            pass
+
+    async def deferred(parent):
+        with tracing.span("background", parent=parent):
+            pass
+
+    with tracing.span("request"):
+        await asyncio.create_task(asyncio.to_thread(in_thread))
+        captured = tracing.capture_context()
+    # Runs after the request span ended, like FastAPI BackgroundTasks
+    await deferred(captured)
+
+    spans = _by_name(exporter)
+    request_id = spans["request"].context.span_id
+    assert spans["thread"].parent.span_id == request_id
+    assert spans["background"].parent.span_id == request_id
+    assert spans["background"].context.trace_id == spans["request"].context.trace_id
+
+
+def test_file_exporter_writes_json_lines(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracing.setup_tracing(enabled=True, exporter=tracing.JsonlFileSpanExporter(str(path)), sample_ratio=1.0, batch=False)
+    try:
+        with tracing.span("one", model="m"):
+            pass
+        with tracing.span("two"):
+            pass
+    finally:
+        tracing.shutdown_tracing()
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["name"] for r in rows] == ["one", "two"]
+    assert rows[0]["attributes"] == {"model": "m"}
+
+
+@pytest.mark.asyncio
+async def test_chat_pipeline_spans(exporter, tmp_path, monkeypatch):
+    monkeypatch.setattr(SovereignStateManager, "DB_PATH", str(tmp_path / "state.db"))
+    SovereignStateManager.init_db()
+
+    retriever = HybridRetrieverService.__new__(HybridRetrieverService)
+    retriever.ensemble_retriever = None
+    retriever.vector_store = MagicMock()
+    retriever.vector_store.similarity_search.return_value = [Document(page_content="nota", metadata={"source": "a.md"})]
+    gatekeeper = MagicMock()
+    gatekeeper.mask_pii.return_value = ("que dice la nota", {})
+    gatekeeper.get_routing_decision.return_value = "rag"
+    cache = MagicMock()
+    cache.get.return_value = None
+
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"response": "dice hola", "prompt_eval_count": 120, "eval_count": 7}
+    with patch("app.infrastructure.inference.ollama_inference_adapter.requests.post", return_value=response):
+        use_case = ChatUseCase(OllamaInferenceAdapter("http://slm/api/generate"), retriever, gatekeeper, cache)
+        await use_case.execute("que dice la nota", client_msg_id="trace")
+
+    spans = _by_name(exporter)
+    chat = spans["chat_use_case.execute"]
+    assert spans["retriever.search"].parent.span_id == chat.context.span_id
+    assert spans["inference.generate"].parent.span_id == chat.context.span_id
+    assert chat.attributes["decision"] == "rag"
+    assert chat.attributes["rag_hits"] == 1
+    assert chat.attributes["cache_hit"] is False
+    assert chat.attributes["tokens.response"] > 0
+    assert spans["retriever.search"].attributes["retrieval.path"] == "vector"
+    assert spans["inference.generate"].attributes["tokens.prompt"] == 120
+    assert spans["inference.generate"].attributes["tokens.completion"] == 7
@@ -0,0 +1,84 @@
+import os
+import hashlib
+import pytest
+from io import BytesIO
+from unittest.mock import AsyncMock, patch
+from fastapi import HTTPException
+from app.infrastructure.shared.state_tracker import SovereignStateManager
+from app.api.v1.endpoints.documents import stream_upload
+
+
+class RecordingUpload:
+    """Minimal UploadFile: records every read size."""
+
+    def __init__(self, data: bytes):
+        self._buffer = BytesIO(data)
+        self.reads = []
+
+    async def read(self, size: int = -1) -> bytes:
+        self.reads.append(size)
+        return self._buffer.read(size)
+
+
+@pytest.mark.asyncio
+async def test_stream_upload_reads_in_chunks_and_hashes_on_the_fly(tmp_path):
+    data = os.urandom(10_000)
+    upload = RecordingUpload(data)
+    tmp, file_hash, size = await stream_upload(upload, str(tmp_path), max_bytes=20_000, chunk_size=4096)
+
+    assert upload.reads == [4096] * 4  # never a whole-body read
+    assert size == len(data) and file_hash == hashlib.sha256(data).hexdigest()
+    with open(tmp, "rb") as f:
+        assert f.read() == data
+
+
+@pytest.mark.asyncio
+async def test_stream_upload_stops_at_the_size_limit(tmp_path):
+    upload = RecordingUpload(b"x" * 10_000)
+    with pytest.raises(HTTPException) as exc:
+        await stream_upload(upload, str(tmp_path), max_bytes=5_000, chunk_size=1024)
+    assert exc.value.status_code == 413
+    # Aborted after the chunk that crossed the limit; nothing left on disk
+    assert len(upload.reads) == 5
+    assert os.listdir(tmp_path) == []
+
+
+@patch("app.domain.use_cases.ingest_use_case.IngestUseCase.execute", new_callable=AsyncMock)
+def test_ingest_endpoint_moves_the_upload_and_passes_its_hash(mock_execute, client, tmp_path, monkeypatch):
+    monkeypatch.setattr(SovereignStateManager, "DB_PATH", str(tmp_path / "state.db"))
+    SovereignStateManager.init_db()
+    docs = tmp_path / "docs"
+    content = b"# Vault\n\nNotas soberanas." * 100
+
+    with patch("app.api.v1.endpoints.documents.DOCS_DIR", str(docs)):
+        response = client.post("/v1/ingest", files={"file": ("../../notas.md", BytesIO(content), "text/markdown")})
+        assert response.status_code == 200
+        assert [d["filename"] for d in client.get("/v1/documents").json()["documents"]] == ["notas.md"]
+
+    assert os.listdir(docs) == ["notas.md"]
+    assert (docs / "notas.md").read_bytes() == content
+    job = SovereignStateManager.get_ingest_job(response.json()["job_id"])
+    assert job["file_hash"] == hashlib.sha256(content).hexdigest()
+
+
+def test_ingest_endpoint_rejects_oversized_uploads(client, tmp_path):
+    with patch("app.api.v1.endpoints.documents.DOCS_DIR", str(tmp_path)), \
+            patch("app.api.v1.endpoints.documents.MAX_FILE_SIZE_BYTES", 1024):
+        response = client.post("/v1/ingest", files={"file": ("big.pdf", BytesIO(b"%" * 4096), "application/pdf")})
+    assert response.status_code == 413
+    assert os.listdir(tmp_path) == []
+
+
+def test_known_hash_skips_rereading_the_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(SovereignStateManager, "DB_PATH", str(tmp_path / "state.db"))
+    SovereignStateManager.init_db()
+    path = tmp_path / "a.md"
+    path.write_text("hola")
+    digest = hashlib.sha256(b"hola").hexdigest()
+
+    with patch.object(SovereignStateManager, "get_file_hash", side_effect=AssertionError("re-read")):
+        assert SovereignStateManager.needs_reindexing(str(path), file_hash=digest)
+        SovereignStateManager.update_vault_index(str(path), 1, "hola", file_hash=digest)
+        assert not SovereignStateManager.needs_reindexing(str(path), file_hash=digest)
+    # Same result as hashing the file
+    assert not SovereignStateManager.needs_reindexing(str(path))
@@ -0,0 +1,62 @@
+import os
+import pytest
+from unittest.mock import MagicMock, patch
+from app.infrastructure.shared.state_tracker import SovereignStateManager
+from app.domain.use_cases.ingest_use_case import IngestUseCase
+
+
+@pytest.fixture
+def hash_calls():
+    original = SovereignStateManager.get_file_hash
+    with patch.object(SovereignStateManager, "get_file_hash", side_effect=original) as spy:
+        yield spy
+
+
+def test_unchanged_file_is_not_hashed(state_db, tmp_path, hash_calls):
+    note = tmp_path / "nota.md"
+    note.write_text("# Nota\n\ncontenido")
+    SovereignStateManager.update_vault_index(str(note), 1)
+    hash_calls.reset_mock()
+
+    assert not SovereignStateManager.needs_reindexing(str(note))
+    assert not SovereignStateManager.check_file(str(note), indexed=SovereignStateManager.vault_fingerprints()).changed
+    assert hash_calls.call_count == 0
+
+
+def test_touched_file_is_hashed_once_then_fast(state_db, tmp_path, hash_calls):
+    note = tmp_path / "nota.md"
+    note.write_text("# Nota\n\ncontenido")
+    SovereignStateManager.update_vault_index(str(note), 1)
+    st = os.stat(note)
+    os.utime(note, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    hash_calls.reset_mock()
+
+    assert not SovereignStateManager.needs_reindexing(str(note))
+    assert not SovereignStateManager.needs_reindexing(str(note))
+    assert hash_calls.call_count == 1
+
+
+def test_edit_is_detected_even_with_same_size(state_db, tmp_path):
+    note = tmp_path / "nota.md"
+    note.write_text("version A")
+    SovereignStateManager.update_vault_index(str(note), 1)
+    st = os.stat(note)
+    note.write_text("version B")
+    os.utime(note, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    check = SovereignStateManager.check_file(str(note))
+    assert check.changed and check.stat[1] == st.st_size
+    assert not SovereignStateManager.needs_reindexing(str(tmp_path / "missing.md"))
+
+
+@pytest.mark.asyncio
+async def test_ingest_hashes_each_file_once(state_db, tmp_path, hash_calls):
+    note = tmp_path / "nota.md"
+    note.write_text("# Titulo\n\nUn parrafo del vault soberano.")
+    use_case = IngestUseCase(vector_store=MagicMock())
+
+    assert (await use_case.execute(str(note)))["status"] == "success"
+    assert hash_calls.call_count == 1
+    # Second run: stat fingerprint matches, nothing is read
+    assert (await use_case.execute(str(note)))["status"] == "skipped"
+    assert hash_calls.call_count == 1
@@ -0,0 +1,188 @@
+import time
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from langchain_core.documents import Document
+from app.infrastructure.shared.state_tracker import SovereignStateManager
+from app.domain.services.ingest_queue import IngestJobQueue
+from app.domain.services.vault_watcher import WATCHFILES_AVAILABLE, VaultWatcher
+from app.domain.use_cases.ingest_use_case import IngestUseCase
+# Imported at collection time: the autouse conftest fixture patches this module attribute
+from app.domain.services.retriever_service import HybridRetrieverService
+
+
+@pytest.fixture
+def docs(tmp_path):
+    root = tmp_path / "docs"
+    (root / "obsidian").mkdir(parents=True)
+    return root
+
+
+class RecordingQueue:
+    """Stands in for IngestJobQueue.submit."""
+
+    def __init__(self):
+        self.submitted = []
+        self.event = asyncio.Event()
+
+    async def submit(self, file_path, filename, domain="general", file_hash=None, action="ingest"):
+        self.submitted.append((action, file_path, domain))
+        self.event.set()
+
+    async def next_batch(self, timeout=5):
+        await asyncio.wait_for(self.event.wait(), timeout)
+        await asyncio.sleep(0.05)
+        batch, self.submitted = sorted(self.submitted), []
+        self.event.clear()
+        return batch
+
+
+def _watcher(queue, docs, **kwargs):
+    kwargs.setdefault("debounce_ms", 100)
+    kwargs.setdefault("poll_seconds", 0.05)
+    return VaultWatcher(queue, roots=[docs, docs / "obsidian"], vault_path=docs / "obsidian", **kwargs)
+
+
+def test_roots_and_filters(state_db, docs):
+    watcher = _watcher(RecordingQueue(), docs)
+    # The vault is nested in DOCS_DIR: a single watch
+    assert watcher.roots == [str(docs)]
+    assert watcher._watched(str(docs / "obsidian" / "nota.md"))
+    assert watcher._watched(str(docs / "informe.PDF"))
+    assert not watcher._watched(str(docs / "notas.txt"))
+    assert not watcher._watched(str(docs / ".upload-abc.pdf"))
+    assert not watcher._watched(str(docs / "obsidian" / ".obsidian" / "workspace.md"))
+    assert not watcher._watched(str(docs / "obsidian" / "Reflective Notes" / "r.md"))
+    assert watcher.domain_for(str(docs / "obsidian" / "nota.md")) == "obsidian"
+    assert watcher.domain_for(str(docs / "informe.pdf")) == "general"
+
+
+@pytest.mark.asyncio
+async def test_polling_detects_create_modify_and_delete(state_db, docs):
+    queue = RecordingQueue()
+    note = docs / "obsidian" / "nota.md"
+    watcher = _watcher(queue, docs, force_polling=True)
+    watcher.start()
+    try:
+        # Let the baseline snapshot be taken
+        await asyncio.sleep(0.1)
+        note.write_text("# v1")
+        (docs / "ignorada.txt").write_text("no")
+        assert await queue.next_batch() == [("ingest", str(note), "obsidian")]
+
+        # Once indexed, a rewrite is a change again
+        SovereignStateManager.update_vault_index(str(note), 1)
+        time.sleep(0.01)
+        note.write_text("# v2, mas larga")
+        assert await queue.next_batch() == [("ingest", str(note), "obsidian")]
+
+        note.unlink()
+        assert await queue.next_batch() == [("delete", str(note), "obsidian")]
+    finally:
+        await watcher.stop()
+    assert not watcher.running
+
+
+@pytest.mark.asyncio
+async def test_bursts_of_writes_are_coalesced(state_db, docs):
+    queue = RecordingQueue()
+    watcher = _watcher(queue, docs, force_polling=True, debounce_ms=300)
+    watcher.start()
+    try:
+        await asyncio.sleep(0.1)
+        for i in range(5):
+            (docs / "informe.md").write_text("x" * (i + 1))
+            (docs / "otro.md").write_text("y" * (i + 1))
+            await asyncio.sleep(0.06)
+        batch = await queue.next_batch()
+    finally:
+        await watcher.stop()
+    assert batch == [("ingest", str(docs / "informe.md"), "general"), ("ingest", str(docs / "otro.md"), "general")]
+
+
+@pytest.mark.skipif(not WATCHFILES_AVAILABLE, reason="watchfiles not installed")
+@pytest.mark.asyncio
+async def test_native_watcher_queues_changes(state_db, docs):
+    queue = RecordingQueue()
+    watcher = _watcher(queue, docs)
+    watcher.start()
+    try:
+        await asyncio.sleep(0.2)
+        (docs / "obsidian" / "nota.md").write_text("# hola")
+        assert await queue.next_batch() == [("ingest", str(docs / "obsidian" / "nota.md"), "obsidian")]
+    finally:
+        await watcher.stop()
+
+
+def test_classify_skips_untouched_and_expands_deleted_folders(state_db, docs):
+    watcher = _watcher(RecordingQueue(), docs)
+    kept = docs / "obsidian" / "kept.md"
+    kept.write_text("igual")
+    SovereignStateManager.update_vault_index(str(kept), 1)
+    for name in ("a.md", "b.md"):
+        SovereignStateManager.update_vault_index(str(docs / "obsidian" / "proyecto" / name), 1)
+
+    upserts, deletes = watcher.classify({str(kept), str(docs / "obsidian" / "proyecto"), str(docs / "nunca.md")})
+    # kept.md was only touched; the folder went away with two indexed notes; nunca.md was never indexed
+    assert upserts == []
+    assert deletes == [str(docs / "obsidian" / "proyecto" / "a.md"), str(docs / "obsidian" / "proyecto" / "b.md")]
+
+
+def test_enqueue_coalesces_into_the_queued_job(state_db):
+    first = SovereignStateManager.enqueue_ingest_job("/docs/a.md", "a.md")
+    again = SovereignStateManager.enqueue_ingest_job("/docs/a.md", "a.md", action="delete")
+    assert again["job_id"] == first["job_id"] and again["coalesced"]
+    assert SovereignStateManager.get_ingest_job(first["job_id"])["action"] == "delete"
+
+    # While a.md is running, a new job for it waits for the first to finish
+    claimed = SovereignStateManager.claim_ingest_job()
+    waiting = SovereignStateManager.enqueue_ingest_job("/docs/a.md", "a.md")
+    assert waiting["job_id"] != claimed["job_id"] and not waiting.get("coalesced")
+    other = SovereignStateManager.enqueue_ingest_job("/docs/b.md", "b.md")
+    assert SovereignStateManager.claim_ingest_job()["job_id"] == other["job_id"]
+    assert SovereignStateManager.claim_ingest_job() is None
+
+    SovereignStateManager.update_ingest_job(claimed["job_id"], "done")
+    assert SovereignStateManager.claim_ingest_job()["job_id"] == waiting["job_id"]
+
+
+@pytest.mark.asyncio
+async def test_delete_job_removes_chunks_everywhere(state_db, tmp_path):
+    path = str(tmp_path / "nota.md")
+    other = str(tmp_path / "otra.md")
+    SovereignStateManager.update_vault_index(path, 2, "contenido soberano unico")
+    SovereignStateManager.update_vault_index(other, 1, "otra nota")
+    retriever = MagicMock()
+    retriever.remove_from_bm25_index.return_value = 2
+    store = MagicMock()
+    ingest = IngestUseCase(store, retriever)
+
+    queue = IngestJobQueue(ingest, workers=1, poll_seconds=0.02)
+    queue.start()
+    try:
+        job = await queue.submit(path, "nota.md", action="delete")
+        deadline = time.monotonic() + 5
+        while (done := SovereignStateManager.get_ingest_job(job["job_id"]))["state"] != "done":
+            assert time.monotonic() < deadline
+            await asyncio.sleep(0.01)
+    finally:
+        await queue.stop()
+
+    assert done["result"] == {"status": "deleted", "indexed": True}
+    store.delete.assert_called_once_with({"source": path})
+    retriever.remove_from_bm25_index.assert_called_once_with([path])
+    assert SovereignStateManager.search_fts("soberano") == []
+    assert list(SovereignStateManager.vault_fingerprints()) == [other]
+
+
+def test_bm25_removal_keeps_other_sources(monkeypatch):
+    monkeypatch.setattr("app.domain.services.retriever_service.EnsembleRetriever", MagicMock())
+    service = HybridRetrieverService(MagicMock())
+    service.update_bm25_index([
+        Document(page_content="vault soberano", metadata={"source": "a.md"}),
+        Document(page_content="otra nota", metadata={"source": "b.md"}),
+    ])
+    assert service.remove_from_bm25_index(["a.md"]) == 1
+    assert [d.metadata["source"] for d in service.bm25_retriever.docs] == ["b.md"]
+    assert service.remove_from_bm25_index(["b.md"]) == 1
+    assert service.bm25_retriever is None and service.ensemble_retriever is None
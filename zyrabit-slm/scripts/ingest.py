@@ -1,30 +1,29 @@
+"""
+Bulk ingest of a directory into the RAG vector store, built on the API's IngestUseCase.
+
+Documents are streamed (one per worker in memory), embedded in bounded batches and
+checkpointed in SQLite: if the run stops, running the same command again resumes
+from the files that were not indexed yet. Chunk ids are content hashes, so re-runs
+never duplicate chunks.
+
+    python scripts/ingest.py document_source
+    python scripts/ingest.py document_source --domain libros --batch-chunks 128 --state-db ingest_state.db
+"""
 import os
-from types import SimpleNamespace
 import sys
+import asyncio
+import argparse
 
-try:
-    from langchain_community.document_loaders import PyPDFLoader
-except Exception:
-    PyPDFLoader = None
+# The pipeline lives in the API package (zyrabit-slm/api-rag)
+API_RAG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api-rag")
+if API_RAG_DIR not in sys.path:
+    sys.path.insert(0, API_RAG_DIR)
 
 try:
     from langchain_community.embeddings import OllamaEmbeddings
 except Exception:
     OllamaEmbeddings = None
 
-try:
-    from langchain.text_splitter import RecursiveCharacterTextSplitter
-except Exception:
-    try:
-        from langchain_text_splitters import RecursiveCharacterTextSplitter
-    except Exception:
-        RecursiveCharacterTextSplitter = None
-
-try:
-    import chromadb
-except Exception:
-    chromadb = SimpleNamespace(HttpClient=None)
-
 # --- Configuration ---
 SOURCE_DIRECTORY = "document_source"
 CHROMA_HOST = "localhost"
@@ -32,10 +31,9 @@ CHROMA_PORT = 8001
 COLLECTION_NAME = "libros_tecnicos"
 # Make sure to have this model with `ollama pull mxbai-embed-large`
 EMBEDDING_MODEL = "mxbai-embed-large"
-
-# --- Chunking Configuration (The "Sweet Spot") ---
-CHUNK_SIZE = 1000
-CHUNK_OVERLAP = 200
+OLLAMA_URL = "http://localhost:11434"
+# Checkpoints of the runs (and the vault index that makes re-runs skip unchanged files)
+STATE_DB = "ingest_state.db"
 
 
 def check_ollama_model(model_name):
@@ -67,150 +65,100 @@ def check_ollama_model(model_name):
         return False
 
 
-def load_documents(source_dir):
-    """Loads and reads PDFs from the source directory."""
-    global PyPDFLoader
-    if PyPDFLoader is None:
-        try:
-            from langchain_community.document_loaders import PyPDFLoader as _PyPDFLoader
-            PyPDFLoader = _PyPDFLoader
-        except Exception as exc:
-            print(f"Error importando PyPDFLoader: {exc}")
-            sys.exit(1)
-
-    print(f"\nCargando documentos desde: '{source_dir}'")
-    if not os.path.exists(source_dir):
-        print(
-            f"Error: El directorio '{source_dir}' no existe. Por favor, créalo y añada sus PDFs.")
-        sys.exit(1)
+def build_vector_store(host, port, collection, model, ollama_url):
+    """Chroma collection behind the API's vector store adapter (same embeddings as the API)."""
+    import chromadb
+    from langchain_chroma import Chroma
+    from app.infrastructure.persistence.chroma_adapter import ChromaAdapter, DirectOllamaEmbeddings
+
+    print(f"\nConectando a ChromaDB en {host}:{port} (colección '{collection}')...")
+    client = chromadb.HttpClient(host=host, port=port)
+    embeddings = DirectOllamaEmbeddings(model=model, base_url=ollama_url)
+    return ChromaAdapter(Chroma(client=client, collection_name=collection, embedding_function=embeddings))
+
+
+async def ingest_directory(source_dir, vector_store, domain="general", concurrency=None, batch_chunks=None, out=None):
+    """Runs (or resumes) the bulk ingest of `source_dir`, printing live progress. Returns the final stats."""
+    out = out or sys.stdout
+    from app.domain.use_cases.ingest_use_case import IngestUseCase
+    from app.domain.services.bulk_ingest import BulkIngest, bulk_progress_line
+
+    options = {key: value for key, value in (("concurrency", concurrency), ("batch_chunks", batch_chunks)) if value}
+    runner = BulkIngest(
+        IngestUseCase(vector_store),
+        on_progress=lambda progress: print(f"\r  {bulk_progress_line(progress)}", end="", file=out, flush=True),
+        **options,
+    )
+    run = await runner.open(source_dir, domain)
+    if run["files_total"]:
+        print(f"Reanudando la ingesta {run['run_id']} ({run['files_done']}/{run['files_total']} archivos hechos)", file=out)
+    try:
+        return await runner.run(source_dir, domain)
+    finally:
+        print(file=out)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ingesta masiva y reanudable de un directorio (PDF y Markdown)")
+    parser.add_argument("source", nargs="?", default=SOURCE_DIRECTORY)
+    parser.add_argument("--domain", default="general")
+    parser.add_argument("--concurrency", type=int, default=None, help="documentos extraídos en paralelo")
+    parser.add_argument("--batch-chunks", type=int, default=None, help="chunks por llamada de embeddings")
+    parser.add_argument("--state-db", default=STATE_DB)
+    parser.add_argument("--chroma-host", default=CHROMA_HOST)
+    parser.add_argument("--chroma-port", type=int, default=CHROMA_PORT)
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--embedding-model", default=EMBEDDING_MODEL)
+    parser.add_argument("--ollama-url", default=OLLAMA_URL)
+    parser.add_argument("--skip-check", action="store_true", help="no verificar el modelo en Ollama")
+    return parser.parse_args(argv)
+
+
+def main(argv=None, vector_store=None):
+    args = parse_args(argv)
+    print("--- Iniciando Script de Ingesta RAG-Ops ---")
 
-    pdf_files = [f for f in os.listdir(source_dir) if f.endswith(".pdf")]
+    if not os.path.isdir(args.source):
+        print(f"Error: El directorio '{args.source}' no existe. Por favor, créalo y añada sus documentos.")
+        return 1
 
-    if not pdf_files:
-        print(f"Error: No se encontraron archivos PDF en '{source_dir}'.")
-        print(
-            "Asegúrese de haber colocado sus archivos (ej. 'Clean Architecture.pdf') allí.")
-        sys.exit(1)
+    # 1. Verify Ollama
+    if vector_store is None and not args.skip_check and not check_ollama_model(args.embedding_model):
+        return 1
 
-    print(f"Se encontraron {len(pdf_files)} archivos PDF. Iniciando carga...")
+    from app.infrastructure.shared.state_tracker import SovereignStateManager
+    from app.infrastructure.persistence.pdf_processor import shutdown_pdf_pool
 
-    all_docs = []
-    for pdf_file in pdf_files:
-        path = os.path.join(source_dir, pdf_file)
+    # 2. Checkpoints + Vector Store
+    SovereignStateManager.init_db(args.state_db)
+    if vector_store is None:
         try:
-            loader = PyPDFLoader(path)
-            docs = loader.load()
-            print(f"  - Cargado: {pdf_file} ({len(docs)} páginas)")
-            all_docs.extend(docs)
+            vector_store = build_vector_store(
+                args.chroma_host, args.chroma_port, args.collection, args.embedding_model, args.ollama_url
+            )
         except Exception as e:
-            print(f"Error cargando '{pdf_file}': {e}. Saltando archivo.")
-
-    print(f"Carga completa. Total de páginas cargadas: {len(all_docs)}")
-    return all_docs
-
-
-def split_documents(docs):
-    """Splits documents into chunks."""
-    global RecursiveCharacterTextSplitter
-    if RecursiveCharacterTextSplitter is None:
-        print("Error: RecursiveCharacterTextSplitter no está disponible en el entorno.")
-        sys.exit(1)
-
-    print(
-        f"\nDividiendo documentos en chunks (Tamaño: {CHUNK_SIZE}, Superposición: {CHUNK_OVERLAP})...")
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP
-    )
-    chunks = text_splitter.split_documents(docs)
-    print(f"División completa. Número total de chunks: {len(chunks)}")
-    return chunks
-
-
-def populate_vector_db(chunks, embeddings):
-    """Connects to ChromaDB and populates the database."""
-    print(f"\nConectando a ChromaDB en {CHROMA_HOST}:{CHROMA_PORT}...")
-    if chromadb.HttpClient is None:
-        try:
-            import chromadb as chromadb_runtime
-        except Exception as exc:
-            print(f"Error importando chromadb: {exc}")
-            sys.exit(1)
-        globals()["chromadb"] = chromadb_runtime
+            print(f"Error conectando a ChromaDB: {e}")
+            print("Asegúrate de que el stack de Docker esté corriendo ('docker compose up -d')")
+            return 1
 
+    # 3. Stream, embed in batches and checkpoint
     try:
-        client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
-        print("Conexión a ChromaDB exitosa.")
-    except Exception as e:
-        print(f"Error conectando a ChromaDB: {e}")
-        print("Asegúrate de que el stack de Docker esté corriendo ('docker compose up -d')")
-        print(
-            f"Y que el puerto {CHROMA_PORT} esté expuesto por el contenedor 'vector-db'.")
-        sys.exit(1)
-
-    print(f"Obteniendo o creando la colección: '{COLLECTION_NAME}'")
-    collection = client.get_or_create_collection(name=COLLECTION_NAME)
-
-    # Convert LangChain documents to something Chroma can ingest (text and
-    # metadata)
-    documents_to_add = [chunk.page_content for chunk in chunks]
-    metadatas_to_add = [chunk.metadata for chunk in chunks]
-    # Create unique IDs for each chunk
-    ids_to_add = [f"chunk_{i}" for i in range(len(chunks))]
-
-    print(
-        f"Iniciando ingesta de {len(chunks)} chunks... Esto puede tardar varios minutos.")
-
-    # Chroma ingests in batches.
-    # The `add` client handles embeddings if we pass the documents.
-    # BUT! It is better to use LangChain embeddings for consistency.
-
-    print("Generando embeddings con Ollama... (Esto es lo que más tarda)")
-    embedded_chunks = embeddings.embed_documents(documents_to_add)
-
-    print(f"Embeddings generados. Añadiendo a la colección en batches...")
-
-    # Add to collection in batches to avoid overloading
-    batch_size = 100
-    for i in range(0, len(chunks), batch_size):
-        batch_end = min(i + batch_size, len(chunks))
-        print(
-            f"  - Añadiendo batch {i//batch_size + 1} (chunks {i} a {batch_end-1})...")
-
-        collection.add(
-            embeddings=embedded_chunks[i:batch_end],
-            documents=documents_to_add[i:batch_end],
-            metadatas=metadatas_to_add[i:batch_end],
-            ids=ids_to_add[i:batch_end]
-        )
+        stats = asyncio.run(ingest_directory(
+            args.source, vector_store, args.domain, args.concurrency, args.batch_chunks
+        ))
+    except KeyboardInterrupt:
+        print("\nIngesta interrumpida. Vuelve a ejecutar el mismo comando para reanudarla.")
+        return 130
+    finally:
+        shutdown_pdf_pool()
 
     print("\n--- ¡Ingesta Completa! ---")
-    count = collection.count()
-    print(f"La colección '{COLLECTION_NAME}' ahora contiene {count} chunks.")
-    print("¡La 'gasolina' está cargada! Ya puedes hacer consultas RAG reales.")
-
-
-def main():
-    print("--- Iniciando Script de Ingesta RAG-Ops ---")
-
-    # 1. Verify Ollama
-    if not check_ollama_model(EMBEDDING_MODEL):
-        sys.exit(1)
-
-    embeddings = OllamaEmbeddings(model=EMBEDDING_MODEL)
-
-    # 2. Load Documents
-    docs = load_documents(SOURCE_DIRECTORY)
-    if not docs:
-        print("No hay documentos para procesar. Saliendo.")
-        sys.exit(1)
-
-    # 3. Split Documents
-    chunks = split_documents(docs)
-
-    # 4. Populate Database
-    populate_vector_db(chunks, embeddings)
+    print(
+        f"{stats['files_done']}/{stats['files_total']} archivos, {stats['chunks_done']} chunks "
+        f"({stats['chunks_per_sec']} chunks/s, {stats['errors']} errores)."
+    )
+    return 0 if not stats["errors"] else 2
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())